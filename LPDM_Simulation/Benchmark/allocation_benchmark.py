@@ -0,0 +1,132 @@
+########################################################################################################################
+# *** Copyright Notice ***
+#
+# "Price Based Local Power Distribution Management System (Local Power Distribution Manager) v2.0"
+# Copyright (c) 2017, The Regents of the University of California, through Lawrence Berkeley National Laboratory
+# (subject to receipt of any required approvals from the U.S. Dept. of Energy).  All rights reserved.
+#
+# If you have questions about your rights to use or distribute this software, please contact
+# Berkeley Lab's Innovation & Partnerships Office at  IPO@lbl.gov.
+########################################################################################################################
+
+"""
+Measures the cost of delivering messages through a device event queue, comparing dict-backed Message and Event objects
+(as the engine used to allocate for every message) with the slotted, pooled Message and MessageEvent.
+Run from the LPDM_Simulation folder: python -m Benchmark.allocation_benchmark [num_messages]
+
+Reports the memory held per queued message delivery (message plus event, measured with tracemalloc), the number of
+message and event objects newly allocated per delivery in a steady send/read cycle, and the delivery rate.
+"""
+
+import sys
+import time
+import tracemalloc
+
+from Build.Simulation_Operation.event import MessageEvent
+from Build.Simulation_Operation.message import Message, MessageType
+from Build.Simulation_Operation.queue import PriorityQueue
+
+DEFAULT_NUM_MESSAGES = 200000
+BATCH_SIZE = 256  # deliveries queued before the queue is drained, as when a device receives a burst of messages
+
+
+class _DictEvent(object):
+
+    def __init__(self, action, *args):
+        self._action = action
+        self._args = args
+
+    def run_event(self):
+        self._action(*self._args)
+
+
+class _DictMessage(object):
+
+    def __init__(self, time, sender_id, message_type, value, extra_info=None, redirect=None):
+        self.time = time
+        self.sender_id = sender_id
+        self.message_type = message_type
+        self.value = value
+        self.extra_info = extra_info
+        self.redirect = redirect
+
+
+class _Receiver(object):
+
+    def __init__(self):
+        self.total = 0.0
+
+    def deliver_message(self, event):
+        self.read_message(event.get_message())
+
+    def read_message(self, message):
+        if message.message_type == MessageType.POWER:
+            self.total += message.value
+
+
+def _queue_dict(receiver, queue, time_stamp):
+    message = _DictMessage(time_stamp, "gc_1", MessageType.POWER, 1.0)
+    event = _DictEvent(receiver.read_message, message)
+    queue.add(event, time_stamp)
+    return event, message
+
+
+def _queue_pooled(receiver, queue, time_stamp):
+    message = Message.acquire(time_stamp, "gc_1", MessageType.POWER, 1.0)
+    event = MessageEvent.acquire(receiver, message)
+    queue.add(event, time_stamp)
+    return event, message
+
+
+##
+# Returns the memory held per queued delivery, in bytes, over and above the queue's own entries.
+# @param queue_delivery a function queueing one delivery
+# @param num_messages the number of deliveries to queue
+
+def bytes_per_queued_event(queue_delivery, num_messages):
+    receiver = _Receiver()
+    queues = [PriorityQueue() for _ in range(2)]  # a queue with entries only, and one with the deliveries too
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    for time_stamp in range(num_messages):
+        queues[0].add(time_stamp, time_stamp)
+    entries_only = tracemalloc.get_traced_memory()[0] - start
+    start = tracemalloc.get_traced_memory()[0]
+    for time_stamp in range(num_messages):
+        queue_delivery(receiver, queues[1], time_stamp)
+    with_deliveries = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return (with_deliveries - entries_only) / num_messages
+
+
+##
+# Sends and reads messages in batches through a queue.
+# @param queue_delivery a function queueing one delivery
+# @param num_messages the number of deliveries
+# @return a tuple of the number of distinct message and event objects used per delivery, and deliveries per second
+
+def delivery_cycle(queue_delivery, num_messages):
+    receiver = _Receiver()
+    queue = PriorityQueue()
+    objects = {}  # kept alive here so that no object's id is reused by a later one
+    start = time.perf_counter()
+    for batch_start in range(0, num_messages, BATCH_SIZE):
+        for time_stamp in range(batch_start, min(batch_start + BATCH_SIZE, num_messages)):
+            for obj in queue_delivery(receiver, queue, time_stamp):
+                objects[id(obj)] = obj
+        while not queue.is_empty():
+            event, time_stamp = queue.pop()
+            event.run_event()
+    elapsed = time.perf_counter() - start
+    return len(objects) / num_messages, num_messages / elapsed
+
+
+if __name__ == "__main__":
+    num_messages = int(sys.argv[1]) if len(sys.argv) >= 2 else DEFAULT_NUM_MESSAGES
+
+    print("{} message deliveries, in batches of {}".format(num_messages, BATCH_SIZE))
+    print("{:<26}{:>18}{:>22}{:>18}".format("", "bytes/queued event", "objects/delivery", "deliveries/s"))
+    for name, queue_delivery in (("dict-backed", _queue_dict), ("slotted, pooled", _queue_pooled)):
+        size = bytes_per_queued_event(queue_delivery, num_messages)
+        allocated, rate = delivery_cycle(queue_delivery, num_messages)
+        print("{:<26}{:>18.1f}{:>22.4f}{:>18.0f}".format(name, size, allocated, rate))
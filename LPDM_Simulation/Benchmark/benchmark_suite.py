@@ -0,0 +1,507 @@
+########################################################################################################################
+# *** Copyright Notice ***
+#
+# "Price Based Local Power Distribution Management System (Local Power Distribution Manager) v2.0"
+# Copyright (c) 2017, The Regents of the University of California, through Lawrence Berkeley National Laboratory
+# (subject to receipt of any required approvals from the U.S. Dept. of Energy).  All rights reserved.
+#
+# If you have questions about your rights to use or distribute this software, please contact
+# Berkeley Lab's Innovation & Partnerships Office at  IPO@lbl.gov.
+########################################################################################################################
+
+"""
+A repeatable benchmark suite for the simulation engine, to spot throughput regressions and measure optimizations.
+Run from the LPDM_Simulation folder:
+    python -m Benchmark.benchmark_suite run [--output results.json] [--quick]
+    python -m Benchmark.benchmark_suite compare baseline.json results.json [--threshold 0.1]
+
+The run mode times:
+    - the bundled scenarios, each run in its own process so that its peak RSS is its own, keeping the fastest of a
+      few runs. Each records its event count, setup and run wall time, events/s, peak RSS and the peak number of
+      pending events and queued devices.
+    - synthetic topologies of increasing size (a tree of grid controllers, each with a utility meter and a mix of
+      EUDs, see scenario_generator), giving scaling curves of events/s and setup time against the number of devices.
+    - microbenchmarks of the engine's hot spots: PriorityQueue, EfficiencyCurve.get_converter_loss, the grid
+      controller price logics' calc_price (also for a hub grid controller of 256 neighbors), the rolling price
+      statistics read by a battery on each update and Device.build_log_notation.
+    - a partitioned parallel run (see parallel.py) of a synthetic mesh of grid controllers, against sequential runs of
+      the same scenario with the default message order (the engine users run) and with the canonical order (whose
+      results a partitioned run reproduces, which is checked). The speedup is that over the default sequential run.
+Logging is disabled while timing, so the engine rather than the log file I/O is measured. Results are written as JSON.
+
+The scale mode charts how setup and throughput scale to large topologies, e.g. from 1k to 100k devices:
+    python -m Benchmark.benchmark_suite scale --gcs 10 100 1000 --euds-per-gc 100 [--layout mesh] [--hours 1]
+Each size runs once, for the given number of simulated hours.
+
+The parallel mode measures the speedup of partitioned runs of larger meshes:
+    python -m Benchmark.benchmark_suite parallel --gcs 8 16 --euds-per-gc 16 [--partitions 4] [--hours 24]
+
+The compare mode lists the change of every measurement between two result files, flagging the ones which got worse by
+more than the threshold, and exits with status 1 if any did.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from Build.Objects.battery import Battery, BatteryPriceLogicA
+from Build.Objects.converter.efficiency_curve import EfficiencyCurve
+from Build.Objects.grid_controller import GridController, GCWeightedAveragePriceLogic, GCMarginalPriceLogic, \
+    GCMarginalPriceLogicB, GCStaticPrice
+from Build.Objects.market_book import MarketBook
+from Build.Simulation_Operation.parallel import run_partitioned
+from Build.Simulation_Operation.queue import PriorityQueue
+from Build.Simulation_Operation.scenario_generator import generate_scenario, write_scenario, LAYOUTS
+from Build.Simulation_Operation.simulation import SimulationSetup
+from Build.Simulation_Operation.supervisor import Supervisor
+
+SCENARIOS = ["base-case.json", "2-GC.json", "JSON_WeekTest.json", "wire.json"]
+SCALING_SIZES = [(1, 8), (2, 16), (4, 32), (8, 64)]  # (grid controllers, EUDs per grid controller)
+QUICK_SCALING_SIZES = [(1, 8), (2, 16), (4, 32)]
+PARALLEL_SIZES = [(8, 16)]  # (grid controllers, EUDs per grid controller) of the meshes run in parallel
+QUICK_PARALLEL_SIZES = [(4, 8)]
+SAMPLE_INTERVAL = 256  # supervisor turns between samples of the queue sizes
+MICRO_REPEATS = 5
+SCENARIO_REPEATS = 3
+DEFAULT_THRESHOLD = 0.1
+MIN_FLAGGED_SECONDS = 0.005  # changes in wall time smaller than this are timer noise, and never flagged
+
+# For each measurement compared, whether a higher value is better
+HIGHER_IS_BETTER = {"events_per_s": True, "run_s": False, "setup_s": False, "peak_rss_kb": False, "ns_per_op": False,
+                    "speedup": True}
+
+
+#  ________________________________________________ SCENARIO RUNS _____________________________________________________
+
+##
+# Runs one simulation and measures it. This is the function run in a fresh worker process for each scenario.
+# @param config_file the configuration json of the scenario (a name in the configuration files folder, or a path)
+# @param override_args the list of override arguments of the run
+# @param event_calendar whether to run the simulation on the single event calendar
+# @param run_seconds how many seconds of simulated time to run for, or None to run to the end of the scenario
+# @return a dictionary of the measurements of the run
+
+def measure_simulation(config_file, override_args=(), event_calendar=False, run_seconds=None):
+    logging.disable(logging.CRITICAL)
+    logger = logging.getLogger("lpdm")
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):  # silence the device connection printouts
+            sim = SimulationSetup(supervisor=Supervisor(event_calendar=event_calendar))
+            start = time.perf_counter()
+            sim.setup_simulation(config_file, list(override_args))
+            setup_time = time.perf_counter() - start
+
+            supervisor = sim.supervisor
+            end_time = sim.end_time if run_seconds is None else min(sim.end_time, run_seconds)
+            num_events = num_turns = peak_pending = peak_queued = 0
+            start = time.perf_counter()
+            while supervisor.has_next_event():
+                if supervisor.peek_next_event()[1] > end_time:
+                    break
+                num_events += supervisor.occur_next_event()
+                num_turns += 1
+                if num_turns % SAMPLE_INTERVAL == 0:
+                    peak_pending = max(peak_pending, supervisor.pending_event_count())
+                    peak_queued = max(peak_queued, supervisor.queued_device_count())
+            run_time = time.perf_counter() - start
+            supervisor.finish_all(end_time)
+    finally:
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+        logging.disable(logging.NOTSET)
+    return {
+        "devices": len(supervisor.all_devices()),
+        "events": num_events,
+        "turns": num_turns,
+        "setup_s": setup_time,
+        "run_s": run_time,
+        "events_per_s": num_events / run_time if run_time > 0 else 0.0,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "peak_pending_events": peak_pending,
+        "peak_queued_devices": peak_queued
+    }
+
+
+##
+# Measures a simulation a number of times, each in a fresh worker process, recording an error rather than raising if
+# the run fails.
+# @param repeats the number of runs
+# @param run_seconds how many seconds of simulated time to run for, or None to run to the end of the scenario
+# @return a dictionary of the measurements of the fastest run, or of the error
+
+def run_isolated(config_file, override_args=(), event_calendar=False, repeats=SCENARIO_REPEATS, run_seconds=None):
+    best = None
+    for _ in range(repeats):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            try:
+                measured = executor.submit(measure_simulation, config_file, override_args, event_calendar,
+                                           run_seconds).result()
+            except Exception as error:  # one failing scenario should not lose the rest of the suite
+                return {"error": "{}: {}".format(type(error).__name__, error)}
+        if best is None or measured["run_s"] < best["run_s"]:
+            best = measured
+    return best
+
+
+##
+# Runs the bundled scenarios.
+# @param repeats the number of runs of each scenario
+# @return a list of the measurements of each scenario
+def run_scenarios(repeats=SCENARIO_REPEATS):
+    results = []
+    for config_file in SCENARIOS:
+        row = {"scenario": config_file}
+        row.update(run_isolated(config_file, repeats=repeats))
+        results.append(row)
+    return results
+
+
+##
+# Runs synthetic topologies of increasing size. Every grid controller has its own utility meter, so that the work per
+# device stays about the same as the topology grows (without one, load profile EUDs bargain over every change of load).
+# @param sizes a list of (grid controllers, EUDs per grid controller)
+# @param repeats the number of runs of each topology
+# @param layout the layout of the grid controllers (see scenario_generator.gc_links)
+# @param run_seconds how many seconds of simulated time to run each for, or None to run a whole day
+# @return a list of the measurements of each topology
+def run_scaling(sizes, repeats=SCENARIO_REPEATS, layout="tree", run_seconds=None):
+    results = []
+    for num_gcs, euds_per_gc in sizes:
+        handle, config_path = tempfile.mkstemp(suffix=".json")
+        os.close(handle)
+        write_scenario(generate_scenario(num_gcs, euds_per_gc, layout=layout, num_utility_meters=num_gcs), config_path)
+        try:
+            row = {"scenario": "{}_{}x{}".format(layout, num_gcs, euds_per_gc)}
+            row.update(run_isolated(config_path, repeats=repeats, run_seconds=run_seconds))
+        finally:
+            os.remove(config_path)
+        results.append(row)
+    return results
+
+
+#  ________________________________________________ PARALLEL RUNS _____________________________________________________
+
+##
+# Times one sequential run of a scenario, set up but not started.
+# @param sim the SimulationSetup of the scenario
+# @return the wall time of the run in seconds and the dictionary of its SimulationResult
+
+def _time_sequential(sim):
+    supervisor = sim.supervisor
+    start = time.perf_counter()
+    while supervisor.has_next_event() and supervisor.peek_next_event()[1] <= sim.end_time:
+        supervisor.occur_next_event()
+    result = supervisor.finish_all(sim.end_time)
+    return time.perf_counter() - start, result.to_dict()
+
+
+def _setup_scenario(config, run_seconds, canonical_order):
+    sim = SimulationSetup(supervisor=Supervisor(canonical_order=canonical_order))
+    sim.build_simulation(config, [])
+    if run_seconds is not None:
+        sim.end_time = min(sim.end_time, run_seconds)
+    return sim
+
+
+##
+# Times a partitioned parallel run of synthetic meshes of grid controllers against sequential runs of the same
+# scenario, with the default message order and with the canonical order. Each time is the best of a few runs, and
+# none includes the setup.
+# @param sizes a list of (grid controllers, EUDs per grid controller)
+# @param num_partitions the number of partitions, and so of processes. Defaults to the number of processors, and to
+# at least two, so that messages are passed between partitions.
+# @param repeats the number of runs of each
+# @param run_seconds how many seconds of simulated time to run each for, or None to run a whole day
+# @return a list of the measurements of each mesh
+
+def run_parallel(sizes, num_partitions=None, repeats=SCENARIO_REPEATS, run_seconds=None):
+    num_partitions = num_partitions or max(2, os.cpu_count() or 1)
+    results = []
+    logging.disable(logging.CRITICAL)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):  # silence the device connection printouts
+            for num_gcs, euds_per_gc in sizes:
+                config = generate_scenario(num_gcs, euds_per_gc, layout="mesh", num_utility_meters=num_gcs)
+                sequential_s = canonical_s = parallel_s = None
+                for _ in range(repeats):
+                    elapsed, _ = _time_sequential(_setup_scenario(config, run_seconds, False))
+                    sequential_s = elapsed if sequential_s is None else min(sequential_s, elapsed)
+                    elapsed, expected = _time_sequential(_setup_scenario(config, run_seconds, True))
+                    canonical_s = elapsed if canonical_s is None else min(canonical_s, elapsed)
+                    parallel = run_partitioned(_setup_scenario(config, run_seconds, True), num_partitions)
+                    parallel_s = parallel.wall_time if parallel_s is None else min(parallel_s, parallel.wall_time)
+                results.append({
+                    "scenario": "mesh_{}x{}".format(num_gcs, euds_per_gc),
+                    "partitions": len(parallel.partitions),
+                    "processors": os.cpu_count(),
+                    "windows": parallel.windows,
+                    "remote_messages": parallel.remote_messages,
+                    "sequential_s": sequential_s,
+                    "canonical_s": canonical_s,
+                    "parallel_s": parallel_s,
+                    "speedup": sequential_s / parallel_s if parallel_s > 0 else 0.0,
+                    "matches_canonical": parallel.result.to_dict() == expected
+                })
+    finally:
+        logging.disable(logging.NOTSET)
+    return results
+
+
+#  _________________________________________________ MICROBENCHMARKS __________________________________________________
+
+##
+# Returns the best time per operation of a function performing a number of operations.
+# @param function the function to time
+# @param num_ops the number of operations one call performs
+# @return the best time per operation over MICRO_REPEATS calls, in nanoseconds
+
+def time_per_op(function, num_ops):
+    best = None
+    for _ in range(MICRO_REPEATS):
+        start = time.perf_counter_ns()
+        function()
+        elapsed = time.perf_counter_ns() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / num_ops
+
+
+def _queue_cycle(priorities):
+    queue = PriorityQueue()
+    for task, priority in enumerate(priorities):
+        queue.add(task, priority)
+    for task in range(0, len(priorities), 4):  # re-prioritize a quarter of the tasks, leaving tombstones
+        queue.add(task, priorities[task] + 1)
+    while not queue.is_empty():
+        queue.pop()
+
+
+def _battery_price_updates(price_logic, battery_logic, prices):
+    time = price_logic._last_price_update_time
+    for price in prices:  # a price change every 5 minutes, as the grid controller updates its battery
+        time += 300
+        price_logic.set_current_price(price)
+        price_logic.update_prices(time)
+        battery_logic.calc_charge_preference(0.6, price, price_logic.get_interval_history())
+
+
+def _price_logic_inputs(rng, num_neighbors):
+    neighbor_prices = {"utm_1": 0.1}
+    loads = {"utm_1": 500.0}
+    requested = {}
+    allocated = {}
+    for num in range(num_neighbors):
+        device_id = "eud_{}".format(num)
+        neighbor_prices[device_id] = rng.uniform(0.05, 0.2)
+        loads[device_id] = -rng.uniform(10, 100)
+        requested[device_id] = -rng.uniform(0, 50)
+        allocated[device_id] = -rng.uniform(0, 50)
+    return neighbor_prices, requested, allocated, loads
+
+
+##
+# Runs the microbenchmarks.
+# @param num_ops the number of operations timed by each
+# @return a dictionary of microbenchmark name to its time per operation and the number of operations timed
+
+def run_micro(num_ops):
+    rng = random.Random(0)
+    results = {}
+
+    priorities = [rng.randint(0, 86400) for _ in range(num_ops)]
+    results["priority_queue_cycle"] = time_per_op(lambda: _queue_cycle(priorities), num_ops)
+
+    curve = EfficiencyCurve([{"capacity": capacity / 20.0, "efficiency": 0.6 + 0.3 * capacity / 20.0}
+                             for capacity in range(1, 21)], 1000.0)
+    loads = [rng.uniform(-1200.0, 1200.0) for _ in range(num_ops)]
+    results["efficiency_curve_converter_loss"] = time_per_op(
+        lambda: [curve.get_converter_loss(load) for load in loads], num_ops)
+
+    num_calls = max(1, num_ops // 10)
+    for num_neighbors, suffix in ((16, ""), (256, "_hub")):
+        book = MarketBook.from_dicts(*_price_logic_inputs(rng, num_neighbors))
+        for logic_class in (GCWeightedAveragePriceLogic, GCMarginalPriceLogic, GCMarginalPriceLogicB, GCStaticPrice):
+            logic = logic_class(3600, 0.1, 0.01)
+            results["calc_price_{}{}".format(logic_class.__name__, suffix)] = time_per_op(
+                lambda: [logic.calc_price(book.prices, book.loads, book.requested, book.allocated, 500.0, ("utm_1",),
+                                          market_book=book) for _ in range(num_calls)], num_calls)
+
+    price_logic = GCWeightedAveragePriceLogic(3600, 0.1, 0.01)
+    battery_logic = BatteryPriceLogicA()
+    prices = [rng.uniform(0.05, 0.2) for _ in range(num_ops)]
+    results["battery_price_update"] = time_per_op(lambda: _battery_price_updates(price_logic, battery_logic, prices),
+                                                  num_ops)
+
+    battery = Battery("battery_1", price_logic="hourly_preference", capacity=5000.0, max_charge_rate=2000.0,
+                      max_discharge_rate=2000.0)
+    gc = GridController(device_id="gc_1", supervisor=Supervisor(), battery=battery, price_logic="weighted_average")
+    results["build_log_notation"] = time_per_op(
+        lambda: [gc.build_log_notation(message="price", tag="price", value=0.1) for _ in range(num_ops)], num_ops)
+    results["build_log_notation_formatted"] = time_per_op(
+        lambda: [str(gc.build_log_notation(message="price", tag="price", value=0.1)) for _ in range(num_ops)], num_ops)
+    return {name: {"ns_per_op": ns, "ops": num_ops} for name, ns in results.items()}
+
+
+#  ___________________________________________________ SUITE AND COMPARE ______________________________________________
+
+##
+# Runs the whole suite.
+# @param quick whether to run fewer and smaller measurements, e.g. for a quick check during development
+# @return a dictionary of the results, as written to JSON
+
+def run_suite(quick=False):
+    repeats = 1 if quick else SCENARIO_REPEATS
+    return {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(), "quick": quick,
+                 "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "scenarios": run_scenarios(repeats=repeats),
+        "scaling": run_scaling(QUICK_SCALING_SIZES if quick else SCALING_SIZES, repeats=repeats),
+        "micro": run_micro(2000 if quick else 20000),
+        "parallel": run_parallel(QUICK_PARALLEL_SIZES if quick else PARALLEL_SIZES, repeats=repeats)
+    }
+
+
+##
+# Compares two suite results.
+# @param baseline the results of the baseline run
+# @param current the results of the run to compare against the baseline
+# @param threshold the relative change beyond which a measurement getting worse is flagged as a regression
+# @return a list of (measurement name, baseline value, current value, relative change, whether it is a regression),
+# the relative change being positive when the measurement got worse
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    rows = []
+    for section in ("scenarios", "scaling"):
+        baseline_runs = {run["scenario"]: run for run in baseline.get(section, [])}
+        for run in current.get(section, []):
+            baseline_run = baseline_runs.get(run["scenario"])
+            if baseline_run is None:
+                continue
+            for metric in ("events_per_s", "run_s", "setup_s", "peak_rss_kb"):
+                if metric in run and metric in baseline_run:
+                    rows.append(_compare("{}.{}".format(run["scenario"], metric), metric, baseline_run[metric],
+                                         run[metric], threshold))
+    for name, measurement in current.get("micro", {}).items():
+        # the time per operation of a queue depends on its size, so only like-for-like measurements are compared
+        if name in baseline.get("micro", {}) and baseline["micro"][name].get("ops") == measurement.get("ops"):
+            rows.append(_compare(name, "ns_per_op", baseline["micro"][name]["ns_per_op"], measurement["ns_per_op"],
+                                 threshold))
+    baseline_runs = {run["scenario"]: run for run in baseline.get("parallel", [])}
+    for run in current.get("parallel", []):
+        baseline_run = baseline_runs.get(run["scenario"])
+        if baseline_run is not None and baseline_run["partitions"] == run["partitions"]:
+            rows.append(_compare("{}.parallel_speedup".format(run["scenario"]), "speedup", baseline_run["speedup"],
+                                 run["speedup"], threshold))
+    return rows
+
+
+def _compare(name, metric, baseline_value, current_value, threshold):
+    if not baseline_value:
+        return name, baseline_value, current_value, 0.0, False
+    change = (current_value - baseline_value) / baseline_value
+    if HIGHER_IS_BETTER[metric]:
+        change = -change
+    regression = change > threshold
+    if metric.endswith("_s") and abs(current_value - baseline_value) < MIN_FLAGGED_SECONDS:
+        regression = False
+    return name, baseline_value, current_value, change, regression
+
+
+def _print_comparison(rows):
+    print("{:<52}{:>16}{:>16}{:>10}".format("measurement", "baseline", "current", "worse by"))
+    for name, baseline_value, current_value, change, regression in rows:
+        print("{:<52}{:>16.4g}{:>16.4g}{:>9.1f}%{}".format(name, baseline_value, current_value, change * 100,
+                                                          "  SLOWER" if regression else ""))
+
+
+def _print_results(results):
+    _print_runs(results["scenarios"] + results["scaling"])
+    for name, measurement in results["micro"].items():
+        print("{:<48}{:>12.1f} ns/op".format(name, measurement["ns_per_op"]))
+    _print_parallel(results.get("parallel", []))
+
+
+def _print_parallel(runs):
+    print("{:<24}{:>11}{:>10}{:>14}{:>14}{:>12}{:>10}{:>10}".format(
+        "parallel scenario", "partitions", "windows", "sequential s", "canonical s", "parallel s", "speedup",
+        "matches"))
+    for run in runs:
+        print("{:<24}{:>11}{:>10}{:>14.3f}{:>14.3f}{:>12.3f}{:>9.2f}x{:>10}".format(
+            run["scenario"], run["partitions"], run["windows"], run["sequential_s"], run["canonical_s"],
+            run["parallel_s"], run["speedup"], "yes" if run["matches_canonical"] else "NO"))
+
+
+def _print_runs(runs):
+    print("{:<24}{:>8}{:>10}{:>10}{:>10}{:>14}{:>12}{:>10}".format(
+        "scenario", "devices", "events", "setup s", "run s", "events/s", "peak RSS kB", "pending"))
+    for run in runs:
+        if "error" in run:
+            print("{:<24}  {}".format(run["scenario"], run["error"]))
+            continue
+        print("{:<24}{:>8}{:>10}{:>10.3f}{:>10.3f}{:>14.0f}{:>12}{:>10}".format(
+            run["scenario"], run["devices"], run["events"], run["setup_s"], run["run_s"], run["events_per_s"],
+            run["peak_rss_kb"], run["peak_pending_events"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark suite of the simulation engine")
+    modes = parser.add_subparsers(dest="mode")
+    run_parser = modes.add_parser("run", help="run the suite")
+    run_parser.add_argument("--output", default="benchmark_results.json", help="the JSON file to write results to")
+    run_parser.add_argument("--quick", action="store_true", help="run fewer and smaller measurements")
+    scale_parser = modes.add_parser("scale", help="chart setup and throughput against topology size")
+    scale_parser.add_argument("--gcs", type=int, nargs="+", default=[10, 100, 1000],
+                              help="the numbers of grid controllers to run")
+    scale_parser.add_argument("--euds-per-gc", type=int, default=100)
+    scale_parser.add_argument("--layout", choices=LAYOUTS, default="tree")
+    scale_parser.add_argument("--hours", type=float, default=1.0, help="the simulated hours of each run")
+    scale_parser.add_argument("--output", default="scaling_results.json", help="the JSON file to write results to")
+    parallel_parser = modes.add_parser("parallel", help="time partitioned parallel runs against sequential runs")
+    parallel_parser.add_argument("--gcs", type=int, nargs="+", default=[8, 16],
+                                 help="the numbers of grid controllers to run")
+    parallel_parser.add_argument("--euds-per-gc", type=int, default=16)
+    parallel_parser.add_argument("--partitions", type=int, default=None,
+                                 help="the number of partitions (default: the number of processors, at least 2)")
+    parallel_parser.add_argument("--hours", type=float, default=24.0, help="the simulated hours of each run")
+    parallel_parser.add_argument("--output", default="parallel_results.json", help="the JSON file to write results to")
+    compare_parser = modes.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="relative slowdown to flag (default {})".format(DEFAULT_THRESHOLD))
+    args = parser.parse_args()
+
+    if args.mode == "run":
+        suite_results = run_suite(quick=args.quick)
+        with open(args.output, 'w') as results_file:
+            json.dump(suite_results, results_file, indent=2)
+        _print_results(suite_results)
+    elif args.mode == "scale":
+        scaling_results = run_scaling([(num_gcs, args.euds_per_gc) for num_gcs in args.gcs], repeats=1,
+                                      layout=args.layout, run_seconds=int(args.hours * 3600))
+        with open(args.output, 'w') as results_file:
+            json.dump(scaling_results, results_file, indent=2)
+        _print_runs(scaling_results)
+    elif args.mode == "parallel":
+        parallel_results = run_parallel([(num_gcs, args.euds_per_gc) for num_gcs in args.gcs], args.partitions,
+                                        repeats=1, run_seconds=int(args.hours * 3600))
+        with open(args.output, 'w') as results_file:
+            json.dump(parallel_results, results_file, indent=2)
+        _print_parallel(parallel_results)
+    elif args.mode == "compare":
+        with open(args.baseline) as baseline_file, open(args.current) as current_file:
+            comparison = compare_results(json.load(baseline_file), json.load(current_file), args.threshold)
+        _print_comparison(comparison)
+        sys.exit(1 if any(row[4] for row in comparison) else 0)
+    else:
+        parser.print_help()
@@ -0,0 +1,66 @@
+########################################################################################################################
+# *** Copyright Notice ***
+#
+# "Price Based Local Power Distribution Management System (Local Power Distribution Manager) v2.0"
+# Copyright (c) 2017, The Regents of the University of California, through Lawrence Berkeley National Laboratory
+# (subject to receipt of any required approvals from the U.S. Dept. of Energy).  All rights reserved.
+#
+# If you have questions about your rights to use or distribute this software, please contact
+# Berkeley Lab's Innovation & Partnerships Office at  IPO@lbl.gov.
+########################################################################################################################
+
+"""
+Times a scenario run with per-device event queues against a run with the single event calendar.
+Run from the LPDM_Simulation folder: python -m Benchmark.event_calendar_benchmark [config_file] [repeats] [days]
+Log output is disabled while timing, so that the engine rather than the file I/O is measured.
+"""
+
+import contextlib
+import io
+import logging
+import sys
+import time
+
+import Build.Simulation_Operation.simulation as sim
+
+DEFAULT_CONFIG = "JSON_WeekTest.json"
+DEFAULT_REPEATS = 3
+
+
+##
+# Runs the scenario a number of times and returns the best wall-clock time of a run
+# @param config_file the configuration json to run
+# @param override_args list of override arguments to run with
+# @param event_calendar whether to run on the single event calendar
+# @param repeats the number of runs to time
+
+def time_simulation(config_file, override_args, event_calendar, repeats):
+    logger = logging.getLogger("lpdm")
+    best = None
+    for _ in range(repeats):
+        with contextlib.redirect_stdout(io.StringIO()):  # silence the device connection printouts
+            start = time.perf_counter()
+            sim.run_simulation(config_file, override_args, event_calendar=event_calendar)
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        # Each run adds its own handlers to the logger. Close them so the runs do not accumulate open files.
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+    return best
+
+
+if __name__ == "__main__":
+    config_file = sys.argv[1] if len(sys.argv) >= 2 else DEFAULT_CONFIG
+    repeats = int(sys.argv[2]) if len(sys.argv) >= 3 else DEFAULT_REPEATS
+    override_args = ["run_time_days={}".format(sys.argv[3])] if len(sys.argv) >= 4 else []
+
+    logging.disable(logging.CRITICAL)
+    queue_time = time_simulation(config_file, override_args, event_calendar=False, repeats=repeats)
+    calendar_time = time_simulation(config_file, override_args, event_calendar=True, repeats=repeats)
+    logging.disable(logging.NOTSET)
+
+    print("{} ({} runs, best of each)".format(config_file, repeats))
+    print("per-device queues: {:.3f} s".format(queue_time))
+    print("event calendar:    {:.3f} s".format(calendar_time))
+    print("speedup:           {:.2f}x".format(queue_time / calendar_time))
@@ -0,0 +1,94 @@
+########################################################################################################################
+# *** Copyright Notice ***
+#
+# "Price Based Local Power Distribution Management System (Local Power Distribution Manager) v2.0"
+# Copyright (c) 2017, The Regents of the University of California, through Lawrence Berkeley National Laboratory
+# (subject to receipt of any required approvals from the U.S. Dept. of Energy).  All rights reserved.
+#
+# If you have questions about your rights to use or distribute this software, please contact
+# Berkeley Lab's Innovation & Partnerships Office at  IPO@lbl.gov.
+########################################################################################################################
+
+"""
+Times converter and wire loss evaluation: the previous per-call computation (a linear scan of the efficiency curve
+points, and the wire loss computed through the Wire object), the compiled scalar lookups used by the devices (the
+wire's voltage and resistance kept per link, see Device.calculate_wire_loss), and the batch calls evaluating many loads
+or links at once.
+Run from the LPDM_Simulation folder: python -m Benchmark.loss_engine_benchmark [num_loads]
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+from Build.Objects.converter.efficiency_curve import EfficiencyCurve
+from Build.Objects.wire import Wire, calculate_wire_losses
+
+DEFAULT_NUM_LOADS = 100000
+CAPACITY = 1000.0
+CURVE = [{"capacity": capacity / 20.0, "efficiency": 0.6 + 0.3 * (1 - abs(capacity - 14) / 14.0)}
+         for capacity in range(1, 21)]
+
+
+def _scan_converter_loss(curve, load):
+    percent_capacity = abs(load) / CAPACITY
+    (ef_1, ef_2) = curve.get_efficiency_inputs(percent_capacity)
+    if not ef_1:
+        eff = ef_2["efficiency"]
+    elif not ef_2:
+        eff = ef_1["efficiency"]
+    else:
+        dydx = ((ef_2["efficiency"] - ef_1["efficiency"]) / (ef_2["capacity"] - ef_1["capacity"]))
+        eff = ef_1["efficiency"] + (percent_capacity - ef_1["capacity"]) * dydx
+    if eff <= 0:
+        return load
+    elif eff >= 1:
+        return 0
+    return abs(load / eff) - abs(load)
+
+
+def _link_wire_loss(parameters, power):
+    voltage, resistance = parameters
+    wire_current = power / voltage
+    return wire_current * wire_current * resistance
+
+
+##
+# Returns the best time of a number of calls to a function
+def best_time(function, repeats=3):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == "__main__":
+    num_loads = int(sys.argv[1]) if len(sys.argv) >= 2 else DEFAULT_NUM_LOADS
+    random.seed(0)
+    loads = [random.uniform(-1.2 * CAPACITY, 1.2 * CAPACITY) for _ in range(num_loads)]
+    load_array = np.array(loads)
+    curve = EfficiencyCurve(CURVE, CAPACITY)
+    wires = [Wire(random.choice([24, 48, 380]), random.uniform(0.01, 0.5), 0, '14', 'DC') for _ in range(num_loads)]
+    links = [(wire.voltage, wire.resistance) for wire in wires]
+    voltages = np.array([wire.voltage for wire in wires], dtype=np.float64)
+    resistances = np.array([wire.resistance for wire in wires])
+
+    timings = [
+        ("converter loss, scan", best_time(lambda: [_scan_converter_loss(curve, load) for load in loads])),
+        ("converter loss, compiled", best_time(lambda: [curve.get_converter_loss(load) for load in loads])),
+        ("converter loss, batch", best_time(lambda: curve.get_converter_losses(load_array))),
+        ("wire loss, wire object", best_time(lambda: [wire.calculate_power(abs(load))
+                                                      for wire, load in zip(wires, loads)])),
+        ("wire loss, per link", best_time(lambda: [_link_wire_loss(link, abs(load))
+                                                   for link, load in zip(links, loads)])),
+        ("wire loss, batch", best_time(lambda: calculate_wire_losses(voltages, resistances, np.abs(load_array)))),
+    ]
+
+    print("{} loads, {} curve points (best of 3)".format(num_loads, len(CURVE)))
+    for name, elapsed in timings:
+        print("{:<28}{:>10.1f} ns/load".format(name, elapsed / num_loads * 1e9))
@@ -15,7 +15,7 @@ A simple model of a 'smart' air conditioner.
 
 
 from Build.Simulation_Operation.support import SECONDS_IN_DAY
-from Build.Simulation_Operation.event import Event
+from Build.Simulation_Operation.recurring_event import profile_occurrences
 from Build.Objects.eud import Eud
 
 
@@ -65,14 +65,13 @@ class AirConditionerSimple(Eud):
 
     ##
     # Schedules all of the temperature change events each day for the entire duration of the simulation.
-    # @param temperature_schedule a list of tuples of (time, temperature) for outdoor temperatures.
+    # @param temperature_schedule a tuple of arrays of the times and outdoor temperatures, as returned by
+    # timeseries.load_timeseries
     def schedule_outdoor_temperature_events(self, temperature_schedule, total_runtime):
-        curr_day = 0  # The current day in seconds
-        while curr_day < total_runtime:
-            for time, temp in temperature_schedule:
-                temperature_event = Event(self.update_outdoor_temperature, temp)
-                self.add_event(temperature_event, time + curr_day)
-            curr_day += SECONDS_IN_DAY
+        times, temperatures = temperature_schedule
+        action = self.update_outdoor_temperature  # one bound method for every entry, pickled once in a checkpoint
+        profile = [(time, action, (temp,)) for time, temp in zip(times.tolist(), temperatures.tolist())]
+        self.add_recurring_event(profile_occurrences(profile, 0, total_runtime))
 
     ##
     # Given the current price of the device, determine what the current temperature setpoint should be.
@@ -82,8 +81,8 @@ class AirConditionerSimple(Eud):
         new_set_point = self.get_setpoint_from_price(self._price)
         if new_set_point != self._set_point:
             self._set_point = new_set_point
-            self._logger.info(self.build_log_notation(
-                message="setpoint changed to {}".format(new_set_point), tag="set_point", value=new_set_point))
+            self.log_notation(
+                "setpoint changed to {}", new_set_point, tag="set_point", value=new_set_point)
 
     ##
     # Returns the setpoint value from the given price by finding the next largest price-setpoint value in the
@@ -107,8 +106,8 @@ class AirConditionerSimple(Eud):
                 # if the compressor is on adjust the internal temperature due to cooling
                 delta_c = delta_t * self._compressor_cooling_rate
                 self._current_temperature -= delta_c
-                self._logger.debug(self.build_log_notation(
-                    message="compressor adjustment", tag="comp_delta_c", value=delta_c))
+                self.log_debug_notation(
+                    message="compressor adjustment", tag="comp_delta_c", value=delta_c)
 
             # calculate the indoor delta_t due to the outdoor temperature
             if self._current_outdoor_temperature is not None:
@@ -117,8 +116,8 @@ class AirConditionerSimple(Eud):
                 delta_indoor_outdoor = self._current_outdoor_temperature - self._current_temperature
                 delta_c = delta_t * delta_indoor_outdoor * self._heat_exchange_rate
                 self._current_temperature += delta_c
-                self._logger.debug(self.build_log_notation(
-                        message="Internal temperature", tag="internal_temperature", value=self._current_temperature))
+                self.log_debug_notation(
+                    message="Internal temperature", tag="internal_temperature", value=self._current_temperature)
 
             self._last_temperature_update_time = self._time
 
@@ -132,22 +131,22 @@ class AirConditionerSimple(Eud):
             return
 
         delta = self._current_temperature - self._set_point
-        self._logger.debug(self.build_log_notation(
-                          message="delta from setpoint: {}".format(delta), tag="delta_t", value=delta))
+        self.log_debug_notation(
+            "delta from setpoint: {}", delta, tag="delta_t", value=delta)
 
         if abs(delta) > self._temperature_max_delta:
             if delta > 0 and not self._compressor_is_on:
                 # if the current temperature is above the set point and compressor is off, turn it on
-                self._logger.debug(self.build_log_notation(
-                    message="temp: {}, setpoint: {}, above delta threshold".format(
-                        self._current_temperature, self._set_point), tag="above_delta_threshold", value=delta))
+                self.log_debug_notation(
+                    "temp: {}, setpoint: {}, above delta threshold", self._current_temperature, self._set_point,
+                    tag="above_delta_threshold", value=delta)
                 self._compressor_should_be_on = True
 
             elif delta < 0 and self._compressor_is_on:
                 # if current temperature is below the set point and compressor is on, turn it off
-                self._logger.debug(self.build_log_notation(
-                    message="temp: {}, setpoint: {}, below delta threshold".format(
-                        self._current_temperature, self._set_point), tag="below_delta_threshold", value=delta))
+                self.log_debug_notation(
+                    "temp: {}, setpoint: {}, below delta threshold", self._current_temperature, self._set_point,
+                    tag="below_delta_threshold", value=delta)
                 self._compressor_should_be_on = False
                 self.turn_off_compressor()
 
@@ -155,21 +154,21 @@ class AirConditionerSimple(Eud):
     # Turns on the compressor.
     def turn_on_compressor(self):
         if self._in_operation:
-            self._logger.info(self.build_log_notation(message="compressor_on", tag="compressor_on_off", value=1))
+            self.log_notation(message="compressor_on", tag="compressor_on_off", value=1)
             self._compressor_is_on = True
 
     ##
     # Turns off the compressor.
     def turn_off_compressor(self):
         self._compressor_is_on = False
-        self._logger.info(self.build_log_notation(message="turn off compressor", tag="compressor_on_off", value=0))
+        self.log_notation(message="turn off compressor", tag="compressor_on_off", value=0)
 
     ##
     # Refresh the current outdoor temperature value.
     # @param new_temperature the new outdoor temperature value
     def update_outdoor_temperature(self, new_temperature):
-        self._logger.debug(self.build_log_notation(message="new outdoor temperature: {}".format(new_temperature),
-                                                   tag="new_temp", value=new_temperature))
+        self.log_debug_notation("new outdoor temperature: {}", new_temperature,
+                                tag="new_temp", value=new_temperature)
         self._current_outdoor_temperature = new_temperature
 
     ##
@@ -207,8 +206,8 @@ class AirConditionerSimple(Eud):
         # We didn't get enough power to operate the compressor
         if received_power < self._compressor_operating_power:
             if self._compressor_is_on:
-                self._logger.info(self.build_log_notation(
-                    message="insufficient power to run compressor", tag="insufficient power", value=received_power))
+                self.log_notation(
+                    message="insufficient power to run compressor", tag="insufficient power", value=received_power)
                 self.turn_off_compressor()
         else:
             # If we got enough power and we should be running, turn compressor on
@@ -19,7 +19,7 @@ Batteries encapsulate this behavior of a Grid Controller:
 import logging
 from abc import ABCMeta, abstractmethod
 from enum import Enum
-from Build.Simulation_Operation.support import format_time_from_seconds
+from Build.Simulation_Operation.support import format_time_from_seconds, LogNotation
 
 
 class Battery(object):
@@ -53,7 +53,7 @@ class Battery(object):
         self._current_soc = starting_soc
         self._load = 0  # the load on the battery, either charge (positive) or discharge (negative), in W.
         self._price = 0  # informed of price by the grid controller on their communications.
-        self._price_history = []  # a history of the battery's prices every set interval
+        self._price_history = None  # the grid controller's interval price history (an IntervalPriceHistory)
         self._average_price = 0  # battery's hourly moving average of price, weighted by time of that price
         self._time = 0  # battery's local time, updated by grid controller.
         self._last_update_time = 0  # time of last battery update from grid controller
@@ -61,6 +61,7 @@ class Battery(object):
         self.sum_charge_wh = 0.0
         self.sum_discharge_wh = 0.0
         self._logger = logging.getLogger("lpdm")  # Setup logging
+        self._log_info_enabled = self._logger.isEnabledFor(logging.INFO)  # checked once, see Device.log_notation
         self._last_log_update_time = 0  # the last time the battery logged its state
 
         if price_logic == 'hourly_preference':
@@ -72,6 +73,11 @@ class Battery(object):
 
     # _________________________________ Maintenance Functions _______________________________ #
 
+    ##
+    # Returns the id of the battery
+    def get_id(self):
+        return self._battery_id
+
     ##
     # Returns the current load on the battery
     def get_load(self):
@@ -128,19 +134,17 @@ class Battery(object):
         # self._logger.info(self.build_standard_log_notation(
         #     "battery load changed from {} to {}".format(old_load, self._load)))
 
-        self._logger.info(
-            self.build_standard_log_notation(
-                "battery load changed from {} to {}".format(old_load, self._load),
-                "load",
-                self._load
-        ))
-
-        self._logger.info(
-            self.build_standard_log_notation(
-                "current soc",
-                "soc",
-                self._current_soc
-        ))
+        self.log_notation(
+            "battery load changed from {} to {}", old_load, self._load,
+            tag="load",
+            value=self._load
+        )
+
+        self.log_notation(
+            "current soc",
+            tag="soc",
+            value=self._current_soc
+        )
         return self._load - old_load
 
     ##
@@ -148,15 +152,15 @@ class Battery(object):
     def clear_load(self):
         old_load = self._load
         self._load = 0
-        self._logger.info(self.build_standard_log_notation(
-            "battery load cleared from {} to zero".format(old_load)))
+        self.log_notation(
+            "battery load cleared from {} to zero", old_load)
 
     ##
     # Updates the state of charge and power levels of the battery reflecting current time.
     # @param the time to update the battery's local time to
     # @param price the local price of the associated grid controller
     # @param average price information on the average price of the grid controller
-    # @param hourly prices information on the hourly prices of the grid controller
+    # @param price_history the interval price history of the grid controller, with the statistics of its last day
 
     #
     def update_state(self, time, price, average_price, price_history):
@@ -196,11 +200,11 @@ class Battery(object):
 
         """Log changes in battery charge preference"""
         if old_preference != self._charging_preference:
-            self._logger.info(self.build_standard_log_notation(
-                "changed from {}".format(old_preference)))
+            self.log_notation(
+                "changed from {}", old_preference)
         elif self._time - self._last_log_update_time > BATTERY_LOG_FREQUENCY:
-            self._logger.info(self.build_standard_log_notation(
-                "unchanged charge preference"))
+            self.log_notation(
+                "unchanged charge preference")
             self._last_log_update_time = self._time
 
     # _____________________ BATTERY SPECIFIC LOGGING ________________________________ #
@@ -216,9 +220,24 @@ class Battery(object):
             format_time_from_seconds(self._time), self._time, self._battery_id, self._current_soc,
             self._charging_preference, value, message)
 
-    def build_standard_log_notation(self, message="", tag="", value=None):
-        return "{}; {}; {}; {}; {}; {}".format(
-            format_time_from_seconds(self._time), self._time, self._battery_id, tag, value, message)
+    def build_standard_log_notation(self, message="", *args, tag="", value=None):
+        return LogNotation(self._time, self._battery_id, tag, value, message, args)
+
+    ##
+    # Checks again whether info records would be handled (see Device.update_log_levels).
+    def update_log_levels(self):
+        self._log_info_enabled = self._logger.isEnabledFor(logging.INFO)
+
+    ##
+    # Logs a message, tag, and value at the info level, if info logging is enabled (see Device.log_notation).
+    # @param message the message to add to logger, or a str.format string for args
+    # @param args the arguments to format the message with once the record is emitted
+    # @param tag the tag to associate with this message to add to the logger
+    # @param value the value for this message to add to the logger
+
+    def log_notation(self, message="", *args, tag="", value=None):
+        if self._log_info_enabled:
+            self._logger.info(LogNotation(self._time, self._battery_id, tag, value, message, args))
 
 
 """
@@ -249,12 +268,10 @@ class BatteryPriceLogicA(BatteryPriceLogic):
         self._price_threshold_discharge = starting_price * 0.9
 
     ##
-    # Calculates the average price across the
+    # Calculates the average price across the intervals of the last day
+    # @param price_history the grid controller's IntervalPriceHistory
     def calc_average_price(self, price_history):
-        sum_price = 0
-        for price in price_history:
-            sum_price += price
-        return sum_price / len(price_history)
+        return price_history.get_mean()
 
     ##
     # Method to calculate the price thresholds which help determine the battery's charging preference.
@@ -263,8 +280,8 @@ class BatteryPriceLogicA(BatteryPriceLogic):
     #
     def adjust_price_thresholds(self, current_soc, price_history):
         avg_price = self.calc_average_price(price_history)
-        min_price = min(price_history)
-        max_price = max(price_history)
+        min_price = price_history.get_min()
+        max_price = price_history.get_max()
 
         price_threshold_discharge = avg_price * 1.10
         price_threshold_charge = avg_price * 0.90
@@ -1,25 +1,25 @@
 from abc import ABCMeta, abstractmethod
 
 from Build.Objects.grid_equipment import GridEquipment
-from Build.Objects.utility_meter import UtilityMeter
 from Build.Simulation_Operation.message import Message, MessageType, MessageRedirect
 from Build.Simulation_Operation.event import Event
 from Build.Simulation_Operation.support import nonzero_power
-from Build.Objects.device import Device
+from Build.Objects.device import Device, ROLE_CONVERTER, ROLE_GRID_EQUIPMENT, ROLE_UTILITY_METER
 from Build.Objects.converter.efficiency_curve import EfficiencyCurve
 
 from Build.Simulation_Operation.support import SECONDS_IN_DAY
 
 class Converter(GridEquipment):
+
+    neighbor_roles = (ROLE_GRID_EQUIPMENT, ROLE_CONVERTER)
+
     def __init__(self, device_id, supervisor, time=0, msg_latency=0, device_input=None, device_output=None,
                  efficiency_curve=None, capacity=None):
         super().__init__(device_id, "Converter", supervisor, msg_latency=msg_latency)
-        self._logger.info(
-            self.build_log_notation(
-                message="build the converter device {}".format(device_id),
-                tag=None,
-                value=None
-            )
+        self.log_notation(
+            "build the converter device {}", device_id,
+            tag=None,
+            value=None
         )
         if type(device_input) is str:
             self._device_input_id = device_input
@@ -52,15 +52,13 @@ class Converter(GridEquipment):
         self._efficiency_curve = EfficiencyCurve(self._efficiency_curve_input, self._capacity)
     
     def register_device(self, device, device_id, value, wire=None):
-        self._logger.info(
-            self.build_log_notation(
-                message="register device {}, {}, {}, {}".format(device, device_id, value, wire),
-                tag=None,
-                value=None
-            )
+        self.log_notation(
+            "register device {}, {}, {}, {}", device, device_id, value, wire,
+            tag=None,
+            value=None
         )
         super().register_device(device, device_id, value, wire)
-        if isinstance(device, UtilityMeter):
+        if ROLE_UTILITY_METER in device.neighbor_roles:
             if self._has_utm:
                 raise Exception("A Utility has already been connected to Converter {}".format(self._device_id))
             else:
@@ -94,42 +92,34 @@ class Converter(GridEquipment):
         if load > 0:
             # power is flowing from the input device to the output device
             self.set_power_in(load)
-            self._logger.info(
-                self.build_log_notation(
-                    message="power flow",
-                    tag="power_in",
-                    value=load
-                )
+            self.log_notation(
+                message="power flow",
+                tag="power_in",
+                value=load
             )
         elif load < 0:
             # power is flowing from the output device to the input device
             self.set_power_out(abs(load))
-            self._logger.info(
-                self.build_log_notation(
-                    message="power flow",
-                    tag="power_out",
-                    value=abs(load)
-                )
+            self.log_notation(
+                message="power flow",
+                tag="power_out",
+                value=abs(load)
             )
         else:
             # load is 0, no power flowing through the converter
             if self._power_in:
-                self._logger.info(
-                    self.build_log_notation(
-                        message="power flow",
-                        tag="power_in",
-                        value=load
-                    )
+                self.log_notation(
+                    message="power flow",
+                    tag="power_in",
+                    value=load
                 )
                 self.set_power_in(load)
             elif self._power_out:
                 self.set_power_out(load)
-                self._logger.info(
-                    self.build_log_notation(
-                        message="power flow",
-                        tag="power_out",
-                        value=abs(load)
-                    )
+                self.log_notation(
+                    message="power flow",
+                    tag="power_out",
+                    value=abs(load)
                 )
         return
     
@@ -150,12 +140,11 @@ class Converter(GridEquipment):
 
     def process_power_message(self, message):
         "Process a power message"
-        self._logger.info(
-            self.build_log_notation(
-                message="POWER message from {}".format(message.sender_id),
-                tag="power_msg_in",
-                value=message.value
-        ))
+        self.log_notation(
+            "POWER message from {}", message.sender_id,
+            tag="power_msg_in",
+            value=message.value
+        )
         receiver_id = self.get_receiving_device(message.sender_id)
         self.set_power_flow(message.sender_id, receiver_id, message.value)
         self.send_power_message(receiver_id, message.value)
@@ -164,12 +153,10 @@ class Converter(GridEquipment):
 
     def process_price_message(self, message):
         # pass on price messages from output -> inputs
-        self._logger.info(
-            self.build_log_notation(
-                message="Receive PRICE message from {}".format(message.sender_id),
-                tag="price_msg",
-                value=message.value
-            )
+        self.log_notation(
+            "Receive PRICE message from {}", message.sender_id,
+            tag="price_msg",
+            value=message.value
         )
         receiver_id = self.get_receiving_device(message.sender_id)
         self.send_price_message(receiver_id, message.value)
@@ -177,12 +164,10 @@ class Converter(GridEquipment):
 
     def process_request_message(self, message):
         # send request message from an input to the output device
-        self._logger.info(
-            self.build_log_notation(
-                message="Receive REQUEST message from {}".format(message.sender_id),
-                tag="request_msg",
-                value=message.value
-            )
+        self.log_notation(
+            "Receive REQUEST message from {}", message.sender_id,
+            tag="request_msg",
+            value=message.value
         )
         receiver_id = self.get_receiving_device(message.sender_id)
         # request extra to account for the converter loss
@@ -194,29 +179,25 @@ class Converter(GridEquipment):
         # self.send_request_message(receiver["device_id"], message.value + converter_loss + wire_loss)
 
     def process_allocate_message(self, message):
-        self._logger.info(
-            self.build_log_notation(
-                message="Receive ALLOCATE message from {}".format(message.sender_id),
-                tag="allocate_msg",
-                value=message.value
-            )
+        self.log_notation(
+            "Receive ALLOCATE message from {}", message.sender_id,
+            tag="allocate_msg",
+            value=message.value
         )
         receiver_id = self.get_receiving_device(message.sender_id)
         self.send_allocate_message(receiver_id, message.value)
         # self.send_allocate_message(receiver["device_id"], message.value)
 
     def send_allocate_message(self, target_id, allocate_amt):
-        self._logger.info(
-            self.build_log_notation(
-                message="ALLOCATE to {}".format(target_id),
-                tag="allocate_msg",
-                value=allocate_amt
-            )
+        self.log_notation(
+            "ALLOCATE to {}", target_id,
+            tag="allocate_msg",
+            value=allocate_amt
         )
         target_device = self._connected_devices[target_id]
         if target_device:
             # self._allocated[target_id] = -allocate_amt
-            target_device.receive_message(Message(self._time, self._device_id, MessageType.ALLOCATE, allocate_amt))
+            target_device.receive_message(Message.acquire(self._time, self._device_id, MessageType.ALLOCATE, allocate_amt))
         else:
             raise Exception('Invalid device_id found ({})'.format(target_id))
     
@@ -228,13 +209,12 @@ class Converter(GridEquipment):
     def send_request_message(self, target_id, request_amt):
         # if request_amt < 0:
         #     raise ValueError("EUD cannot request to distribute power")
-        if target_id in self._connected_devices and isinstance(self._connected_devices[target_id], GridEquipment):  # cannot request from non-GC's
-            target_device = self._connected_devices[target_id]
-        else:
+        target_device = self._neighbors_by_role[ROLE_GRID_EQUIPMENT].get(target_id)  # cannot request from non-GC's
+        if target_device is None:
             raise ValueError("invalid target to request")
-        self._logger.info(self.build_log_notation(message="REQUEST to {}".format(target_id),
-                                                  tag="request_msg", value=request_amt))
-        target_device.receive_message(Message(self._time, self._device_id, MessageType.REQUEST, request_amt))
+        self.log_notation("REQUEST to {}", target_id,
+                          tag="request_msg", value=request_amt)
+        target_device.receive_message(Message.acquire(self._time, self._device_id, MessageType.REQUEST, request_amt))
 
     def send_power_message(self, target_id, power_amt):
         target_device = self._connected_devices[target_id]
@@ -252,9 +232,9 @@ class Converter(GridEquipment):
         power_amt += wire_loss
         self.update_wire_loss_in(target_id, abs(wire_loss))
 
-        target_device.receive_message(Message(self._time, self._device_id, MessageType.POWER, power_amt))
-        self._logger.info(self.build_log_notation(message="POWER to {}".format(target_id),
-                                                  tag="power_msg", value=power_amt))
+        target_device.receive_message(Message.acquire(self._time, self._device_id, MessageType.POWER, power_amt))
+        self.log_notation("POWER to {}", target_id,
+                          tag="power_msg", value=power_amt)
 
     def update_converter_loss(self, converter_loss_power):
         "Update the converter loss rate for power flowing into the device"
@@ -269,13 +249,12 @@ class Converter(GridEquipment):
             # Wh = W*s*(h/3600s)
             converter_loss_energy = converter_loss_power * (time_diff / 3600.0)
             self._converter_loss_energy += converter_loss_energy
-            self._logger.info(
-                self.build_log_notation(
-                    message="Calculate converter loss, dt = {} h, rate = {} W, energy = {} Wh".format( \
-                        time_diff / 3600.0, converter_loss_power, converter_loss_energy),
-                    tag="converter_loss",
-                    value=converter_loss_energy
-            ))
+            self.log_notation(
+                "Calculate converter loss, dt = {} h, rate = {} W, energy = {} Wh",
+                time_diff / 3600.0, converter_loss_power, converter_loss_energy,
+                tag="converter_loss",
+                value=converter_loss_energy
+            )
         self._time_last_loss_calc = self._time
 
     def last_wire_loss_calc(self):
@@ -296,8 +275,8 @@ class Converter(GridEquipment):
             target = self._connected_devices[target_id]
         else:
             raise ValueError("This GC is connected to no such device")
-        self._logger.info(self.build_log_notation(message="PRICE to {}".format(target_id),
-                                                  tag="price_msg", value=price))
-        target.receive_message(Message(self._time, self._device_id, MessageType.PRICE, price))
+        self.log_notation("PRICE to {}", target_id,
+                          tag="price_msg", value=price)
+        target.receive_message(Message.acquire(self._time, self._device_id, MessageType.PRICE, price))
 
 
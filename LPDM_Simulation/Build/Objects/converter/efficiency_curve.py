@@ -1,8 +1,19 @@
+from bisect import bisect_left
+
+import numpy as np
+
 
 class EfficiencyCurve:
     def __init__(self, efficiency_curve_data, capacity):
         self._curve_data = efficiency_curve_data
         self._capacity = capacity
+        # The curve compiled into breakpoint arrays (in the order given, which must be by capacity), so that lookups
+        # bisect them rather than scan the list of dicts
+        curve_data = efficiency_curve_data or []
+        self._capacities = [float(item["capacity"]) for item in curve_data]
+        self._efficiencies = [float(item["efficiency"]) for item in curve_data]
+        self._capacity_array = np.array(self._capacities, dtype=np.float64)
+        self._efficiency_array = np.array(self._efficiencies, dtype=np.float64)
     
     def calculate_power_loss(self, load, max_load):
         "calculate the power loss percentage based on the percent of capacity used"
@@ -44,16 +55,22 @@ class EfficiencyCurve:
         return (ef_1, ef_2)
     
     def get_efficiency_value(self, load):
-        "Calculate the efficiency value based on the load relative to the capacity"
+        """Calculate the efficiency value based on the load relative to the capacity.
+        Below the first point and above the last point of the curve, the efficiency of that point is used, and between
+        points it is interpolated linearly."""
         percent_capacity = abs(load) / self._capacity
-        (ef_1, ef_2) = self.get_efficiency_inputs(percent_capacity)
-        if not ef_1:
-            return ef_2["efficiency"]
-        elif not ef_2:
-            return ef_1["efficiency"]
+        capacities = self._capacities
+        if not capacities:
+            raise ValueError("No efficiency curve to look up")
+        i = bisect_left(capacities, percent_capacity)  # the first point at or above percent_capacity
+        if i == 0 or (i < len(capacities) and capacities[i] == percent_capacity):
+            return self._efficiencies[i]
+        elif i == len(capacities):
+            return self._efficiencies[-1]
         else:
-            dydx = ((ef_2["efficiency"] - ef_1["efficiency"]) / (ef_2["capacity"] - ef_1["capacity"]))
-            return (ef_1["efficiency"] + (percent_capacity - ef_1["capacity"]) * dydx)
+            ef_1, ef_2 = self._efficiencies[i - 1], self._efficiencies[i]
+            dydx = ((ef_2 - ef_1) / (capacities[i] - capacities[i - 1]))
+            return (ef_1 + (percent_capacity - capacities[i - 1]) * dydx)
     
     def get_converter_loss(self, load):
         "Calculate the power loss through the converter"
@@ -68,6 +85,31 @@ class EfficiencyCurve:
             input_power = load / eff
             return abs(input_power) - abs(load)
 
+    def get_efficiency_values(self, loads):
+        "Calculate the efficiency values of an array of loads at once (see get_efficiency_value)"
+        if not self._capacities:
+            raise ValueError("No efficiency curve to look up")
+        percent_capacity = np.abs(np.asarray(loads, dtype=np.float64)) / self._capacity
+        capacities, efficiencies = self._capacity_array, self._efficiency_array
+        last = len(capacities) - 1
+        i = np.searchsorted(capacities, percent_capacity, side='left')
+        upper = np.minimum(i, last)
+        lower = np.maximum(i - 1, 0)
+        width = capacities[upper] - capacities[lower]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dydx = (efficiencies[upper] - efficiencies[lower]) / width
+            interpolated = efficiencies[lower] + (percent_capacity - capacities[lower]) * dydx
+        at_point = (i == 0) | ((i <= last) & (capacities[upper] == percent_capacity))
+        return np.where(at_point, efficiencies[upper], np.where(i > last, efficiencies[last], interpolated))
+
+    def get_converter_losses(self, loads):
+        "Calculate the power losses through the converter of an array of loads at once (see get_converter_loss)"
+        loads = np.asarray(loads, dtype=np.float64)
+        eff = self.get_efficiency_values(loads)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            losses = np.abs(loads / eff) - np.abs(loads)
+        return np.where(eff <= 0, loads, np.where(eff >= 1, 0.0, losses))
+
     # def get_converter_loss_source(self, source):
     #     "Calculate the power loss through the converter"
     #     # source is the input power of the converter
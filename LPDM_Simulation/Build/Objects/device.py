@@ -34,19 +34,42 @@ All PV Device ID's must begin with PV.
 
 """
 
+import itertools
 import logging
 from abc import ABCMeta, abstractmethod
 
 from Build.Simulation_Operation.message import Message, MessageType
 
-from Build.Simulation_Operation.support import format_time_from_seconds
-from Build.Simulation_Operation.event import Event
+from Build.Simulation_Operation.support import LogNotation
+from Build.Simulation_Operation.event import MessageEvent
 from Build.Simulation_Operation.queue import PriorityQueue
+from Build.Simulation_Operation.recurring_event import RecurringEvent, profile_occurrences, single_occurrences
 from Build.Simulation_Operation.support import SECONDS_IN_DAY
 
+# The roles by which a device's neighbors are indexed (see Device.get_neighbors). A neighbor may have several roles.
+ROLE_GRID_EQUIPMENT = "grid_equipment"
+ROLE_UTILITY_METER = "utility_meter"
+ROLE_EUD = "eud"
+ROLE_PV = "pv"
+ROLE_CONVERTER = "converter"
+ROLE_GRID_CONTROLLER = "grid_controller"
+NEIGHBOR_ROLES = (ROLE_GRID_EQUIPMENT, ROLE_UTILITY_METER, ROLE_EUD, ROLE_PV, ROLE_CONVERTER, ROLE_GRID_CONTROLLER)
+
 
 class Device(metaclass=ABCMeta):
 
+    # The bookkeeping common to every device is kept in slots rather than the instance dictionary.
+    # Fields added by the device subclasses still go into the dictionary.
+    __slots__ = ("_connected_devices", "_device_id", "_device_type", "_queue", "_recurring_event_ranks", "_supervisor",
+                 "_event_calendar", "_time", "_msg_latency", "_time_last_power_in_change",
+                 "_time_last_power_out_change", "_power_in", "_power_out", "_sum_power_out", "_sum_power_in",
+                 "_wire_loss_in", "_time_last_wire_loss_in", "_wire_loss_out", "_time_last_wire_loss_out",
+                 "_wire_loss_info_in", "_wire_loss_info_out", "_wires", "_is_wired", "_logger", "_log_info_enabled",
+                 "_log_debug_enabled", "_message_policy", "_profiler", "_neighbors_by_role",
+                 "_wire_parameters", "_message_order")
+
+    neighbor_roles = ()  # the roles under which this type of device is indexed by its neighbors
+
     ##
     # Initialize a device.
     #
@@ -62,15 +85,26 @@ class Device(metaclass=ABCMeta):
 
         # TODO: Make it so that connected devices maps from device id to Wire, Device tuple.
 
-        if connected_devices is None:
-            self._connected_devices = {}
-        else:
-            self._connected_devices = {device.get_id(): device for device in connected_devices}
+        self._connected_devices = {}
+        # role -> the connected devices with that role, as an ordered dictionary of device_id to device
+        self._neighbors_by_role = {role: {} for role in NEIGHBOR_ROLES}
+        if connected_devices is not None:
+            for device in connected_devices:
+                self.add_neighbor(device.get_id(), device)
 
         self._device_id = device_id
         self._device_type = device_type
         self._queue = PriorityQueue()
+        self._recurring_event_ranks = itertools.count()  # creation order of this device's recurring events
         self._supervisor = supervisor
+        # the supervisor's single event calendar, if it uses one. Events are then kept there instead of in _queue.
+        self._event_calendar = supervisor.get_event_calendar()
+        # the supervisor's delivery policy for PRICE and POWER messages, if it uses one (see message_policy.py)
+        self._message_policy = supervisor.get_message_policy()
+        # the supervisor's profiling counters, if it keeps them (see profiler.py)
+        self._profiler = supervisor.get_profiler()
+        # the supervisor's canonical order of messages read at the same time, if it uses one (see message_order.py)
+        self._message_order = supervisor.get_message_order()
         self._time = time
         self._msg_latency = msg_latency
         self._time_last_power_in_change = time  # records the last time power levels into device changed
@@ -89,6 +123,8 @@ class Device(metaclass=ABCMeta):
         self._wire_loss_info_out = {}
         # dictionary of wires connected to this device, where the keys are device id's
         self._wires = {}
+        # the (voltage, resistance) of each wire, by the device id at its other end
+        self._wire_parameters = {}
         # indicates if there's a wire connected to this device
         self._is_wired = False
 
@@ -96,13 +132,21 @@ class Device(metaclass=ABCMeta):
             self.setup_schedule(schedule, multiday=multiday, runtime=total_runtime)
 
         self._logger = logging.getLogger("lpdm")  # Setup logging
-        self._logger.info(
-            self.build_log_notation("initialize {} - {}".format(self._device_id, self._device_type))
-        )
+        # Whether info and debug records would be handled at all, checked once so that disabled logging costs nothing.
+        self._log_info_enabled = self._logger.isEnabledFor(logging.INFO)
+        self._log_debug_enabled = self._logger.isEnabledFor(logging.DEBUG)
+        self.log_notation("initialize {} - {}", self._device_id, self._device_type)
     
     def init(self):
         pass
 
+    ##
+    # Checks again whether info and debug records would be handled, e.g. for a device restored from a file once the
+    # logging of the simulation has been set up.
+    def update_log_levels(self):
+        self._log_info_enabled = self._logger.isEnabledFor(logging.INFO)
+        self._log_debug_enabled = self._logger.isEnabledFor(logging.DEBUG)
+
     # ____________________________ Maintenance Functions _________________________________#
 
     ##
@@ -117,6 +161,16 @@ class Device(metaclass=ABCMeta):
     def get_type(self):
         return self._device_type
 
+    ##
+    # Returns the delay, in seconds, before the device processes a received message.
+    def get_message_latency(self):
+        return self._msg_latency
+
+    ##
+    # Returns the ids of the connected devices, in the order they were connected.
+    def get_connected_device_ids(self):
+        return list(self._connected_devices)
+
     ##
     # Updates the local time of the device.
     # This method is only called by the Supervisor once it is about to process a next initial event.
@@ -172,11 +226,11 @@ class Device(metaclass=ABCMeta):
         if amount < 0:
             # only calculates wire loss for positive amount
             return 0
-        wire = self._wires.get(device_id, None)
-        if wire:
-            wire_loss = wire.calculate_power(amount)
-            return wire_loss
-            # return -wire_loss if amount and amount < 0 else wire_loss
+        parameters = self._wire_parameters.get(device_id)
+        if parameters is not None:
+            voltage, resistance = parameters
+            wire_current = amount / voltage  # as Wire.calculate_power computes it
+            return wire_current * wire_current * resistance
         else:
             return 0
 
@@ -236,12 +290,10 @@ class Device(metaclass=ABCMeta):
         time_diff = self._time - self._time_last_power_in_change
         if time_diff > 0:
             self._sum_power_in += self._power_in * (time_diff / 3600.0)  # Return in wH
-            self._logger.info(
-                self.build_log_notation(
-                    message="energy_in, dt = {}, load = {}".format(time_diff / 3600.0, self._power_in),
-                    tag="energy_in",
-                    value=self._power_in * (time_diff / 3600.0)
-                )
+            self.log_notation(
+                "energy_in, dt = {}, load = {}", time_diff / 3600.0, self._power_in,
+                tag="energy_in",
+                value=self._power_in * (time_diff / 3600.0)
             )
         self._time_last_power_in_change = self._time
 
@@ -252,12 +304,12 @@ class Device(metaclass=ABCMeta):
             wire_loss_energy = wire_loss_rate * (time_diff / 3600.0)
             #wire_loss_energy = wire_loss_rate * time_diff * (time_diff / 3600.0)
             self._wire_loss_in += wire_loss_energy
-            self._logger.info(
-                self.build_log_notation(
-                    message="Calculate wire-loss-in, dt = {}, rate = {}, energy = {}".format(time_diff / 3600.0, wire_loss_rate, wire_loss_energy),
-                    tag="wire_loss_in",
-                    value=wire_loss_energy
-            ))
+            self.log_notation(
+                "Calculate wire-loss-in, dt = {}, rate = {}, energy = {}",
+                time_diff / 3600.0, wire_loss_rate, wire_loss_energy,
+                tag="wire_loss_in",
+                value=wire_loss_energy
+            )
         self._time_last_wire_loss_in = self._time
     
     def sum_wire_loss_out(self, wire_loss_rate):
@@ -266,12 +318,12 @@ class Device(metaclass=ABCMeta):
             wire_loss_energy = wire_loss_rate * (time_diff / 3600.0)
             #wire_loss_energy = wire_loss_rate * time_diff * (time_diff / 3600.0)
             self._wire_loss_out += wire_loss_energy
-            self._logger.info(
-                self.build_log_notation(
-                    message="Calculate wire-loss-out, dt = {}, rate = {}, energy = {}".format(time_diff / 3600.0, wire_loss_rate, wire_loss_energy),
-                    tag="wire_loss_out",
-                    value=wire_loss_energy
-            ))
+            self.log_notation(
+                "Calculate wire-loss-out, dt = {}, rate = {}, energy = {}",
+                time_diff / 3600.0, wire_loss_rate, wire_loss_energy,
+                tag="wire_loss_out",
+                value=wire_loss_energy
+            )
         self._time_last_wire_loss_out = self._time
 
     #  ______________________________________Internal State Functions _________________________________#
@@ -281,16 +333,35 @@ class Device(metaclass=ABCMeta):
     # Will replace any existing event with the new value. Hence, only one event type at a time
     # @param event the event to add to the event queue
     # @param time_stamp the time to associate with the event in the queue
+    # @param sequence optional tiebreaker among events with the same time stamp (defaults to order of addition)
 
-    def add_event(self, event, time_stamp):
-        self._queue.add(event, time_stamp)
+    def add_event(self, event, time_stamp, sequence=None):
+        if self._event_calendar is not None:
+            self._event_calendar.add(self._device_id, event, time_stamp, sequence)
+            return
+        self._queue.add(event, time_stamp, sequence)
         device_id, next_time = self.report_next_event_time()
         self._supervisor.register_event(device_id, next_time)
 
+    ##
+    # Adds a series of scheduled events to the device. Only the next occurrence of the series is kept in the event
+    # queue, and each occurrence adds the one following it when it is run.
+    # @param occurrences an iterable of (time_stamp, order, action, args) tuples in non-decreasing time order
+    # (see recurring_event.py)
+
+    def add_recurring_event(self, occurrences):
+        RecurringEvent(self, occurrences, next(self._recurring_event_ranks)).schedule_next()
+
     ##
     # Process all events in the device's queue with a given time_stamp.
     # This function should be called after advance_time has been called by the supervisor.
+    # @return the number of events processed
     def process_events(self):
+        if self._profiler is not None:
+            return self._process_events_profiled()
+        if self._event_calendar is not None:
+            return self._event_calendar.run_events(self._device_id, self._time)
+        num_events = 0
         if self.has_upcoming_event():
             event, time_stamp = self._queue.peek()
             if time_stamp < self._time:
@@ -299,12 +370,45 @@ class Device(metaclass=ABCMeta):
                 # process current events. Skylar was here.
                 self._queue.pop()
                 event.run_event()
+                num_events += 1
                 if self.has_upcoming_event():
                     event, time_stamp = self._queue.peek()
+        return num_events
+
+    ##
+    # Processes the events at the device's current time as process_events does, counting each event and its time in
+    # the supervisor's profiler.
+    # @return the number of events processed
+
+    def _process_events_profiled(self):
+        if self._event_calendar is not None:
+            return self._event_calendar.run_events(self._device_id, self._time, self._run_event_profiled)
+        num_events = 0
+        while self.has_upcoming_event():
+            event, time_stamp = self._queue.peek()
+            if time_stamp < self._time:
+                raise ValueError("Time was incremented while there was an unprocessed event.")
+            if time_stamp != self._time:
+                break
+            self._queue.pop()
+            self._profiler.run_event(self, event)
+            num_events += 1
+        return num_events
+
+    def _run_event_profiled(self, event):
+        self._profiler.run_event(self, event)
 
     def has_upcoming_event(self):
+        if self._event_calendar is not None:
+            return self._event_calendar.has_events(self._device_id)
         return not self._queue.is_empty()
 
+    ##
+    # Returns the number of events in the device's own queue (with the event calendar, this is always 0 as its events
+    # are kept in the calendar).
+    def pending_event_count(self):
+        return self._queue.size()
+
     ##
     # Report the time of the next earliest event in the device's event queue
     # Assumes the event queue is not empty. Call has_upcoming_event first.
@@ -313,6 +417,8 @@ class Device(metaclass=ABCMeta):
     def report_next_event_time(self):
         if not self.has_upcoming_event():
             raise ValueError("No upcoming events for this device")
+        if self._event_calendar is not None:
+            return self._device_id, self._event_calendar.next_event_time(self._device_id)
         next_event, time_stamp = self._queue.peek()
         return self._device_id, time_stamp
 
@@ -322,15 +428,33 @@ class Device(metaclass=ABCMeta):
     # Receiving a message is modelled as putting an event with the message a certain delay after the function call.
     # @param message the message to receive.
     def receive_message(self, message):
-        self.add_event(Event(self.read_message, message), message.time + self._msg_latency)
+        policy = self._message_policy
+        if policy is not None and not policy.admit(self._device_id, message):
+            return  # folded into a message already queued, or a duplicate
+        event = MessageEvent.acquire(self, message)
+        if policy is not None:
+            policy.queued(self._device_id, event)
+        arrival_time = message.time + self._msg_latency
+        if self._message_order is None:
+            self.add_event(event, arrival_time)
+        else:
+            self.add_event(event, arrival_time,
+                           self._message_order.sequence(self._device_id, message.sender_id, arrival_time))
+
+    ##
+    # Reads the message delivered by a message event, unless the delivery policy drops it as a duplicate.
+    # @param event the MessageEvent being run
+    def deliver_message(self, event):
+        if self._message_policy is None or self._message_policy.deliver(self._device_id, event):
+            self.read_message(event.get_message())
 
     ##
     # Reads a message and responds based on its message type
     # @param message a message to be read (must be a message object)
     def read_message(self, message):
         if message:
-            self._logger.info(self.build_log_notation(
-                "Read {} from {} with value {}".format(message.message_type, message.sender_id, message.value)))
+            self.log_notation(
+                "Read {} from {} with value {}", message.message_type, message.sender_id, message.value)
             if message.message_type == MessageType.REGISTER:
                 self.process_register_message(message)
             elif message.sender_id in self._connected_devices:  # Only read other messages from verified devices.
@@ -354,20 +478,18 @@ class Device(metaclass=ABCMeta):
 
     def register_device(self, device, device_id, value, wire=None):
         if value > 0 and device_id not in self._connected_devices:
-            self._connected_devices[device_id] = device
+            self.add_neighbor(device_id, device)
             if not device_id in self._wires:
                 self._wires[device_id] = wire
                 if not wire is None:
+                    self._wire_parameters[device_id] = (wire.voltage, wire.resistance)
                     self._is_wired = True
-            self._logger.info(
-                self.build_log_notation("registered {}".format(device_id))
-            )
+            self.log_notation("registered {}", device_id)
         elif value > 0 and device_id in self._connected_devices and not wire is None:
             self._wires[device_id] = wire
+            self._wire_parameters[device_id] = (wire.voltage, wire.resistance)
             self._is_wired = True
-            self._logger.info(
-                self.build_log_notation("added wire to {}".format(device_id))
-            )            
+            self.log_notation("added wire to {}", device_id)            
         # else:
         #     raise Exception("Device {} already registered to {}".format(device_id, self._device_id))
             # if device_id in self._connected_devices:
@@ -375,7 +497,7 @@ class Device(metaclass=ABCMeta):
             #     if device_id in self._wires:
             #         del self._wires[device_id]
             #     self._logger.info(
-            #         self.build_log_notation("unregistered {}".format(device_id))
+            #         self.build_log_notation("unregistered {}", device_id)
             #     )
             # else:
             #     print("No Such Device To Unregister")
@@ -406,9 +528,9 @@ class Device(metaclass=ABCMeta):
         else:
             raise ValueError("This device is not connected to the message recipient")
             # LOG THIS ERROR AND ALL ERRORS.
-        self._logger.debug(self.build_log_notation(
-            "REGISTER to {}".format(target_id), tag="register msg", value=value))
-        target.receive_message(Message(self._time, self._device_id, MessageType.REGISTER, value))
+        self.log_debug_notation(
+            "REGISTER to {}", target_id, tag="register msg", value=value)
+        target.receive_message(Message.acquire(self._time, self._device_id, MessageType.REGISTER, value))
 
     ##
     # Method to be called when device is entering the grid, and is seeking to register with other devices.
@@ -420,9 +542,38 @@ class Device(metaclass=ABCMeta):
         for device in device_list:
             device_id = device.get_id()
             if device_id not in self._connected_devices:
-                self._connected_devices[device_id] = device
+                self.add_neighbor(device_id, device)
             self.send_register_message(device_id, 1)
 
+    ##
+    # Adds a device to the connected devices, and to the neighbors of each of its roles.
+    # @param device_id the id of the device
+    # @param device the device to add
+    def add_neighbor(self, device_id, device):
+        self._connected_devices[device_id] = device
+        for role in device.neighbor_roles:
+            self._neighbors_by_role[role][device_id] = device
+
+    ##
+    # Replaces a connected device with another object to send its messages to, e.g. a stand-in for a device run by
+    # another process (see Supervisor.replace_devices). Does nothing if the device is not connected.
+    # @param device_id the id of the connected device
+    # @param device the replacement, which must have the same id and neighbor roles
+    def replace_neighbor(self, device_id, device):
+        if device_id not in self._connected_devices:
+            return
+        self._connected_devices[device_id] = device
+        for neighbors in self._neighbors_by_role.values():
+            if device_id in neighbors:
+                neighbors[device_id] = device
+
+    ##
+    # Returns the connected devices with a role, in the order they were connected.
+    # @param role one of NEIGHBOR_ROLES
+    # @return an ordered dictionary of device_id to device, which must not be modified
+    def get_neighbors(self, role):
+        return self._neighbors_by_role[role]
+
     ##
     # Method to be called when the device receives a power message, indicating power flows
     # have changed between two devices (either receiving or providing).
@@ -477,70 +628,82 @@ class Device(metaclass=ABCMeta):
     # time(seconds), operation_name
     #
     def setup_schedule(self, scheduled_events, runtime=SECONDS_IN_DAY, multiday=0):
-        curr_day = 0
+        profile = []  # list of (time in seconds, function, arguments) for each scheduled task
+        for task in scheduled_events:
+            hour, operation_name, *args = tuple(task)
+            if multiday and hour > multiday * 24:
+                break  # Past our repeat interval
+            if hasattr(self, operation_name):
+                func = getattr(self, operation_name)
+            else:
+                raise ValueError("Called the scheduler with an incorrectly named function")
+            profile.append((hour * 3600, func, tuple(args)))
         if multiday:
-            while curr_day < runtime:
-                for task in scheduled_events:
-                    hour, operation_name, *args = tuple(task)
-                    if hour > multiday * 24:
-                        break  # Past our repeat interval
-                    if hasattr(self, operation_name):
-                        func = getattr(self, operation_name)
-                    else:
-                        raise ValueError("Called the scheduler with an incorrectly named function")
-                    event = Event(func, *args) if args else Event(func)
-                    time_sec = hour * 3600
-                    self.add_event(event, curr_day + time_sec)
-                curr_day += SECONDS_IN_DAY
+            self.add_recurring_event(profile_occurrences(profile, 0, runtime))
         else:
-            for task in scheduled_events:
-                hour, operation_name, *args = tuple(task)
-                if hasattr(self, operation_name):
-                    func = getattr(self, operation_name)
-                else:
-                    raise ValueError("Called the scheduler with an incorrectly named function")
-                event = Event(func, *args) if args else Event(func)
-                time_sec = hour * 3600
-                self.add_event(event, time_sec)
+            self.add_recurring_event(single_occurrences(profile))
 
     # _____________________________ LOGGING FUNCTIONALITY ____________________________ #
 
     ##
     # Builds a logging message from a message, tag, and value, which also includes time and device_id
-    # @param message the message to add to logger
+    # @param message the message to add to logger, or a str.format string for args
+    # @param args the arguments to format the message with once the record is emitted
+    # @param tag the tag to associate with this message to add to the logger
+    # @param value the value for this message to add to the logger
+
+    # @return a log record to pass to the logger, which is only formatted if it is emitted
+    def build_log_notation(self, message="", *args, tag="", value=None):
+        return LogNotation(self._time, self._device_id, tag, value, message, args)
+
+    ##
+    # Logs a message, tag, and value at the info level, if info logging is enabled. The message is only formatted with
+    # args if a handler emits the record, e.g. self.log_notation("POWER to {}", target_id, tag="power", value=power).
+    # @param message the message to add to logger, or a str.format string for args
+    # @param args the arguments to format the message with once the record is emitted
+    # @param tag the tag to associate with this message to add to the logger
+    # @param value the value for this message to add to the logger
+
+    def log_notation(self, message="", *args, tag="", value=None):
+        if self._log_info_enabled:
+            self._logger.info(LogNotation(self._time, self._device_id, tag, value, message, args))
+
+    ##
+    # Logs a message, tag, and value at the debug level, if debug logging is enabled (see log_notation).
+    # @param message the message to add to logger, or a str.format string for args
+    # @param args the arguments to format the message with once the record is emitted
     # @param tag the tag to associate with this message to add to the logger
     # @param value the value for this message to add to the logger
 
-    # @return a formatted string to include in the logger
-    def build_log_notation(self, message="", tag="", value=None):
-        return "{}; {}; {}; {}; {}; {}".format(
-            format_time_from_seconds(self._time), self._time, self._device_id, tag, value, message)
+    def log_debug_notation(self, message="", *args, tag="", value=None):
+        if self._log_debug_enabled:
+            self._logger.debug(LogNotation(self._time, self._device_id, tag, value, message, args))
 
     ##
     # Writes the calculations of total energy in and out of this device in wH to the log file
     # then writes any other calculations specific to the device-type.
 
     def write_calcs(self):
-        self._logger.info(self.build_log_notation(
-            message="sum Wh out".format(self._device_id),
+        self.log_notation(
+            "sum Wh out",
             tag="power calcs",
             value=self._sum_power_out
-        ))
-        self._logger.info(self.build_log_notation(
+        )
+        self.log_notation(
             message="sum Wh in",
             tag="power calcs",
             value=self._sum_power_in
-        ))
-        self._logger.info(self.build_log_notation(
+        )
+        self.log_notation(
             message="sum wire loss (Wh) in",
             tag="wire loss in",
             value=self._wire_loss_in
-        ))
-        self._logger.info(self.build_log_notation(
+        )
+        self.log_notation(
             message="sum wire loss (Wh) out",
             tag="wire loss out",
             value=self._wire_loss_out
-        ))
+        )
         self.device_specific_calcs()
 
     ##
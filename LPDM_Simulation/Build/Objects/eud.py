@@ -16,15 +16,16 @@
 
 from abc import abstractmethod
 
-from Build.Objects.grid_equipment import GridEquipment
 from Build.Simulation_Operation.message import Message, MessageType
-from Build.Simulation_Operation.event import Event
+from Build.Simulation_Operation.recurring_event import periodic_occurrences
 from Build.Simulation_Operation.support import nonzero_power
-from Build.Objects.device import Device
+from Build.Objects.device import Device, ROLE_EUD, ROLE_GRID_EQUIPMENT
 
 
 class Eud(Device):
 
+    neighbor_roles = (ROLE_EUD,)
+
     def __init__(self, device_id, device_type, supervisor, total_runtime, time=0, msg_latency=0, power_direct=False,
                  modulation_interval=600, schedule=None, multiday=0, connected_devices=None):
         super().__init__(device_id, device_type, supervisor, time=time, msg_latency=msg_latency, schedule=schedule,
@@ -68,14 +69,13 @@ class Eud(Device):
     # Turns off the EUD. Reduces all power consumption to 0 and informs all connected grid controllers
     # of this change.
     def shut_down(self):
-        self._logger.info(self.build_log_notation(
-            message="shut down {}".format(self._device_id),
+        self.log_notation(
+            "shut down {}", self._device_id,
             tag="shut_down",
             value=0
-        ))
+        )
 
-        gcs = [device_id for device_id in self._connected_devices.keys() if isinstance(self._connected_devices[device_id], GridEquipment)]
-        for gc in gcs:
+        for gc in self._neighbors_by_role[ROLE_GRID_EQUIPMENT]:
             self.send_power_message(gc, 0)
             self.change_load_in(gc, 0)
         self.set_power_in(0)
@@ -100,10 +100,9 @@ class Eud(Device):
     def setup_modulation_schedule(self, modulation_interval, total_runtime):
         if modulation_interval <= 0:
             return
-        curr_time = self._time + modulation_interval  # start 1 interval in
-        while curr_time < total_runtime:
-            self.add_event(Event(self.modulate_power), curr_time)
-            curr_time += modulation_interval
+        start_time = self._time + modulation_interval  # start 1 interval in
+        self.add_recurring_event(periodic_occurrences(self.modulate_power, start_time, modulation_interval,
+                                                      total_runtime))
 
     # ____________________MESSAGING FUNCTIONS___________________________
     ##
@@ -119,12 +118,12 @@ class Eud(Device):
             self.respond_to_power(-message.value)
         else:
             self.send_power_message(message.sender_id, 0)
-            self._logger.info(self.build_log_notation("ignored positive power message from {}".format(message.sender_id)))
+            self.log_notation("ignored positive power message from {}", message.sender_id)
 
     ##
     # EUD's do not respond to request messages.
     def process_request_message(self, message):
-        self._logger.info(self.build_log_notation("ignored request message from {}".format(message.sender_id)))
+        self.log_notation("ignored request message from {}", message.sender_id)
 
     ##
     # Method to be called after the EUD receives a price message from a grid controller, immediately updating its price.
@@ -132,12 +131,11 @@ class Eud(Device):
         prev_price = self._price
         price_delta = abs(message.value - prev_price)
         self._price = message.value  # EUD always updates its value to the price it receives.
-        self._logger.info(
-            self.build_log_notation(
-                message="ignored request message from {}".format(message.sender_id),
-                tag="price",
-                value=message.value
-        ))
+        self.log_notation(
+            "ignored request message from {}", message.sender_id,
+            tag="price",
+            value=message.value
+        )
 
         if self._time - self._last_price_message_time >= self.power_recalibration_interval or \
            price_delta > self.price_recalibration_interval:
@@ -155,7 +153,7 @@ class Eud(Device):
 
     def process_allocate_message(self, message):
         if message.value < 0:  # can not send power, so ignore this message
-            self._logger.info(self.build_log_notation("ignored negative allocate message from {}".format(message.sender_id)))
+            self.log_notation("ignored negative allocate message from {}", message.sender_id)
         # TODO: subtract out the wire loss?
         self.set_allocated(message.sender_id, message.value)  # records the amount this device has been allocated
         self.modulate_power()
@@ -168,16 +166,15 @@ class Eud(Device):
     def send_request_message(self, target_id, request_amt):
         if request_amt < 0:
             raise ValueError("EUD cannot request to distribute power")
-        if target_id in self._connected_devices and isinstance(self._connected_devices[target_id], GridEquipment):  # cannot request from non-GC's
-            target_device = self._connected_devices[target_id]
-        else:
+        target_device = self._neighbors_by_role[ROLE_GRID_EQUIPMENT].get(target_id)  # cannot request from non-GC's
+        if target_device is None:
             raise ValueError("invalid target to request")
         # if there's a wire attached add it onto the request amount
         wire_loss = self.calculate_wire_loss(target_id, request_amt)
         request_amt += wire_loss
-        self._logger.info(self.build_log_notation(message="REQUEST to {}".format(target_id),
-                                                  tag="request_out", value=request_amt))
-        target_device.receive_message(Message(self._time, self._device_id, MessageType.REQUEST, request_amt))
+        self.log_notation("REQUEST to {}", target_id,
+                          tag="request_out", value=request_amt)
+        target_device.receive_message(Message.acquire(self._time, self._device_id, MessageType.REQUEST, request_amt))
 
     # This method is called when the EUD wishes to inform a grid controller that it is now consuming X watts of power.
     # @param target_id the recipient of the power message (must be a GC)
@@ -185,19 +182,18 @@ class Eud(Device):
     def send_power_message(self, target_id, power_amt):
         if power_amt < 0:
             raise ValueError("EUD cannot distribute power")
-        if target_id in self._connected_devices and isinstance(self._connected_devices[target_id], GridEquipment):  # cannot request from non-GC's
-            target_device = self._connected_devices[target_id]
-        else:
-            raise ValueError("invalid target to request")        
+        target_device = self._neighbors_by_role[ROLE_GRID_EQUIPMENT].get(target_id)  # cannot request from non-GC's
+        if target_device is None:
+            raise ValueError("invalid target to request")
         # if there's a wire attached add it onto the request amount
         wire_loss = self.calculate_wire_loss(target_id, power_amt)
         power_amt += wire_loss
         self.update_wire_loss_in(target_id, abs(wire_loss))
 
-        self._logger.info(self.build_log_notation(message="POWER to {}".format(target_id),
-                                                  tag="power_out", value=power_amt))
+        self.log_notation("POWER to {}", target_id,
+                          tag="power_out", value=power_amt)
 
-        target_device.receive_message(Message(self._time, self._device_id, MessageType.POWER, power_amt))
+        target_device.receive_message(Message.acquire(self._time, self._device_id, MessageType.POWER, power_amt))
 
     def change_load_in(self, sender_id, new_load):
         prev_load = self._loads_in.get(sender_id, 0)
@@ -217,7 +213,7 @@ class Eud(Device):
         desired_power_level = self.calculate_desired_power_level()
 
         # self._logger.info(self.build_log_notation(message="desired power level", tag="desired_power", value=desired_power_level))
-        gcs = [device_id for device_id in self._connected_devices.keys() if isinstance(self._connected_devices[device_id], GridEquipment)]
+        gcs = self._neighbors_by_role[ROLE_GRID_EQUIPMENT]
 
         if desired_power_level == 0:
             for gc in gcs:
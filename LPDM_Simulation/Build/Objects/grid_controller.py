@@ -19,17 +19,18 @@ power sources (such as Utility and PV), storage (batteries), and other grid cont
 from abc import ABCMeta, abstractmethod
 
 from Build.Objects.grid_equipment import GridEquipment
-from Build.Objects.utility_meter import UtilityMeter
-from Build.Objects.converter.converter import Converter
+from Build.Objects.market_book import MarketBook
 
 from Build.Simulation_Operation.message import Message, MessageType, MessageRedirect
-from Build.Simulation_Operation.event import Event
+from Build.Simulation_Operation.price_history import IntervalPriceHistory
+from Build.Simulation_Operation.recurring_event import periodic_occurrences
 from Build.Simulation_Operation.support import SECONDS_IN_DAY, SECONDS_IN_HOUR, nonzero_power, delta
-from Build.Objects.device import Device
+from Build.Objects.device import Device, ROLE_CONVERTER, ROLE_GRID_CONTROLLER, ROLE_GRID_EQUIPMENT, ROLE_UTILITY_METER
 
 
 class GridController(GridEquipment):
 
+    neighbor_roles = (ROLE_GRID_EQUIPMENT, ROLE_GRID_CONTROLLER)
     TRICKLE_POWER = 2  # Allow fluctuations of power within 2 watts without rebalancing. All devices can consume this.
 
     # TODO: Add some notion of individual transmit/receive capacity
@@ -50,20 +51,24 @@ class GridController(GridEquipment):
         super().__init__(device_id=device_id, device_type="grid_controller", supervisor=supervisor,
                          time=time, msg_latency=msg_latency, schedule=schedule, connected_devices=connected_devices)
 
+        # the prices, requests, allocations and loads with connected devices, kept in order and with running totals.
+        # The dictionaries below are views of the book: read them freely, but change them through the book.
+        self._market_book = MarketBook()
+
         # dictionary of devices and the amount the GC has allocated/been allocated by/to them.
         # Negative values are how much this GC has allocated to others, positive for this GC has been allocated to take.
-        self._allocated = {}
+        self._allocated = self._market_book.allocated
 
         # dictionary of devices and requests that this device has received from them.
         # Only is added to when this grid controller could not provide the full quantity in response.
         # Negative values are requests this GC has been asked provide,
         # positive are requests this GC has made to other devices.
-        self._requested = {}
+        self._requested = self._market_book.requested
 
         # dictionary of devices and the current load of the GC with that device.
-        self._loads = {}
+        self._loads = self._market_book.loads
         # dictionary of connected device_id's and their most recent price value. For utm, this only contains sell price.
-        self._neighbor_prices = {}
+        self._neighbor_prices = self._market_book.prices
         # A dictionary of utilities to their sell and buy prices, respectively.
         self._utility_prices = {}
         # keep track of which devices are utility meters
@@ -97,6 +102,13 @@ class GridController(GridEquipment):
             raise ValueError("attempted to initialize grid controller with invalid price logic")
 
         self._price = self._price_logic.get_initial_price() if self._price_logic else 0.0
+        # running statistics of the price over the simulation (see track_price)
+        self._price_stats_start_time = self._time
+        self._price_min = self._price_max = self._price
+        self._price_time_integral = 0.0  # integral of the price over time, up to the last price change
+        self._last_price = self._price
+        self._last_price_change_time = self._time
+        self._num_price_changes = 0
         self.setup_price_calc_schedule(self._price_logic.get_price_history_interval(), total_runtime)
 
         self.setup_battery_update_schedule(self._battery.get_update_frequency(), total_runtime)
@@ -105,11 +117,17 @@ class GridController(GridEquipment):
     def init(self):
         super().init()
         self.build_utility_meter_list()
+
+    def update_log_levels(self):
+        super().update_log_levels()
+        self._battery.update_log_levels()
     
     def build_utility_meter_list(self):
         """Build a list of utility meters"""
-        for d_id, d in self._connected_devices.items():
-            if isinstance(d, UtilityMeter) or (isinstance(d, Converter) and d.has_utm()):
+        utility_meters = self._neighbors_by_role[ROLE_UTILITY_METER]
+        converters = self._neighbors_by_role[ROLE_CONVERTER]
+        for d_id in self._neighbors_by_role[ROLE_GRID_EQUIPMENT]:
+            if d_id in utility_meters or (d_id in converters and converters[d_id].has_utm()):
                 self._connected_utility_meters.append(d_id)
 
     #  ______________________________________Maintenance Functions______________________________________ #
@@ -149,7 +167,7 @@ class GridController(GridEquipment):
         self.set_power_out(0)
         self.disengage()
 
-        self._logger.info(self.build_log_notation(message="turn off", tag="turn_off", value="1"))
+        self.log_notation(message="turn off", tag="turn_off", value="1")
         # send power message of 0 to all devices. send allocate message of 0 to all devices.
         # send request messages of 0 to all of them. Then, unregister with all.
 
@@ -164,9 +182,9 @@ class GridController(GridEquipment):
     def change_load(self, sender_id, new_load):
         prev_load = self._loads[sender_id] if sender_id in self._loads else 0
         self.recalc_sum_power(prev_load, new_load)
-        self._loads[sender_id] = new_load
-        self._logger.info(self.build_log_notation(message="load changed for {} to {}".format(sender_id, new_load),
-                                                   tag="load change", value=new_load))
+        self._market_book.set_load(sender_id, new_load)
+        self.log_notation("load changed for {} to {}", sender_id, new_load,
+                          tag="load change", value=new_load)
         return new_load - prev_load
 
     ##
@@ -174,24 +192,20 @@ class GridController(GridEquipment):
     # @param[in] price_history_interval how frequently prices should be recalculated.
     # @param[in] total_runtime the total runtime of the simulation, this will setup events up until that time
     def setup_price_calc_schedule(self, price_history_interval, total_runtime):
-        curr_time = self._time
         if price_history_interval <= 0:
             return
-        while curr_time < total_runtime:
-            self.add_event(Event(self.update_average_price_calcs), curr_time)
-            curr_time += price_history_interval
+        self.add_recurring_event(periodic_occurrences(self.update_average_price_calcs, self._time,
+                                                      price_history_interval, total_runtime))
 
     ##
     # Sets up the events to recalculate the battery's charge preference every certain period of time.
     # @param update_frequency how frequently prices should be recalculated.
     # @param total_runtime the total runtime of the simulation, this will setup events up until that time
     def setup_battery_update_schedule(self, update_frequency, total_runtime):
-        curr_time = self._time
         if update_frequency <= 0:
             return
-        while curr_time < total_runtime:
-            self.add_event(Event(self.update_battery), curr_time)
-            curr_time += update_frequency
+        self.add_recurring_event(periodic_occurrences(self.update_battery, self._time, update_frequency,
+                                                      total_runtime))
 
     ##
     # Every 5 minutes, reevaluate this Grid Controller's loads with modulate power and seek to optimize
@@ -200,10 +214,8 @@ class GridController(GridEquipment):
 
     def setup_modulation_schedule(self, total_runtime):
         modulation_frequency = 300  # Default 5 Minutes.
-        curr_time = self._time
-        while curr_time < total_runtime:
-            self.add_event(Event(self.modulate_power), curr_time)
-            curr_time += modulation_frequency
+        self.add_recurring_event(periodic_occurrences(self.modulate_power, self._time, modulation_frequency,
+                                                      total_runtime))
 
     #  ______________________________________ Messaging/Interactive Functions_________________________________#
 
@@ -231,12 +243,11 @@ class GridController(GridEquipment):
     # @param new_power the new power value from the perspective of the message sender.
 
     def process_power_message(self, message):
-        self._logger.info(
-            self.build_log_notation(
-                message="POWER message from {}".format(message.sender_id),
-                tag="power_msg_in",
-                value=message.value
-        ))
+        self.log_notation(
+            "POWER message from {}", message.sender_id,
+            tag="power_msg_in",
+            value=message.value
+        )
         prev_power = self._loads[message.sender_id] if message.sender_id in self._loads else 0
         self.balance_power(message.sender_id, prev_power, -message.value)  # process new power from perspective of receiver.
         if delta(message.value, prev_power) > self.TRICKLE_POWER:  # don't recalibrate for power changes smaller than this
@@ -252,15 +263,14 @@ class GridController(GridEquipment):
     def process_price_message(self, message):
         # if message.sender_id.startswith("utm"):  # Remember sell price, buy_price pair from utility meters
         # sender_id = message.redirect.original_sender_id if isinstance(message.redirect, MessageRedirect) else message.sender_id
-        self._logger.info(
-            self.build_log_notation(
-                message="PRICE message from {}".format(message.sender_id),
-                tag="price_msg_in",
-                value=message.value
-        ))
+        self.log_notation(
+            "PRICE message from {}", message.sender_id,
+            tag="price_msg_in",
+            value=message.value
+        )
         if message.sender_id in self._connected_utility_meters:
             self._utility_prices[message.sender_id] = (message.value, message.extra_info)
-        self._neighbor_prices[message.sender_id] = message.value
+        self._market_book.set_price(message.sender_id, message.value)
         self.modulate_price()  # if price significantly changed, will broadcast this price to all neighbors.
         self.modulate_power()
 
@@ -279,7 +289,7 @@ class GridController(GridEquipment):
         provide = self.request_response(message.value)
         # Note: May provide more than asked for, which recipient can consume up to at any point.
         self.send_allocate_message(message.sender_id, provide)  # Positive
-        self._requested[message.sender_id] = -message.value
+        self._market_book.set_requested(message.sender_id, -message.value)
         self.modulate_price()
 
     ##
@@ -287,9 +297,9 @@ class GridController(GridEquipment):
 
     def process_allocate_message(self, message):
         if message.value < 0:
-            self._logger.info("ignored negative allocate message from {}".format(message.sender_id))
+            self._logger.info("ignored negative allocate message from %s", message.sender_id)
             return
-        self._allocated[message.sender_id] = message.value  # so we can consume or provide up to that amount of power anytime
+        self._market_book.set_allocated(message.sender_id, message.value)  # so we can consume or provide up to that amount of power anytime
         # TODO: self.modulate_power()?
 
     ##
@@ -314,10 +324,10 @@ class GridController(GridEquipment):
             else:
                 # power_amt is zero so no wire loss
                 self.update_wire_loss_in(target_id, 0)
-        self._logger.info(self.build_log_notation(message="POWER to {}".format(target_id),
-                                                  tag="power_msg", value=power_amt))
+        self.log_notation("POWER to {}", target_id,
+                          tag="power_msg", value=power_amt)
 
-        target.receive_message(Message(self._time, self._device_id, MessageType.POWER, power_amt))
+        target.receive_message(Message.acquire(self._time, self._device_id, MessageType.POWER, power_amt))
 
     #
     # Informs another device of this grid controller's price
@@ -326,9 +336,9 @@ class GridController(GridEquipment):
             target = self._connected_devices[target_id]
         else:
             raise ValueError("This GC is connected to no such device")
-        self._logger.info(self.build_log_notation(message="PRICE to {}".format(target_id),
-                                                  tag="price_msg_out", value=price))
-        target.receive_message(Message(self._time, self._device_id, MessageType.PRICE, price))
+        self.log_notation("PRICE to {}", target_id,
+                          tag="price_msg_out", value=price)
+        target.receive_message(Message.acquire(self._time, self._device_id, MessageType.PRICE, price))
 
     ##
     # Requests to receive a given amount of power from another device.
@@ -337,9 +347,9 @@ class GridController(GridEquipment):
             target_device = self._connected_devices[target_id]
         else:
             raise ValueError("This GC is connected to no such device")
-        self._logger.info(self.build_log_notation(message="REQUEST to {}".format(target_id),
-                                                  tag="request_msg", value=request_amt))
-        target_device.receive_message(Message(self._time, self._device_id, MessageType.REQUEST, request_amt))
+        self.log_notation("REQUEST to {}", target_id,
+                          tag="request_msg", value=request_amt)
+        target_device.receive_message(Message.acquire(self._time, self._device_id, MessageType.REQUEST, request_amt))
 
     ##
     # Allocates a given quantity of power to be provided to another device.
@@ -348,10 +358,10 @@ class GridController(GridEquipment):
             target_device = self._connected_devices[target_id]
         else:
             raise ValueError("This GC is connected to no such device")
-        self._logger.info(self.build_log_notation(message="ALLOCATE to {}".format(target_id),
-                                                  tag="allocate_msg", value=allocate_amt))
-        self._allocated[target_id] = -allocate_amt
-        target_device.receive_message(Message(self._time, self._device_id, MessageType.ALLOCATE, allocate_amt))
+        self.log_notation("ALLOCATE to {}", target_id,
+                          tag="allocate_msg", value=allocate_amt)
+        self._market_book.set_allocated(target_id, -allocate_amt)
+        target_device.receive_message(Message.acquire(self._time, self._device_id, MessageType.ALLOCATE, allocate_amt))
 
     # Broadcasts the new price to all of its connected devices.
     # @param new_price the new price to broadcast to all devices
@@ -368,7 +378,7 @@ class GridController(GridEquipment):
 
     def update_battery(self):
         self._battery.update_state(self._time, self._price, self._price_logic.get_average_price(),
-                                   self._price_logic.get_interval_prices())
+                                   self._price_logic.get_interval_history())
 
         # If the state is no longer possible (power drawn out with non-positive state-of-charge, or charging at full
         # charge, we must immediately reduce).
@@ -391,12 +401,11 @@ class GridController(GridEquipment):
     # hourly price and total average price statistics so that it can base its current price based on those.
     def update_average_price_calcs(self):
         self._price_logic.update_prices(self._time)
-        self._logger.info(
-            self.build_log_notation(
-                message="price changed to {}".format(self._price),
-                tag="price",
-                value=self._price
-        ))
+        self.log_notation(
+            "price changed to {}", self._price,
+            tag="price",
+            value=self._price
+        )
 
     ##
     # Recalculates the price with the Grid Controller's price logic, and then sets the current price value.
@@ -405,8 +414,43 @@ class GridController(GridEquipment):
         self._price = self._price_logic.calc_price(neighbor_prices=self._neighbor_prices,
                                                    loads=self._loads, requested=self._requested,
                                                    allocated=self._allocated,
-                                                   desired_battery_power=battery_power_adjust)
+                                                   desired_battery_power=battery_power_adjust,
+                                                   utility_meters=self._neighbors_by_role[ROLE_UTILITY_METER],
+                                                   market_book=self._market_book)
         self._price_logic.set_current_price(self._price)
+        self.track_price()
+
+    ##
+    # Updates the running price statistics with the current price, if it has changed.
+    def track_price(self):
+        if self._price == self._last_price:
+            return
+        self._price_time_integral += self._last_price * (self._time - self._last_price_change_time)
+        self._last_price = self._price
+        self._last_price_change_time = self._time
+        self._price_min = min(self._price_min, self._price)
+        self._price_max = max(self._price_max, self._price)
+        self._num_price_changes += 1
+
+    ##
+    # Returns statistics of the grid controller's price so far: its minimum, maximum, time-weighted mean and final
+    # value, and the number of times it changed.
+    # @return a dictionary of the price statistics
+    def get_price_stats(self):
+        elapsed = self._time - self._price_stats_start_time
+        integral = self._price_time_integral + self._last_price * (self._time - self._last_price_change_time)
+        return {
+            "min": self._price_min,
+            "max": self._price_max,
+            "mean": integral / elapsed if elapsed > 0 else self._price,
+            "final": self._price,
+            "changes": self._num_price_changes
+        }
+
+    ##
+    # Returns the battery of the grid controller.
+    def get_battery(self):
+        return self._battery
 
     ##
     # Calculate this after a device has received a price message.
@@ -418,8 +462,8 @@ class GridController(GridEquipment):
         self.update_average_price_calcs()  # update the previous average price information
         self.recalculate_price()  # use the price logic to evaluate a new price
         if self._price != old_price:  # log this if the price changed.
-            self._logger.info(self.build_log_notation(message="price changed to {}".format(self._price),
-                                                      tag="price change", value=self._price))
+            self.log_notation("price changed to {}", self._price,
+                              tag="price change", value=self._price)
             # broadcast only if significant change price.
             price_delta = delta(self._price, old_price)
             if price_delta >= self._price_logic.get_price_announce_threshold():
@@ -488,7 +532,7 @@ class GridController(GridEquipment):
                 # add the unprovided power as a request to address later.
                 unprovided = source_demanded_power - self._loads[source_id]
                 if unprovided:
-                    self._requested[source_id] = source_demanded_power
+                    self._market_book.set_requested(source_id, source_demanded_power)
             else:
                 # no utm, not able to provide for the demanded power. Send a new power message saying what you can give.
                 self.change_load(source_id, source_demanded_power - remaining)
@@ -496,7 +540,7 @@ class GridController(GridEquipment):
                 # add the unprovided power as a request.
                 unprovided = source_demanded_power - self._loads[source_id]
                 if unprovided:
-                    self._requested[source_id] = source_demanded_power
+                    self._market_book.set_requested(source_id, source_demanded_power)
         else:
             self.change_load(source_id, source_demanded_power)
 
@@ -504,11 +548,11 @@ class GridController(GridEquipment):
         provided = self._loads[source_id]
         if nonzero_power(provided - source_demanded_power):
             if provided > 0:
-                self._logger.info(self.build_log_notation(message="could only input {}W".format(provided),
-                                                          tag="insufficient power in", value=provided))
+                self.log_notation("could only input {}W", provided,
+                                  tag="insufficient power in", value=provided)
             else:
-                self._logger.info(self.build_log_notation(message="could only output {}W".format(provided),
-                                                          tag="insufficient power out", value=provided))
+                self.log_notation("could only output {}W", provided,
+                                  tag="insufficient power out", value=provided)
             self.send_power_message(source_id, provided)
 
     ##
@@ -516,11 +560,8 @@ class GridController(GridEquipment):
     # @return quantity of freely available power from existing allocates
 
     def get_allocate_assets(self):
-        assets = 0  # diff. of amount the device has been allocated to receive and amount it is currently taking
-        for dev_id, allocated in self._allocated.items():
-            if allocated > 0:  # allocated to receive
-                assets += max(allocated - self._loads.get(dev_id, 0), 0)
-        return assets
+        # diff. of amount the device has been allocated to receive and amount it is currently taking
+        return self._market_book.get_allocate_assets()
 
     ##
     # Sees what the GC is liable to provide other devices because of its allocation to other devices that are
@@ -528,11 +569,8 @@ class GridController(GridEquipment):
     # @return quantity of excess allocate liabilities
 
     def get_allocate_liabilities(self):
-        liabilities = 0  # diff. of amount device has allocated to provide and amount it is currently providing
-        for dev_id, allocated in self._allocated.items():
-            if allocated < 0:
-                liabilities -= min(allocated - self._loads.get(dev_id, 0), 0)
-        return liabilities
+        # diff. of amount device has allocated to provide and amount it is currently providing
+        return self._market_book.get_allocate_liabilities()
 
     ##
     # Determines how much this GC responds to a power request. See documentation for reasoning.
@@ -631,26 +669,26 @@ class GridController(GridEquipment):
 
         # Write out all battery consumptions statistics
         if self._battery:
-            self._logger.info(self.build_log_notation(
+            self.log_notation(
                 message="battery sum charge Wh",
                 tag="power_calcs",
                 value=self._battery.sum_charge_wh
-            ))
+            )
 
-            self._logger.info(self.build_log_notation(
+            self.log_notation(
                 message="battery sum discharge Wh",
                 tag="power_calcs",
                 value=self._battery.sum_discharge_wh
-            ))
+            )
             # Ensure that the change in power is completely covered by the battery for valid calculations
             power_differential = (self._battery.sum_discharge_wh - self._battery.sum_charge_wh) - \
                                  (self._sum_power_out - self._sum_power_in)
             valid_calc = abs(power_differential) <= MARGIN_OF_ERROR
-            self._logger.info(self.build_log_notation(
-                message="valid power balance: {}".format(valid_calc),
+            self.log_notation(
+                "valid power balance: {}", valid_calc,
                 tag="valid_calcs",
                 value=valid_calc
-            ))
+            )
 
     #  _______________________________ PRICE LOGICS ________________________________________________#
 
@@ -660,6 +698,8 @@ class GridController(GridEquipment):
 
 class GridControllerPriceLogic(metaclass=ABCMeta):
 
+    PRICE_HISTORY_DAYS = 7  # the days of interval prices to keep, see get_interval_history
+
     ##
     # @param price_history_interval the length of the interval to calculate the average price for and store in memory
     # (e.g. if 3600, then store hourly average prices).
@@ -678,8 +718,11 @@ class GridControllerPriceLogic(metaclass=ABCMeta):
         daily_price_history_len, rem = divmod(SECONDS_IN_DAY, price_history_interval)
         if rem:
             daily_price_history_len += 1
+        self._intervals_per_day = daily_price_history_len
 
-        self._interval_prices = [self._initial_price for i in range(daily_price_history_len)]
+        # the interval prices, with statistics over the intervals of the last day
+        self._interval_history = IntervalPriceHistory(self._initial_price, daily_price_history_len,
+                                                      daily_price_history_len * self.PRICE_HISTORY_DAYS)
         self._total_average_price = self._initial_price
         self._last_price_update_time = 0  # the time in the hour when the price was last updated
 
@@ -695,11 +738,12 @@ class GridControllerPriceLogic(metaclass=ABCMeta):
         return self._price_announce_threshold
 
     ##
-    # Gets the predicted price of this grid controller at the specified time (in seconds)
+    # Gets the predicted price of this grid controller at the specified time (in seconds): the latest price of the
+    # interval at the same time of day.
     def get_forecast_price(self, time):
         (day, seconds) = divmod(time, SECONDS_IN_DAY)
         (interval_num, seconds) = divmod(seconds, self._price_history_interval)
-        return self._interval_prices[interval_num]
+        return self._interval_history.get_price(self._latest_interval_of_day(interval_num))
 
     ##
     # Gets the length of a price intervals
@@ -723,16 +767,24 @@ class GridControllerPriceLogic(metaclass=ABCMeta):
         (prev_day, prev_seconds) = divmod(self._last_price_update_time, SECONDS_IN_DAY)
         (prev_interval_num, secs_into_previous_interval) = divmod(prev_seconds, self._price_history_interval)
 
+        interval = day * self._intervals_per_day + interval_num
         if prev_interval_num == interval_num and prev_day == day:  # we are in the same interval. Need to average.
-            prev_sum_price = self._interval_prices[interval_num] * secs_into_previous_interval
+            prev_sum_price = self._interval_history.get_price(interval) * secs_into_previous_interval
         else:
             prev_sum_price = 0
 
         if secs_into_interval:
-            self._interval_prices[interval_num] = (prev_sum_price +
-                                                  (time_diff * self._current_price)) / secs_into_interval
+            self._interval_history.set_price(interval, (prev_sum_price +
+                                                        (time_diff * self._current_price)) / secs_into_interval)
         else:
-            self._interval_prices[interval_num] = self._current_price
+            self._interval_history.set_price(interval, self._current_price)
+
+    ##
+    # Returns the number of the latest interval, up to the current one, at a given interval of the day.
+    def _latest_interval_of_day(self, interval_num):
+        current = self._interval_history.get_current_interval()
+        interval = current - current % self._intervals_per_day + interval_num
+        return interval if interval <= current else interval - self._intervals_per_day
 
     ##
     # Updates the average time of the grid controller
@@ -746,10 +798,17 @@ class GridControllerPriceLogic(metaclass=ABCMeta):
             self._total_average_price = self._current_price
 
     ##
-    # Returns the interval prices of this grid controller.
+    # Returns the latest price of each interval of the day of this grid controller, in order of the time of day.
     # These price values may be weighted by the implementing logic.
     def get_interval_prices(self):
-        return self._interval_prices
+        return [self._interval_history.get_price(self._latest_interval_of_day(interval_num))
+                for interval_num in range(self._intervals_per_day)]
+
+    ##
+    # Returns the interval price history of this grid controller, which keeps the statistics of the prices of the
+    # intervals of the last day and the prices of the last PRICE_HISTORY_DAYS days.
+    def get_interval_history(self):
+        return self._interval_history
 
     ##
     # Sets the current price to use in the price logic for calculations. Call this function whenever the
@@ -780,12 +839,23 @@ class GridControllerPriceLogic(metaclass=ABCMeta):
     # @param requested dictionary of connected device id's and current requests to and from those devices
     # @param allocated the dictionary of connected device id's and allocated by and to those devices.
     # @param desired_battery_charge the difference of current desired battery power flow and desired batt. power flow
+    # @param utility_meters the connected utility meters, by device id
+    # @param market_book the grid controller's MarketBook of the above. If not given, one is built from them.
     # @return the calculated price based on the input variables.
     @abstractmethod
     def calc_price(self, neighbor_prices=None, loads=None, requested=None, allocated=None,
-                   desired_battery_power=0):
+                   desired_battery_power=0, utility_meters=(), market_book=None):
         pass
 
+    ##
+    # Returns the market book to calculate a price from: the grid controller's own, or else one built from the
+    # dictionaries passed to calc_price.
+    @staticmethod
+    def market_book_of(market_book, neighbor_prices, loads, requested, allocated):
+        if market_book is not None:
+            return market_book
+        return MarketBook.from_dicts(neighbor_prices, requested, allocated, loads)
+
 
 """ 
 
@@ -824,17 +894,13 @@ class GCWeightedAveragePriceLogic(GridControllerPriceLogic):
     # @param allocated the dictionary of connected device id's and allocated by and to those devices.
     # @param desired_battery_charge the difference of current desired battery power flow and desired batt. power flow
 
-    def calc_price(self, neighbor_prices=None, loads=None, requested=None, allocated=None, desired_battery_power=0):
-
-        if neighbor_prices and loads:
-            total_load_in = 0.0
-            sum_price = 0.0
-            for source, load in loads.items():
-                if load > 0:  # receiving power from this entity
-                    neighbor_price = neighbor_prices.get(source, 0)
-                    if neighbor_price >= 0:
-                        total_load_in += load
-                        sum_price += (neighbor_price * load)
+    def calc_price(self, neighbor_prices=None, loads=None, requested=None, allocated=None, desired_battery_power=0,
+                   utility_meters=(), market_book=None):
+
+        book = self.market_book_of(market_book, neighbor_prices, loads, requested, allocated)
+        if book.prices and book.loads:
+            # power received from each entity, and its cost at the entity's price (or zero if it has none yet)
+            total_load_in, sum_price = book.get_load_in()
             if total_load_in:
                 return sum_price / total_load_in
         # insufficient information on neighbor prices or no current loads in, return starting price
@@ -867,15 +933,20 @@ class GCMarginalPriceLogic(GridControllerPriceLogic):
     # @param requested dictionary of connected device id's and current requests to and from those devices
     # @param allocated the dictionary of connected device id's and allocated by and to those devices.
     # @param desired_battery_charge the difference of current desired battery power flow and desired batt. power flow
+    # @param utility_meters the connected utility meters, by device id
     # @return the calculated price based on the input variables.
-    def calc_price(self, neighbor_prices=None, loads=None, requested=None, allocated=None, desired_battery_power=0):
+    def calc_price(self, neighbor_prices=None, loads=None, requested=None, allocated=None, desired_battery_power=0,
+                   utility_meters=(), market_book=None):
+        book = self.market_book_of(market_book, neighbor_prices, loads, requested, allocated)
         min_price = float('inf')
 
         # Find the cheapest price amongst the devices we've been allocated to receive from or utility meters
-        for source, price in neighbor_prices.items():
-            if allocated.get(source, -1) > 0 or source.startswith("utm"):
-                if price < min_price:
-                    min_price = price
+        allocated_in_price = book.get_cheapest_allocated_in_price()
+        if allocated_in_price is not None:
+            min_price = allocated_in_price
+        for utm_id in utility_meters:
+            if book.prices.get(utm_id, min_price) < min_price:
+                min_price = book.prices[utm_id]
         if min_price != float('inf'):
             return min_price
         else:
@@ -904,36 +975,33 @@ class GCMarginalPriceLogicB(GridControllerPriceLogic):
     # @param allocated the dictionary of connected device id's and allocated by and to those devices.
     # @param desired_battery_charge the difference of current desired battery power flow and desired batt. power flow
     # (positive if wants to charge more, negative if wants to output more)
+    # @param utility_meters the connected utility meters, by device id
     # @return the calculated price based on the input variables.
 
-    def calc_price(self, neighbor_prices=None, loads=None, requested=None, allocated=None, desired_battery_power=0):
-        total_requested_out = 0  # positive record of how much this device has been requested to provide out
-
-        # Calculate how much this device owes to provide.
-        for requested in requested.values():
-            if requested < 0:
-                total_requested_out -= requested
+    def calc_price(self, neighbor_prices=None, loads=None, requested=None, allocated=None, desired_battery_power=0,
+                   utility_meters=(), market_book=None):
+        book = self.market_book_of(market_book, neighbor_prices, loads, requested, allocated)
+        # positive record of how much this device has been requested to provide out
+        total_requested_out = book.get_requested_out()
 
         # Calculate how much has been requested vs. how much we want to change battery, this is our total power
         # flow shift amount that we want to calculate the marginal price of satisfying.
         remaining = total_requested_out + desired_battery_power
-        prices_from_cheapest = sorted(neighbor_prices.items(), key=lambda x: x[1])
         # We are looking to distribute power and there is insufficient current demand.
         # Lower our price to below current cheapest price level to allow to sell
         if remaining < 0:
-            return 0.9 * prices_from_cheapest[0][1]
+            return 0.9 * book.get_cheapest_price()
 
         marginal_price = float('inf')
         # Find the cheapest price amongst the devices we've been allocated to take from.
-        for source, price in prices_from_cheapest:
-            if allocated.get(source, -1) > 0:
-                remaining -= allocated[source]
-                marginal_price = price
-                if remaining < 0:
-                    break
+        for price, source in book.allocated_in_by_price():
+            remaining -= book.allocated[source]
+            marginal_price = price
+            if remaining < 0:
+                break
 
         # Subset to only the utility meter prices (we can take infinite without allocation)
-        utm_prices = {device: price for device, price in neighbor_prices.items() if device.startswith("utm")}
+        utm_prices = {device: book.prices[device] for device in utility_meters if device in book.prices}
         if utm_prices:
             for utm, price in utm_prices.items():
                 if price < marginal_price:
@@ -974,7 +1042,8 @@ class GCStaticPrice(GridControllerPriceLogic):
     # (positive if wants to charge more, negative if wants to output more)
     # @return the calculated price based on the input variables.
 
-    def calc_price(self, neighbor_prices=None, loads=None, requested=None, allocated=None, desired_battery_power=0):
+    def calc_price(self, neighbor_prices=None, loads=None, requested=None, allocated=None, desired_battery_power=0,
+                   utility_meters=(), market_book=None):
         total_requested_out = 0  # positive record of how much this device has been requested to provide out
 
         return self._initial_price
@@ -16,12 +16,14 @@
 
 from abc import ABCMeta
 
-from Build.Objects.device import Device
+from Build.Objects.device import Device, ROLE_GRID_EQUIPMENT
 from Build.Simulation_Operation.support import SECONDS_IN_DAY
 
 
 class GridEquipment(Device, metaclass=ABCMeta):
 
+    neighbor_roles = (ROLE_GRID_EQUIPMENT,)
+
     ##
     # Initializes a device class with the identical input parameters. This will still be an abstract class.
     def __init__(self, device_id, device_type, supervisor, time=0, msg_latency=0, schedule=None, multiday=0,
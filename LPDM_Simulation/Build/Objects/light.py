@@ -15,6 +15,7 @@ An implementation of a light EUD. The light functions such that
 """
 
 from Build.Simulation_Operation.support import SECONDS_IN_DAY
+from Build.Objects.device import ROLE_GRID_CONTROLLER
 from Build.Objects.eud import Eud
 
 
@@ -67,8 +68,7 @@ class Light(Eud):
     # and it remains in operation even when off.
     def off(self):
         self._on = False
-        gcs = [key for key in self._connected_devices.keys() if key.startswith("gc")]
-        for gc in gcs:
+        for gc in self._neighbors_by_role[ROLE_GRID_CONTROLLER]:
             self.send_power_message(gc, 0)
             self.change_load_in(gc, 0)
         self.set_power_in(0)
@@ -80,11 +80,11 @@ class Light(Eud):
     # @param received_power how much power this light received to operate
     def respond_to_power(self, received_power):
         self._brightness = received_power / self._max_operating_power
-        self._logger.info(self.build_log_notation(
-            message="brightness changed to {}".format(self._brightness),
+        self.log_notation(
+            "brightness changed to {}", self._brightness,
             tag="brightness",
             value=self._brightness
-        ))
+        )
 
     """The light does not keep track of a dynamic internal state -- it is just either on or off with its power level
     determining its brightness. Hence, does not perform other EUD functions corresponding its dynamic internal state"""
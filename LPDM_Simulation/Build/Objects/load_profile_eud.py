@@ -14,7 +14,8 @@
 import os
 from Build.Objects.eud import Eud
 from Build.Simulation_Operation.support import SECONDS_IN_DAY
-from Build.Simulation_Operation.event import Event
+from Build.Simulation_Operation.recurring_event import profile_occurrences, single_occurrences
+from Build.Simulation_Operation.timeseries import load_timeseries, TIME_HMS
 
 class LoadProfile(Eud):
 
@@ -41,53 +42,30 @@ class LoadProfile(Eud):
 
     ##
     # Sets the device's power levels according to a schedule.
-    # @param power_level_list list of time, power_level tuples
+    # @param power_level_list a tuple of arrays of the times and power levels, as returned by read_load_data
     # @param total_runtime how long the EUD is running for.
     def setup_power_schedule(self, power_level_list, total_runtime):
+        times, power_levels = power_level_list
         # Check if power level list spans multiple days, or is single day repeat
-        multiday_input = False
-        for time, power_level in power_level_list:
-            if time > 86400:
-                multiday_input = True
-                break
+        multiday_input = bool((times > SECONDS_IN_DAY).any())
+        action = self.set_desired_power_level  # one bound method for every entry, pickled once in a checkpoint
+        profile = [(time, action, (power_level,)) for time, power_level in zip(times.tolist(), power_levels.tolist())]
         if multiday_input: # multiple day power level list
-            for time, power_level in power_level_list:
-                power_event = Event(self.set_desired_power_level, power_level)
-                self.add_event(power_event, time)
+            self.add_recurring_event(single_occurrences(profile))
         else: # single day repeated power level list
             curr_day = int(self._time / SECONDS_IN_DAY)  # Current day in seconds
-            while curr_day < total_runtime:
-                for time, power_level in power_level_list:
-                    power_event = Event(self.set_desired_power_level)
-                    self.add_event(power_event, time + curr_day)
-                curr_day += SECONDS_IN_DAY
+            self.add_recurring_event(profile_occurrences(profile, curr_day, total_runtime))
 
     ##
     # Reads in the load profile csv data containing information about the power used at different times during
     # the simulation.
     # @param filename the input filename containing a list of times and associated power
-    # @return a list of tuples of time (seconds), and power produced (watts).
+    # @return a tuple of arrays of the times (seconds) and power (watts), read-only as they are shared
     def read_load_data(self, filename):
-        data_out = []  # list of tuples of time and power ratios
-        pv_data = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))),
-                               "scenario_data/load_profiles/{}".format(filename))
-        with open(pv_data, 'r') as data:
-            DATASTART = 0
-            TIMEIND = 0
-            DCPOWERIND = 1
-            for i, line in enumerate(data):
-                if i < DATASTART:
-                    continue
-                parts = line.strip().split(',')
-                if len(parts) >= DCPOWERIND + 1 and parts[0].strip():
-                    time_parts = parts[0].split(':')
-                    if len(time_parts) == 3: # Parse time from H:M:S format
-                        time_secs = (int(time_parts[0]) * 60 * 60) + (int(time_parts[1]) * 60) + int(time_parts[2])
-                    else: # Get time from row index, hourly increments
-                        time_secs = (i - DATASTART)*3600
-                    power = float(parts[DCPOWERIND])
-                    data_out.append((time_secs, power))
-        return data_out
+        load_data = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))),
+                                 "scenario_data/load_profiles/{}".format(filename))
+        # Times are parsed from H:M:S format, or otherwise taken from the row index in hourly increments
+        return load_timeseries(load_data, value_column=1, time_format=TIME_HMS)
         
     ##
     # Set device's desired power level, and use modulate_power() to send a request
@@ -0,0 +1,198 @@
+########################################################################################################################
+# *** Copyright Notice ***
+#
+# "Price Based Local Power Distribution Management System (Local Power Distribution Manager) v2.0"
+# Copyright (c) 2017, The Regents of the University of California, through Lawrence Berkeley National Laboratory
+# (subject to receipt of any required approvals from the U.S. Dept. of Energy).  All rights reserved.
+#
+# If you have questions about your rights to use or distribute this software, please contact
+# Berkeley Lab's Innovation & Partnerships Office at  IPO@lbl.gov.
+########################################################################################################################
+
+"""
+The market book of a grid controller: the latest prices of its neighbors, the requests made to and by it, the
+allocations made to and by it and its loads with each neighbor. Every change goes through the book, which keeps the
+neighbors in order of price and running totals of what the price logics and request responses need, so that these no
+longer scan every neighbor (which matters for hub grid controllers with hundreds of neighbors).
+
+Neighbors of equal price are kept in the order their first price arrived, as sorting the prices by value would. The
+running totals are kept exactly (as non-overlapping partial sums), so they never drift from summing the values afresh
+however many changes they go through.
+"""
+
+import math
+from bisect import bisect_left, insort
+
+
+class MarketBook:
+
+    def __init__(self):
+        self.prices = {}  # neighbor id -> latest price
+        self.requested = {}  # neighbor id -> request, negative if made to this grid controller
+        self.allocated = {}  # neighbor id -> allocation, positive if made to this grid controller
+        self.loads = {}  # neighbor id -> load, positive if receiving power from the neighbor
+        self._arrival = {}  # neighbor id -> the order its first price arrived in
+        self._by_price = []  # (price, arrival, neighbor id) of every neighbor with a price, in order
+        self._allocated_in_by_price = []  # the same, of the neighbors which allocated to this grid controller
+        self._requested_out = ExactSum()  # the total requested of this grid controller
+        self._assets = ExactSum()  # the total allocated to this grid controller but not yet taken
+        self._liabilities = ExactSum()  # the total allocated by this grid controller but not yet provided
+        self._load_in = ExactSum()  # the total power received from neighbors with a price of zero or more
+        self._load_in_cost = ExactSum()  # the total of price times power received of those neighbors
+        self._contributions = {}  # neighbor id -> its (requested out, assets, liabilities, load in, load in cost)
+
+    ##
+    # Builds a market book from dictionaries of neighbor prices, requests, allocations and loads.
+    @classmethod
+    def from_dicts(cls, prices=None, requested=None, allocated=None, loads=None):
+        book = cls()
+        for neighbor_id, price in (prices or {}).items():
+            book.set_price(neighbor_id, price)
+        for neighbor_id, request in (requested or {}).items():
+            book.set_requested(neighbor_id, request)
+        for neighbor_id, allocation in (allocated or {}).items():
+            book.set_allocated(neighbor_id, allocation)
+        for neighbor_id, load in (loads or {}).items():
+            book.set_load(neighbor_id, load)
+        return book
+
+    ##
+    # Records the latest price of a neighbor.
+    def set_price(self, neighbor_id, price):
+        old_price = self.prices.get(neighbor_id)
+        if old_price is None:
+            self._arrival[neighbor_id] = len(self._arrival)
+        else:
+            old_entry = (old_price, self._arrival[neighbor_id], neighbor_id)
+            _remove(self._by_price, old_entry)
+            if self.allocated.get(neighbor_id, -1) > 0:
+                _remove(self._allocated_in_by_price, old_entry)
+        self.prices[neighbor_id] = price
+        entry = (price, self._arrival[neighbor_id], neighbor_id)
+        insort(self._by_price, entry)
+        if self.allocated.get(neighbor_id, -1) > 0:
+            insort(self._allocated_in_by_price, entry)
+        self._update_contributions(neighbor_id)
+
+    ##
+    # Records a request to (negative) or by (positive) this grid controller.
+    def set_requested(self, neighbor_id, request):
+        self.requested[neighbor_id] = request
+        self._update_contributions(neighbor_id)
+
+    ##
+    # Records an allocation to (positive) or by (negative) this grid controller.
+    def set_allocated(self, neighbor_id, allocation):
+        was_allocated_in = self.allocated.get(neighbor_id, -1) > 0
+        self.allocated[neighbor_id] = allocation
+        if neighbor_id in self.prices and was_allocated_in != (allocation > 0):
+            entry = (self.prices[neighbor_id], self._arrival[neighbor_id], neighbor_id)
+            if was_allocated_in:
+                _remove(self._allocated_in_by_price, entry)
+            else:
+                insort(self._allocated_in_by_price, entry)
+        self._update_contributions(neighbor_id)
+
+    ##
+    # Records the load with a neighbor, positive if receiving power from it.
+    def set_load(self, neighbor_id, load):
+        self.loads[neighbor_id] = load
+        self._update_contributions(neighbor_id)
+
+    def _update_contributions(self, neighbor_id):
+        request = self.requested.get(neighbor_id, 0)
+        allocation = self.allocated.get(neighbor_id, 0)
+        load = self.loads.get(neighbor_id, 0)
+        price = self.prices.get(neighbor_id, 0)
+        receiving = load > 0 and price >= 0
+        new = (-request if request < 0 else 0,
+               max(allocation - load, 0) if allocation > 0 else 0,
+               -min(allocation - load, 0) if allocation < 0 else 0,
+               load if receiving else 0,
+               price * load if receiving else 0)
+        old = self._contributions.get(neighbor_id, (0, 0, 0, 0, 0))
+        for total, old_value, new_value in zip((self._requested_out, self._assets, self._liabilities, self._load_in,
+                                                self._load_in_cost), old, new):
+            if old_value != new_value:
+                total.add(-old_value)
+                total.add(new_value)
+        self._contributions[neighbor_id] = new
+
+    ##
+    # Returns the (price, neighbor id) of the neighbors in order of price, the cheapest first.
+    def by_price(self):
+        return ((price, neighbor_id) for price, arrival, neighbor_id in self._by_price)
+
+    ##
+    # Returns the price of the cheapest neighbor.
+    # @raise IndexError if no neighbor has a price yet
+    def get_cheapest_price(self):
+        return self._by_price[0][0]
+
+    ##
+    # Returns the (price, neighbor id) of the neighbors which allocated to this grid controller, in order of price, the
+    # cheapest first.
+    def allocated_in_by_price(self):
+        return ((price, neighbor_id) for price, arrival, neighbor_id in self._allocated_in_by_price)
+
+    ##
+    # Returns the price of the cheapest neighbor which allocated to this grid controller, or None if there is none.
+    def get_cheapest_allocated_in_price(self):
+        return self._allocated_in_by_price[0][0] if self._allocated_in_by_price else None
+
+    ##
+    # Returns the total requested of this grid controller, as a positive value.
+    def get_requested_out(self):
+        return self._requested_out.value()
+
+    ##
+    # Returns the total allocated to this grid controller which it is not yet taking.
+    def get_allocate_assets(self):
+        return self._assets.value()
+
+    ##
+    # Returns the total allocated by this grid controller which it is not yet providing.
+    def get_allocate_liabilities(self):
+        return self._liabilities.value()
+
+    ##
+    # Returns the total power received from neighbors whose price is zero or more, and the total of their prices times
+    # that power.
+    def get_load_in(self):
+        return self._load_in.value(), self._load_in_cost.value()
+
+
+##
+# A running total of floating point values, held exactly as a list of non-overlapping partial sums (see Shewchuk's
+# "Adaptive Precision Floating-Point Arithmetic"), so that adding and taking away values never accumulates rounding
+# errors. Its value is the total correctly rounded.
+
+class ExactSum:
+
+    def __init__(self):
+        self._partials = []
+
+    ##
+    # Adds a value to the total.
+    def add(self, value):
+        partials = self._partials
+        num_kept = 0
+        for partial in partials:
+            if abs(value) < abs(partial):
+                value, partial = partial, value
+            high = value + partial
+            low = partial - (high - value)
+            if low:
+                partials[num_kept] = low
+                num_kept += 1
+            value = high
+        partials[num_kept:] = [value] if value else []
+
+    ##
+    # Returns the total.
+    def value(self):
+        return math.fsum(self._partials) if self._partials else 0
+
+
+def _remove(entries, entry):
+    del entries[bisect_left(entries, entry)]
@@ -141,18 +141,16 @@ class NotebookPersonalComputer(Eud):
         else:
             self._power_consumption_ratio = received_power / self._max_operating_power
 
-        self._logger.info(self.build_log_notation(
-            message="power consumption ratio changed to {}".format(
-                                self._power_consumption_ratio),
+        self.log_notation(
+            "power consumption ratio changed to {}", self._power_consumption_ratio,
             tag="power consumption ratio",
             value=self._power_consumption_ratio
-        ))
-        self._logger.info(self.build_log_notation(
-            message="internal battery state of charge changed to {}".format(
-                                self._internal_battery.state_of_charge),
+        )
+        self.log_notation(
+            "internal battery state of charge changed to {}", self._internal_battery.state_of_charge,
             tag="internal battery state of charge",
             value=self._internal_battery.state_of_charge
-        ))
+        )
 
     """The notebook personal computer does not keep track of a dynamic internal state for now.
     """
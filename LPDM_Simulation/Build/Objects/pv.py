@@ -12,12 +12,14 @@
 
 from Build.Simulation_Operation.message import Message, MessageType
 from Build.Simulation_Operation.support import SECONDS_IN_DAY
-from Build.Simulation_Operation.event import Event
-from Build.Objects.device import Device
+from Build.Simulation_Operation.recurring_event import profile_occurrences, single_occurrences
+from Build.Objects.device import Device, ROLE_PV
 
 
 class PV(Device):
 
+    neighbor_roles = (ROLE_PV,)
+
     def __init__(self, device_id, supervisor, power_profile, peak_power, time=0, msg_latency=0,
                  schedule=None, connected_devices=None, total_runtime=SECONDS_IN_DAY):
 
@@ -27,27 +29,22 @@ class PV(Device):
 
     ##
     # Sets up the power generation schedule for this PV. Takes input of a daily power generation schedule.
-    # @param power_profile list of (time, power_proportion) pairs for the PV profile
+    # @param power_profile a tuple of arrays of the times (seconds) and power proportions of the PV profile, as
+    # returned by timeseries.load_timeseries
     # @param peak_power peak power generated from PV unit, i.e. solar capacity
     # @param total_runtime total number of days to run PV unit (usually simulation duration) 
     def setup_power_schedule(self, power_profile, peak_power, total_runtime):
+        times, power_proportions = power_profile
         # Check if power level list spans multiple days, or is single day repeat
-        multiday_input = False
-        for time, power_proportion in power_profile:
-            if time > 86400:
-                multiday_input = True
-                break
+        multiday_input = bool((times > SECONDS_IN_DAY).any())
+        action = self.update_power_status  # one bound method for every entry, pickled once in a checkpoint
+        profile = [(time, action, (peak_power, power_proportion))
+                   for time, power_proportion in zip(times.tolist(), power_proportions.tolist())]
         if multiday_input: # multiple day power level list (i.e. PVWatts)
-            for time, power_proportion in power_profile:
-                power_event = Event(self.update_power_status, peak_power, power_proportion)
-                self.add_event(power_event, time)
+            self.add_recurring_event(single_occurrences(profile))
         else: # single day repeated power level list
             curr_day = int(self._time / SECONDS_IN_DAY)  # Current day in seconds
-            while curr_day < total_runtime:
-                for time, power_proportion in power_profile:
-                    power_event = Event(self.update_power_status, peak_power, power_proportion)
-                    self.add_event(power_event, time + curr_day)
-                curr_day += SECONDS_IN_DAY
+            self.add_recurring_event(profile_occurrences(profile, curr_day, total_runtime))
 
 
     ##
@@ -80,9 +77,9 @@ class PV(Device):
             else:
                 # power_amt is zero so no wire loss
                 self.update_wire_loss_out(target_id, 0)
-        self._logger.info(self.build_log_notation(message="POWER to {}".format(target_id),
-                                                  tag="power_out", value=power_amt))
-        target.receive_message(Message(self._time, self._device_id, MessageType.POWER, power_amt))
+        self.log_notation("POWER to {}", target_id,
+                          tag="power_out", value=power_amt)
+        target.receive_message(Message.acquire(self._time, self._device_id, MessageType.POWER, power_amt))
 
 
     ##
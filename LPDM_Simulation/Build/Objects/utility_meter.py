@@ -18,13 +18,15 @@ nor does it try to modify or optimize its own state, it simply acts as an unlimi
 
 from Build.Simulation_Operation.message import Message, MessageType
 
-from Build.Objects.device import Device, SECONDS_IN_DAY
+from Build.Objects.device import Device, SECONDS_IN_DAY, ROLE_GRID_EQUIPMENT, ROLE_UTILITY_METER
 from Build.Objects.grid_equipment import GridEquipment
-from Build.Simulation_Operation.event import Event
+from Build.Simulation_Operation.recurring_event import profile_occurrences, single_occurrences
 
 
 class UtilityMeter(GridEquipment):
 
+    neighbor_roles = (ROLE_GRID_EQUIPMENT, ROLE_UTILITY_METER)
+
     def __init__(self, device_id, supervisor, msg_latency=0, schedule=None, runtime=SECONDS_IN_DAY, multiday=0,
                  sell_price_schedule=None, sell_price_multiday=0, buy_price_schedule=None,
                  buy_price_multiday=0, connected_devices=None):
@@ -43,13 +45,13 @@ class UtilityMeter(GridEquipment):
     # Turn the utility meter on so that it can provide and receive power.
     def turn_on(self):
         self._in_operation = True
-        self._logger.info(self.build_log_notation("Turning on utility meter", "turn_on", 1))
+        self.log_notation("Turning on utility meter", tag="turn_on", value=1)
 
     ##
     # Turn the utility meter off so that it can no longer provide and receive power.
     def turn_off(self):
         self._in_operation = False
-        self._logger.info(self.build_log_notation("Turning off utility meter", "turn_off", 0))
+        self.log_notation("Turning off utility meter", tag="turn_off", value=0)
 
     ##
     # Change the sell price for this utility meter
@@ -57,7 +59,7 @@ class UtilityMeter(GridEquipment):
     def set_sell_price(self, sell_price):
         prev_sell_price = self._sell_price
         self._sell_price = sell_price
-        self._logger.info(self.build_log_notation("set sell price", "set sell price", sell_price))
+        self.log_notation("set sell price", tag="set sell price", value=sell_price)
         if self._sell_price != prev_sell_price:
             self.broadcast_price_levels(sell_price=self._sell_price, buy_price=self._buy_price)
 
@@ -67,7 +69,7 @@ class UtilityMeter(GridEquipment):
     def set_buy_price(self, buy_price):
         prev_buy_price = self._buy_price
         self._buy_price = buy_price
-        self._logger.info(self.build_log_notation("set buy price", "set buy price", buy_price))
+        self.log_notation("set buy price", tag="set buy price", value=buy_price)
         if self._buy_price != prev_buy_price:
             self.broadcast_price_levels(sell_price=self._sell_price, buy_price=self._buy_price)
 
@@ -81,39 +83,28 @@ class UtilityMeter(GridEquipment):
 
         #  Setup sell price schedule events
         if sell_price_schedule:
-            curr_day = 0
-            if sell_price_multiday:
-                while curr_day < runtime:
-                    for hour, sell_price in sell_price_schedule:
-                        if hour > (sell_price_multiday * 24):
-                            break
-                        price_event = Event(self.set_sell_price, sell_price)
-                        time_sec = (int(hour) * 3600) + curr_day
-                        self.add_event(price_event, time_sec)
-                    curr_day += sell_price_multiday * SECONDS_IN_DAY
-            else:
-                for hour, sell_price in sell_price_schedule:
-                    price_event = Event(self.set_sell_price, sell_price)
-                    time_sec = int(hour) * 3600
-                    self.add_event(price_event, time_sec)
+            self.setup_price_schedule(self.set_sell_price, sell_price_schedule, sell_price_multiday, runtime)
 
         # Set up buy price schedule events
         if buy_price_schedule:
-            curr_day = 0
-            if buy_price_multiday:
-                while curr_day < runtime:
-                    for hour, buy_price in buy_price_schedule:
-                        if hour > (buy_price_multiday * 24):
-                            break
-                        price_event = Event(self.set_buy_price, buy_price)
-                        time_sec = (int(hour) * 3600) + curr_day
-                        self.add_event(price_event, time_sec)
-                    curr_day += buy_price_multiday * SECONDS_IN_DAY
-            else:
-                for hour, buy_price in buy_price_schedule:
-                    price_event = Event(self.set_buy_price, buy_price)
-                    time_sec = int(hour) * 3600
-                    self.add_event(price_event, time_sec)
+            self.setup_price_schedule(self.set_buy_price, buy_price_schedule, buy_price_multiday, runtime)
+
+    ##
+    # Adds the events for a single price schedule of this utility
+    # @param set_price the function setting the price, called at each scheduled time with the new price
+    # @param price_schedule the list of hour, price tuples
+    # @param multiday how many days of the scheduling to set as a repeating (0 to not repeat)
+    # @param runtime the total runtime of the simulation
+    def setup_price_schedule(self, set_price, price_schedule, multiday, runtime):
+        profile = []  # list of (time in seconds, function, arguments) for each price change
+        for hour, price in price_schedule:
+            if multiday and hour > (multiday * 24):
+                break
+            profile.append((int(hour) * 3600, set_price, (price,)))
+        if multiday:
+            self.add_recurring_event(profile_occurrences(profile, 0, runtime, period=multiday * SECONDS_IN_DAY))
+        else:
+            self.add_recurring_event(single_occurrences(profile))
 
     # __________________________________ Messaging Functions _______________________ #
 
@@ -124,12 +115,11 @@ class UtilityMeter(GridEquipment):
     # @param new_power the new power from the sender's perspective
 
     def process_power_message(self, message):
-        self._logger.info(
-            self.build_log_notation(
-                message="POWER message from {}".format(message.sender_id),
-                tag="power_msg_in",
-                value=message.value
-        ))
+        self.log_notation(
+            "POWER message from {}", message.sender_id,
+            tag="power_msg_in",
+            value=message.value
+        )
         prev_power = self._loads[message.sender_id] if message.sender_id in self._loads.keys() else 0
         if self._in_operation:
             self._loads[message.sender_id] = -message.value
@@ -181,10 +171,10 @@ class UtilityMeter(GridEquipment):
             target = self._connected_devices[target_id]
         else:
             raise ValueError("This Utility Meter is connected to no such device")
-        self._logger.info(self.build_log_notation(message="power msg to {}".format(target_id),
-                                                  tag="power message", value=power_amt))
+        self.log_notation("power msg to {}", target_id,
+                          tag="power message", value=power_amt)
 
-        target.receive_message(Message(self._time, self._device_id, MessageType.POWER, power_amt))
+        target.receive_message(Message.acquire(self._time, self._device_id, MessageType.POWER, power_amt))
     ##
     # This utility meter informs another device of both its current buy price and its current sell price.
     # The buy price information is contained in the message's extra_info field.
@@ -195,11 +185,11 @@ class UtilityMeter(GridEquipment):
         else:
             raise ValueError("This Utility Meter is connected to no such device")
 
-        self._logger.info(self.build_log_notation(message="price msg to {}".format(target_id),
-                                                  tag="price message",
-                                                  value="sell {}, buy {}".format(sell_price, buy_price)))
+        self.log_notation("price msg to {}", target_id,
+                          tag="price message",
+                          value="sell {}, buy {}".format(sell_price, buy_price))
 
-        target.receive_message(Message(self._time, self._device_id, MessageType.PRICE,
+        target.receive_message(Message.acquire(self._time, self._device_id, MessageType.PRICE,
                                        value=sell_price, extra_info=buy_price))
 
     ##
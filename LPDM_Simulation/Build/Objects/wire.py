@@ -5,6 +5,9 @@
     # def __init__(self, length_m, voltage):
     #     self.length_m = length_m 
     #     self.voltage = voltage
+import numpy as np
+
+
 class Wire():
     def __init__(self, voltage, resistance, length, gauge, current_type):
         self.voltage = voltage
@@ -84,3 +87,12 @@ class Wire():
     # @abc.abstractmethod
     # def current_type(self):
     #     pass
+
+
+def calculate_wire_losses(voltages, resistances, wire_powers):
+    """Calculate the power lost on many wires at once, given each wire's voltage and resistance and the power it
+    carries. The arithmetic is that of Wire.calculate_power, so the results are the same to the last digit. As in
+    Device.calculate_wire_loss, power flowing in the negative direction has no loss."""
+    wire_powers = np.asarray(wire_powers, dtype=np.float64)
+    wire_currents = wire_powers / np.asarray(voltages, dtype=np.float64)
+    return np.where(wire_powers < 0, 0.0, wire_currents * wire_currents * np.asarray(resistances, dtype=np.float64))
@@ -0,0 +1,233 @@
+########################################################################################################################
+# *** Copyright Notice ***
+#
+# "Price Based Local Power Distribution Management System (Local Power Distribution Manager) v2.0"
+# Copyright (c) 2017, The Regents of the University of California, through Lawrence Berkeley National Laboratory
+# (subject to receipt of any required approvals from the U.S. Dept. of Energy).  All rights reserved.
+#
+# If you have questions about your rights to use or distribute this software, please contact
+# Berkeley Lab's Innovation & Partnerships Office at  IPO@lbl.gov.
+########################################################################################################################
+
+"""
+Runs what-if variants of a scenario which only differ after a branch time. The shared prefix up to the branch time is
+simulated once; the process then forks a child per variant (copy-on-write, so the devices are not copied until a
+child changes them). Each child applies its own override arguments to the live devices, finishes the run, logs to its
+own simulation_N folder and sends its SimulationResult back to the parent.
+
+Overrides use the same 'devices.<id>.<param>=value' keys as main.py, but only parameters which can change part way
+through a run are accepted: message_latency of any device; threshold_alloc and price_announce_threshold of a grid
+controller; capacity, max_charge_rate, max_discharge_rate and starting_soc (taken as the state of charge at the branch)
+of its battery, as 'devices.<gc_id>.<battery_id>.<param>'; and the constructor parameters of an EUD.
+
+Requires os.fork, so runs on POSIX systems only.
+"""
+
+import logging
+import os
+import pickle
+import sys
+import time
+import traceback
+
+from Build.Objects.eud import Eud
+from Build.Objects.grid_controller import GridController
+from Build.Simulation_Operation.simulation import SimulationSetup
+from Build.Simulation_Operation.supervisor import Supervisor
+
+# battery override parameters to the battery attributes they set
+BATTERY_PARAMETERS = {"capacity": "_capacity", "max_charge_rate": "_max_charge_rate",
+                      "max_discharge_rate": "_max_discharge_rate", "starting_soc": "_current_soc"}
+
+
+class BranchedSimulationResult:
+
+    ##
+    # @param branch_time the simulation time at which the variants branched off the shared prefix
+    # @param results a list of the SimulationResult of each variant, in the order of the override sets
+    # @param prefix_time the wall-clock time of setting up and simulating the shared prefix, in seconds
+    # @param branch_times a list of the processor time of each variant after the branch, in seconds. This is what each
+    # would take on its own, however many variants shared the processors.
+    # @param wall_time the wall-clock time of the whole branched run, in seconds
+
+    def __init__(self, branch_time, results, prefix_time, branch_times, wall_time):
+        self.branch_time = branch_time
+        self.results = results
+        self.prefix_time = prefix_time
+        self.branch_times = branch_times
+        self.wall_time = wall_time
+
+    ##
+    # Returns an estimate of the wall-clock time of running every variant from the start one after another: the
+    # prefix once per variant, plus each variant's time after the branch.
+    def serial_time(self):
+        return self.prefix_time * len(self.results) + sum(self.branch_times)
+
+    ##
+    # Returns the wall-clock time saved over running every variant from the start one after another, in seconds.
+    def time_saved(self):
+        return self.serial_time() - self.wall_time
+
+    def __repr__(self):
+        return "BranchedSimulationResult(branch_time={}, branches={}, time_saved={:.3f})".format(
+            self.branch_time, len(self.results), self.time_saved())
+
+
+##
+# Checks a set of override arguments against the live devices of a simulation and returns the changes they make.
+# Nothing is changed until the returned functions are called, so every set can be checked before any branch starts.
+# @param sim the SimulationSetup of the running simulation
+# @param override_args a list of 'devices.<id>.<param>=value' override arguments
+# @return a list of functions, each applying one override
+# @raise ValueError if an override names an unknown device or a parameter which cannot change part way through a run
+
+def resolve_overrides(sim, override_args):
+    changes = []
+    for key, value in sim.parse_inputs_to_dict(override_args).items():
+        parts = key.split('.')
+        if len(parts) not in (3, 4) or parts[0] != 'devices':
+            raise ValueError("Override {} cannot be applied part way through a simulation".format(key))
+        device = sim.supervisor.get_device(parts[1])
+        change = None
+        if len(parts) == 4:
+            battery = device.get_battery() if isinstance(device, GridController) else None
+            if battery is not None and battery.get_id() == parts[2] and parts[3] in BATTERY_PARAMETERS:
+                change = _battery_change(device, battery, parts[3], float(value))
+        elif parts[2] == 'message_latency':
+            change = _attribute_change(device, '_msg_latency', int(value))
+        elif isinstance(device, GridController) and parts[2] == 'threshold_alloc':
+            change = _attribute_change(device, '_minimum_allocate',
+                                       float(value) * device.get_battery().get_max_discharge_rate())
+        elif isinstance(device, GridController) and parts[2] == 'price_announce_threshold':
+            change = _attribute_change(device._price_logic, '_price_announce_threshold', float(value))
+        elif isinstance(device, Eud) and parts[2] in _eud_parameters(sim, device):
+            change = _attribute_change(device, '_{}'.format(parts[2]), float(value))
+        if change is None:
+            raise ValueError("Override {} cannot be applied part way through a simulation".format(key))
+        changes.append(change)
+    return changes
+
+
+def _attribute_change(obj, attribute, value):
+    return lambda: setattr(obj, attribute, value)
+
+
+def _battery_change(gc, battery, param, value):
+    def change():
+        if param == "max_discharge_rate" and battery.get_max_discharge_rate():
+            # keep the grid controller's minimum allocation the same fraction of the discharge rate
+            gc._minimum_allocate *= value / battery.get_max_discharge_rate()
+        setattr(battery, BATTERY_PARAMETERS[param], value)
+        # the simulation never sets preferred rates, so they follow the maximum rates (see Battery)
+        if param == "max_charge_rate":
+            battery._preferred_charge_rate = value
+        elif param == "max_discharge_rate":
+            battery._preferred_discharge_rate = value
+    return change
+
+
+def _eud_parameters(sim, eud):
+    for eud_info in sim.eud_dictionary.values():
+        if eud_info[0] is type(eud):
+            return [param for param in eud_info[1:] if hasattr(eud, '_{}'.format(param))]
+    return []
+
+
+def _process_events(supervisor, end_time, include_end_time):
+    while supervisor.has_next_event():
+        device_id, time_stamp = supervisor.peek_next_event()
+        if time_stamp > end_time or (time_stamp == end_time and not include_end_time):
+            break
+        supervisor.occur_next_event()
+
+
+##
+# Finishes one variant in a forked child: applies its overrides, logs to a new simulation folder, runs to the end and
+# writes its result, and its processor time since the branch, to the parent through a pipe.
+
+def _run_branch(sim, config_file, override_args, changes, branch_time, write_fd):
+    start = time.process_time()
+    logger = logging.getLogger("lpdm")
+    for handler in list(logger.handlers):  # these write to the parent's log, which the parent closes
+        logger.removeHandler(handler)
+    param_dict = sim.read_config_file(sim.config_file_path(config_file))
+    sim.setup_logging(config_filename=config_file, config=param_dict, override_args=override_args)
+    logger.info("Branched from the shared run at time (s): {}".format(branch_time))
+    for change in changes:
+        change()
+    _process_events(sim.supervisor, sim.end_time, include_end_time=True)
+    result = sim.supervisor.finish_all(sim.end_time)
+    for handler in logger.handlers:
+        handler.flush()
+    with os.fdopen(write_fd, 'wb') as pipe:
+        pickle.dump((result, time.process_time() - start), pipe, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+##
+# Simulates a scenario up to a branch time once, then forks a child process per variant to finish the run with the
+# variant's overrides applied at the branch time, all in parallel. The shared prefix is logged to its own simulation
+# folder, ending with a summary of the time saved, and each variant to another.
+# @param config_file the configuration json of the scenario
+# @param override_args the override arguments shared by every variant, applied from the start
+# @param branch_time the simulation time at which the variants diverge. Events before it are shared.
+# @param branch_override_sets a list of override sets, each a list of 'devices.<id>.<param>=value' override arguments
+# applied at the branch time (see resolve_overrides)
+# @param event_calendar whether to run the simulation on the single event calendar
+# @param message_policy whether to fold superseded and duplicate PRICE and POWER messages on each link
+# @return a BranchedSimulationResult with the SimulationResult of each variant and the timings of the run
+# @raise RuntimeError if a variant fails
+
+def run_branched_simulation(config_file, override_args, branch_time, branch_override_sets, event_calendar=False,
+                            message_policy=False):
+    start = time.perf_counter()
+    sim = SimulationSetup(supervisor=Supervisor(event_calendar=event_calendar, message_policy=message_policy))
+    sim.setup_simulation(config_file, override_args)
+    _process_events(sim.supervisor, min(branch_time, sim.end_time), include_end_time=False)
+    branch_changes = [resolve_overrides(sim, branch_overrides) for branch_overrides in branch_override_sets]
+    prefix_time = time.perf_counter() - start
+
+    logger = logging.getLogger("lpdm")
+    for handler in logger.handlers:
+        handler.flush()  # or the children would write out the parent's buffered records too
+    sys.stdout.flush()
+    children = []
+    for branch_overrides, changes in zip(branch_override_sets, branch_changes):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            exit_code = 1
+            try:
+                _run_branch(sim, config_file, override_args + branch_overrides, changes, branch_time, write_fd)
+                exit_code = 0
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                os._exit(exit_code)  # never return into the parent's code
+        os.close(write_fd)
+        children.append((pid, read_fd))
+
+    results = []
+    branch_times = []
+    failures = []
+    for index, (pid, read_fd) in enumerate(children):
+        with os.fdopen(read_fd, 'rb') as pipe:
+            data = pipe.read()
+        os.waitpid(pid, 0)
+        if data:
+            result, elapsed = pickle.loads(data)
+        else:
+            result, elapsed = None, 0.0
+            failures.append(index)
+        results.append(result)
+        branch_times.append(elapsed)
+    if failures:
+        raise RuntimeError("Branches {} of the simulation failed".format(failures))
+
+    branched = BranchedSimulationResult(branch_time, results, prefix_time, branch_times, time.perf_counter() - start)
+    logger.info("Branches: {} from time (s) {}, shared prefix {:.3f} s, total {:.3f} s, from the start one after "
+                "another {:.3f} s, saved {:.3f} s".format(len(results), branch_time, prefix_time, branched.wall_time,
+                                                           branched.serial_time(), branched.time_saved()))
+    for handler in logger.handlers:
+        handler.flush()
+    return branched
@@ -0,0 +1,64 @@
+########################################################################################################################
+# *** Copyright Notice ***
+#
+# "Price Based Local Power Distribution Management System (Local Power Distribution Manager) v2.0"
+# Copyright (c) 2017, The Regents of the University of California, through Lawrence Berkeley National Laboratory
+# (subject to receipt of any required approvals from the U.S. Dept. of Energy).  All rights reserved.
+#
+# If you have questions about your rights to use or distribute this software, please contact
+# Berkeley Lab's Innovation & Partnerships Office at  IPO@lbl.gov.
+########################################################################################################################
+
+"""
+Checkpoints of a running simulation, from which it can be resumed.
+
+A checkpoint is the supervisor pickled together with everything reachable from it: every device with its event queue,
+time, power and loss accumulators, loads, allocations, battery and price logic, the supervisor's queue of devices (or
+the event calendar) and the message delivery policy. Pending events pickle their bound methods by reference to the
+device, and recurring events keep their position in their series in plain attributes, so only the live state is
+written, however many events have been processed.
+
+The log handlers are not part of a checkpoint: devices log through the "lpdm" logger by name, so a resumed simulation
+logs to the handlers set up for it.
+"""
+
+import os
+import pickle
+
+# The format of checkpoints. Version 2 changed the pickled supervisor state: it keeps running tick counters in place
+# of a list of every tick (see Supervisor.get_tick_stats), so version 1 checkpoints cannot be resumed. Version 3
+# changed the pickled device state: devices keep the voltage and resistance of each wire in place of a loss coefficient.
+# Version 4 added the grid controller role to the neighbors each device indexes by role.
+CHECKPOINT_VERSION = 4
+
+
+##
+# Writes a checkpoint of a simulation. The file is replaced atomically, so a crash while writing leaves the previous
+# checkpoint in place.
+# @param filename the path of the checkpoint file
+# @param supervisor the supervisor of the simulation
+# @param time the simulation time of the checkpoint. Every event before this time has been processed, and none after.
+# @param end_time the time the simulation runs until
+
+def save_checkpoint(filename, supervisor, time, end_time):
+    state = {"version": CHECKPOINT_VERSION, "time": time, "end_time": end_time, "supervisor": supervisor}
+    temp_filename = "{}.{}.tmp".format(filename, os.getpid())
+    with open(temp_filename, 'wb') as checkpoint_file:
+        pickle.dump(state, checkpoint_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_filename, filename)
+
+
+##
+# Reads a checkpoint written by save_checkpoint.
+# @param filename the path of the checkpoint file
+# @return a tuple of the supervisor, the time of the checkpoint and the time the simulation runs until
+# @raise ValueError if the checkpoint was written in another format version (see CHECKPOINT_VERSION)
+
+def load_checkpoint(filename):
+    with open(filename, 'rb') as checkpoint_file:
+        state = pickle.load(checkpoint_file)
+    if state.get("version") != CHECKPOINT_VERSION:
+        raise ValueError("Unsupported checkpoint version {} in {}: this simulation reads version {} checkpoints only, "
+                         "so the simulation must be run again to write a new one".format(
+                             state.get("version"), filename, CHECKPOINT_VERSION))
+    return state["supervisor"], state["time"], state["end_time"]
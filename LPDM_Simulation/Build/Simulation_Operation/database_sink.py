@@ -0,0 +1,162 @@
+########################################################################################################################
+# *** Copyright Notice ***
+#
+# "Price Based Local Power Distribution Management System (Local Power Distribution Manager) v2.0"
+# Copyright (c) 2017, The Regents of the University of California, through Lawrence Berkeley National Laboratory
+# (subject to receipt of any required approvals from the U.S. Dept. of Energy).  All rights reserved.
+#
+# If you have questions about your rights to use or distribute this software, please contact
+# Berkeley Lab's Innovation & Partnerships Office at  IPO@lbl.gov.
+########################################################################################################################
+
+"""
+A logging handler which writes the simulation's log records into a local SQLite database, used when log_to_database
+is set in the configuration.
+
+Every simulation run adds a row to the runs table, and each of its records becomes a row of the records table of the
+form (run_id, time, device_id, tag, value, message). Device records (see LogNotation) fill in every column, while
+other records (e.g. the simulation totals) only have a message. Records are indexed on (device_id, tag, time), so a
+series can be queried across all of the runs kept in the same database file.
+
+The simulation thread only converts records to rows and hands them over in batches through a bounded queue. A
+background thread writes each batch with executemany inside a single transaction, on a connection in WAL mode.
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from Build.Simulation_Operation.support import LogNotation
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_name TEXT,
+    config_file TEXT,
+    started TEXT
+);
+CREATE TABLE IF NOT EXISTS records (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    time INTEGER,
+    device_id TEXT,
+    tag TEXT,
+    value,
+    message TEXT
+);
+CREATE INDEX IF NOT EXISTS records_device_tag_time ON records (device_id, tag, time);
+"""
+
+
+class SQLiteLogHandler(logging.Handler):
+
+    DEFAULT_BATCH_SIZE = 1000  # number of records handed to the writer thread at a time
+    DEFAULT_MAX_QUEUED_BATCHES = 64  # batches waiting to be written before the simulation waits for the writer
+
+    ##
+    # Creates the database (if it does not exist yet), registers this run in it, and starts the writer thread.
+    # @param filename the path of the SQLite database file
+    # @param run_name a name to identify this run by, e.g. the name of its log folder
+    # @param config_file the configuration file of this run
+    # @param level the minimum level of records to store
+    # @param batch_size the number of records to write per transaction
+    # @param max_queued_batches the bound on the number of batches waiting for the writer thread
+
+    def __init__(self, filename, run_name=None, config_file=None, level=logging.NOTSET,
+                 batch_size=DEFAULT_BATCH_SIZE, max_queued_batches=DEFAULT_MAX_QUEUED_BATCHES):
+        super().__init__(level)
+        self._batch_size = batch_size
+        self._batch = []  # rows not yet handed to the writer thread
+        self._queue = queue.Queue(maxsize=max_queued_batches)
+        self._error = None  # an exception raised in the writer thread, re-raised on the next flush
+
+        connection = sqlite3.connect(filename)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            with connection:
+                cursor = connection.execute("INSERT INTO runs (run_name, config_file, started) VALUES (?, ?, ?)",
+                                            (run_name, config_file, datetime.now(timezone.utc).isoformat()))
+            self.run_id = cursor.lastrowid
+        finally:
+            connection.close()
+
+        self._writer = threading.Thread(target=self._write_batches, args=(filename,), daemon=True,
+                                        name="lpdm-sqlite-writer")
+        self._writer.start()
+
+    ##
+    # Converts a record to a row and adds it to the current batch, handing the batch over when it is full.
+    # @param record the logging record
+    def emit(self, record):
+        notation = record.msg
+        if isinstance(notation, LogNotation):
+            value = notation.value
+            if value is not None and not isinstance(value, (int, float)):
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    value = str(value)
+            tag = None if notation.tag is None else str(notation.tag)
+            row = (self.run_id, notation.time, str(notation.device_id), tag, value, str(notation.get_message()))
+        else:
+            row = (self.run_id, None, None, None, None, record.getMessage())
+        self._batch.append(row)
+        if len(self._batch) >= self._batch_size:
+            self._queue.put(self._batch)  # waits only if the writer is max_queued_batches behind
+            self._batch = []
+
+    ##
+    # Hands over the current batch and waits until every record so far has been committed to the database.
+    def flush(self):
+        self.acquire()
+        try:
+            if self._writer.is_alive():
+                if self._batch:
+                    self._queue.put(self._batch)
+                    self._batch = []
+                self._queue.join()
+            if self._error is not None:
+                error, self._error = self._error, None
+                raise error
+        finally:
+            self.release()
+
+    ##
+    # Writes out all remaining records and stops the writer thread.
+    def close(self):
+        self.acquire()
+        try:
+            if self._writer.is_alive():
+                if self._batch:
+                    self._queue.put(self._batch)
+                    self._batch = []
+                self._queue.put(None)  # tells the writer to stop
+                self._writer.join()
+        finally:
+            self.release()
+        super().close()
+
+    ##
+    # The writer thread: commits each batch from the queue in its own transaction until told to stop.
+    # @param filename the path of the SQLite database file
+    def _write_batches(self, filename):
+        connection = sqlite3.connect(filename)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent, only the last commits risk a crash
+        try:
+            while True:
+                batch = self._queue.get()
+                try:
+                    if batch is None:
+                        return
+                    with connection:  # one transaction per batch
+                        connection.executemany("INSERT INTO records (run_id, time, device_id, tag, value, message) "
+                                               "VALUES (?, ?, ?, ?, ?, ?)", batch)
+                except sqlite3.Error as error:
+                    self._error = error
+                finally:
+                    self._queue.task_done()
+        finally:
+            connection.close()
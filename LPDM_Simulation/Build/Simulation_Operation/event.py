@@ -12,11 +12,16 @@
 """An event is modelled as a function call with a specified series of arguments,
 which can then be run at any time. Objects which use Events are responsible for
 maintaining knowledge of the specific time at which they want to run the Event.
+
+Events are allocated for every message a device receives, so they are slotted rather than dict-backed, and the
+events which deliver messages are recycled through a free list once they have been run.
 """
 
 
 class Event(object):
 
+    __slots__ = ("_action", "_args")
+
     ##
     # Initialize an event with a function and arguments for that function
     # @param action a state-affecting function to be run in the event (function does not return a value).
@@ -34,3 +39,51 @@ class Event(object):
     def run_event(self):
         self._action(*self._args)
 
+    ##
+    # Returns the function the event calls when run.
+    def get_handler(self):
+        return self._action
+
+
+class MessageEvent(object):
+
+    __slots__ = ("_device", "_message")
+
+    POOL_SIZE = 1024  # the most processed events kept for reuse
+    _free = []
+
+    ##
+    # Returns an event which delivers a message to a device, reusing a previously run one if there is one.
+    # @param device the device to read the message
+    # @param message the message to deliver
+
+    @classmethod
+    def acquire(cls, device, message):
+        event = cls._free.pop() if cls._free else cls()
+        event._device = device
+        event._message = message
+        return event
+
+    ##
+    # Returns the message the event delivers.
+    def get_message(self):
+        return self._message
+
+    ##
+    # Replaces the message the event delivers, e.g. with a newer message superseding it.
+    # @param message the new message to deliver
+    # @return the replaced message
+    def replace_message(self, message):
+        replaced, self._message = self._message, message
+        return replaced
+
+    ##
+    # Delivers the message to the device, then returns the message (see Message.acquire) and this event to their free
+    # lists. Once run, the event must not be run or queued again by whoever queued it.
+
+    def run_event(self):
+        self._device.deliver_message(self)
+        self._message.release()
+        self._device = self._message = None
+        if len(self._free) < self.POOL_SIZE:
+            self._free.append(self)
@@ -0,0 +1,146 @@
+########################################################################################################################
+# *** Copyright Notice ***
+#
+# "Price Based Local Power Distribution Management System (Local Power Distribution Manager) v2.0"
+# Copyright (c) 2017, The Regents of the University of California, through Lawrence Berkeley National Laboratory
+# (subject to receipt of any required approvals from the U.S. Dept. of Energy).  All rights reserved.
+#
+# If you have questions about your rights to use or distribute this software, please contact
+# Berkeley Lab's Innovation & Partnerships Office at  IPO@lbl.gov.
+########################################################################################################################
+
+"""
+A single event calendar holding the pending events of every device in the simulation, as an alternative to each device
+keeping its own priority queue and the supervisor keeping a queue of devices.
+
+The calendar is a heap of the distinct times that have pending events, with a bucket for each time that maps the
+devices with events at that time to a heap of (sequence, event) pairs. Adding an event is a dictionary lookup and a
+push onto a small heap, and the supervisor drains the buckets directly.
+
+Events are processed in exactly the order of the per-device queues: at a given time, devices take their turn in the
+order in which they were last registered with the supervisor (i.e. last had an event added, or last finished
+processing), and a device processes all of its events at that time in the order of its own queue.
+"""
+
+import heapq
+import itertools
+
+
+class EventCalendar:
+
+    def __init__(self):
+        self._times = []  # heap of the distinct times which have a bucket of pending events
+        self._buckets = {}  # time -> {device_id -> heap of (sequence, event)}
+        self._counter = itertools.count()  # source of event sequence numbers and device turn stamps
+        self._stamps = {}  # device_id -> stamp of the last time the device was registered
+        self._pending = {}  # device_id -> number of pending events of the device
+        self._size = 0  # total number of pending events
+        self._current_time = None  # the earliest time with pending events, whose bucket is being drained
+        self._turns = []  # heap of (stamp, device_id) of devices taking a turn at the current time
+
+    ##
+    # Adds an event to the calendar
+    # @param device_id the device the event belongs to
+    # @param event the event to run
+    # @param time_stamp the time to run the event at
+    # @param sequence optional tiebreaker among the device's events at that time (defaults to order of addition)
+
+    def add(self, device_id, event, time_stamp, sequence=None):
+        counter = self._counter
+        if sequence is None:
+            sequence = next(counter)
+        bucket = self._buckets.get(time_stamp)
+        if bucket is None:
+            bucket = self._buckets[time_stamp] = {}
+            heapq.heappush(self._times, time_stamp)
+        device_events = bucket.get(device_id)
+        if device_events is None:
+            device_events = bucket[device_id] = []
+        heapq.heappush(device_events, (sequence, event))
+        self._pending[device_id] = self._pending.get(device_id, 0) + 1
+        self._size += 1
+
+        # Every added event re-registers the device, which moves it to the back of its turn order.
+        stamp = next(counter)
+        self._stamps[device_id] = stamp
+        if self._current_time is not None and device_id in self._buckets.get(self._current_time, ()):
+            heapq.heappush(self._turns, (stamp, device_id))
+
+    ##
+    # Returns the device_id and time of the next device turn without removing it. Raises KeyError if empty.
+    # @return tuple of the device id and the time of its turn
+
+    def peek(self):
+        while True:
+            current_bucket = self._buckets.get(self._current_time)
+            turns = self._turns
+            while turns:
+                stamp, device_id = turns[0]
+                if self._stamps[device_id] == stamp and device_id in current_bucket:
+                    return device_id, self._current_time
+                heapq.heappop(turns)  # stale entry, the device was re-registered or has had its turn
+            if current_bucket is not None:
+                # Every device has had its turn at the current time. Move on to the next time.
+                del self._buckets[self._current_time]
+                heapq.heappop(self._times)
+            if not self._times:
+                self._current_time = None
+                raise KeyError('peek from an empty event calendar')
+            self._current_time = self._times[0]
+            stamps = self._stamps
+            self._turns = [(stamps[device_id], device_id) for device_id in self._buckets[self._current_time]]
+            heapq.heapify(self._turns)
+
+    ##
+    # Runs all of the device's events at the given time, including those added while running. This is the device's
+    # turn at that time, after which it is registered again.
+    # @param device_id the device whose events to run
+    # @param time_stamp the time of the events to run
+    # @return the number of events run
+
+    def run_events(self, device_id, time_stamp, runner=None):
+        bucket = self._buckets.get(time_stamp)
+        device_events = bucket.get(device_id) if bucket is not None else None
+        if device_events is None:
+            return 0
+        num_events = 0
+        # The events stay in the bucket while running, so events added at this time during the turn join it.
+        pending = self._pending
+        while device_events:
+            sequence, event = heapq.heappop(device_events)
+            pending[device_id] -= 1
+            self._size -= 1
+            if runner is None:
+                event.run_event()
+            else:
+                runner(event)
+            num_events += 1
+        del bucket[device_id]
+        self._stamps[device_id] = next(self._counter)
+        return num_events
+
+    ##
+    # Returns whether there are any pending events in the calendar.
+    def is_empty(self):
+        return self._size == 0
+
+    ##
+    # Returns whether the device has any pending events.
+    # @param device_id the device to check
+    def has_events(self, device_id):
+        return self._pending.get(device_id, 0) > 0
+
+    ##
+    # Returns the time of the device's earliest pending event. Raises ValueError if it has none.
+    # This searches through the calendar, so is not meant to be called while running the simulation.
+    # @param device_id the device to check
+    def next_event_time(self, device_id):
+        for time_stamp in sorted(self._buckets):
+            if self._buckets[time_stamp].get(device_id):
+                return time_stamp
+        raise ValueError("No upcoming events for this device")
+
+    ##
+    # Returns the total number of pending events in the calendar.
+    def size(self):
+        return self._size
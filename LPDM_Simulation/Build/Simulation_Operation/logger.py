@@ -27,7 +27,8 @@ establishes the streams to the console and file, sets the output text format, an
 class SimulationLogger:
 
     def __init__(self, console_log_level=logging.INFO, file_log_level=logging.DEBUG,
-                 database_log_level=logging.DEBUG, log_to_database=False):
+                 database_log_level=logging.DEBUG, log_to_database=False, results_log_level=logging.DEBUG,
+                 log_to_results=False, database_filename=None):
         self.app_name = "lpdm"
         self.base_path = os.path.join(
                          os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))), "logs")
@@ -36,8 +37,12 @@ class SimulationLogger:
         self.logger = None
         self.console_log_level = console_log_level  # Level of information to include in the console stream
         self.file_log_level = file_log_level  # Level of information to include in the local file stream
-        self.database_log_level = database_log_level  # Level of information to include in the postgres database stream
-        self.log_to_database = log_to_database  # Whether to log to remote postgres database
+        self.database_log_level = database_log_level  # Level of information to include in the database stream
+        self.log_to_database = log_to_database  # Whether to log to the local SQLite database (see database_sink.py)
+        # The SQLite database file to log to, shared by all runs. Defaults to lpdm_results.sqlite in the logs folder.
+        self.database_filename = database_filename
+        self.results_log_level = results_log_level  # Level of information to include in the columnar results
+        self.log_to_results = log_to_results  # Whether to also write columnar binary results (see results_sink.py)
 
     ##
     # Creates a unique folder for this simulation log, and then sets up the streams
@@ -74,9 +79,15 @@ class SimulationLogger:
             return os.path.join(self.base_path, "simulation_{}".format(self.log_id))
 
     ##
-    # Makes the folder for the simulation log
+    # Makes the folder for the simulation log. If another simulation running at the same time has just taken this
+    # log ID, moves on to the next free one, so concurrent simulations never share a folder.
     def create_simulation_log_folder(self):
-        os.mkdir(self.simulation_log_path())
+        while True:
+            try:
+                os.mkdir(self.simulation_log_path())
+                return
+            except FileExistsError:
+                self.log_id += 1
 
     ##
     # A custom logging formatter which for the first time it is called, prepends a header to the file,
@@ -93,6 +104,15 @@ class SimulationLogger:
             self.format = super().format
             return self.header + "\n" + self.format(record)
 
+    ##
+    # Returns the numeric value of a logging level given either as a number or a level name such as "INFO"
+    # @param level the logging level
+    @staticmethod
+    def level_number(level):
+        if isinstance(level, int):
+            return level
+        return logging.getLevelName(str(level).upper())
+
     ##
     # Creates the simulation logger by
     # @param config_file the name of configuration file, to be included in the top of the simulation description.
@@ -101,7 +121,14 @@ class SimulationLogger:
     def create_simulation_logger(self, config_file, override_args=None):
 
         self.logger = logging.getLogger(self.app_name)
-        self.logger.setLevel(logging.DEBUG)  # Set debug as minimum logging level. Debug and higher can be logged.
+        # Set the minimum logging level to the lowest level any handler will emit, so that devices can tell once
+        # whether their records would be dropped anyway (see Device.log_notation).
+        handler_levels = [self.console_log_level, self.file_log_level]
+        if self.log_to_database:
+            handler_levels.append(self.database_log_level)
+        if self.log_to_results:
+            handler_levels.append(self.results_log_level)
+        self.logger.setLevel(min(self.level_number(level) for level in handler_levels))
 
         # Create the header to include at the top of the file
         if override_args:
@@ -129,6 +156,20 @@ class SimulationLogger:
         self.logger.addHandler(ch)
         self.logger.addHandler(fh)
 
+        if self.log_to_results:
+            # NumPy is only needed for the columnar results, so only import it when they are written.
+            from Build.Simulation_Operation.results_sink import ColumnarResultsHandler
+            rh = ColumnarResultsHandler(os.path.join(self.simulation_log_path(), 'results'),
+                                        level=self.level_number(self.results_log_level))
+            self.logger.addHandler(rh)
+
+        if self.log_to_database:
+            from Build.Simulation_Operation.database_sink import SQLiteLogHandler
+            database_filename = self.database_filename or os.path.join(self.base_path, "lpdm_results.sqlite")
+            dh = SQLiteLogHandler(database_filename, run_name="simulation_{}".format(self.log_id),
+                                  config_file=config_file, level=self.level_number(self.database_log_level))
+            self.logger.addHandler(dh)
+
 
 
 
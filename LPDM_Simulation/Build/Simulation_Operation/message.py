@@ -19,6 +19,11 @@ from enum import Enum
 
 class Message(object):
 
+    __slots__ = ("time", "sender_id", "message_type", "value", "extra_info", "redirect", "_pooled")
+
+    POOL_SIZE = 1024  # the most read messages kept for reuse
+    _free = []
+
     def __init__(self, time, sender_id, message_type, value, extra_info=None, redirect=None):
         self.time = time  # timestamp of message in milliseconds
         self.sender_id = sender_id  # identify sender by their device ID.
@@ -26,6 +31,35 @@ class Message(object):
         self.value = value  # the quantity associated with the messages (all messages are a quantity)
         self.extra_info = extra_info  # extra information associated with this message.
         self.redirect = redirect
+        self._pooled = False  # whether this message came from, and goes back to, the free list
+
+    ##
+    # Returns a message for a device to send, reusing a message that has already been read if there is one.
+    # A message obtained this way must be sent to exactly one device and not kept by the sender, as it is recycled
+    # once the receiver has read it. Messages built with the constructor are never recycled.
+    # (See the constructor for the parameters.)
+
+    @classmethod
+    def acquire(cls, time, sender_id, message_type, value, extra_info=None, redirect=None):
+        if not cls._free:
+            message = cls(time, sender_id, message_type, value, extra_info, redirect)
+            message._pooled = True
+            return message
+        message = cls._free.pop()
+        message.time = time
+        message.sender_id = sender_id
+        message.message_type = message_type
+        message.value = value
+        message.extra_info = extra_info
+        message.redirect = redirect
+        return message
+
+    ##
+    # Returns a message obtained from acquire to the free list, once it has been read. Does nothing for other messages.
+    def release(self):
+        if self._pooled and len(self._free) < self.POOL_SIZE:
+            self.extra_info = self.redirect = None  # do not keep their contents alive
+            self._free.append(self)
 
 
 ##
@@ -56,5 +90,8 @@ class MessageType(Enum):
 
 
 class MessageRedirect(object):
+
+    __slots__ = ("original_sender_id",)
+
     def __init__(self, original_sender_id):
         self.original_sender_id = original_sender_id
@@ -0,0 +1,53 @@
+########################################################################################################################
+# *** Copyright Notice ***
+#
+# "Price Based Local Power Distribution Management System (Local Power Distribution Manager) v2.0"
+# Copyright (c) 2017, The Regents of the University of California, through Lawrence Berkeley National Laboratory
+# (subject to receipt of any required approvals from the U.S. Dept. of Energy).  All rights reserved.
+#
+# If you have questions about your rights to use or distribute this software, please contact
+# Berkeley Lab's Innovation & Partnerships Office at  IPO@lbl.gov.
+########################################################################################################################
+
+"""
+A canonical order for the messages a device reads at the same time.
+
+By default a device reads the messages arriving at the same time in the order they were sent, which follows the order
+in which the supervisor happened to give their senders their turns. That order depends on every device in the
+simulation, so a simulation split across processes (see parallel.py) could not reproduce it. In the canonical order,
+the messages arriving at the same time are read in the order of their senders' registration with the supervisor, and
+the messages of one sender in the order it sent them. This only depends on the messages themselves, so every device
+reads the same messages in the same order however the turns of the devices are interleaved, as long as every device
+has a message latency of at least one second (so that no message is read at the time it was sent).
+"""
+
+
+class CanonicalMessageOrder:
+
+    SENDER_SHIFT = 32  # the bits of a sequence below the sender's rank, which count the messages of that sender
+
+    def __init__(self):
+        self._ranks = {}  # device_id -> the order in which the device was registered
+        self._last_arrivals = {}  # (receiver_id, sender_id) -> (arrival time, count) of the sender's latest message
+
+    ##
+    # Ranks a device after those registered before it. Registering a device again keeps its rank.
+    # @param device_id the id of the device
+    def add_device(self, device_id):
+        if device_id not in self._ranks:
+            self._ranks[device_id] = len(self._ranks)
+
+    ##
+    # Returns the sequence of a message among the events of its receiver at its arrival time, as a tiebreaker for the
+    # receiver's event queue. Call this once per message, in the order the sender sent them.
+    # @param receiver_id the id of the device receiving the message
+    # @param sender_id the id of the device which sent the message. Must have been registered.
+    # @param arrival_time the time at which the receiver reads the message
+    # @return a non-negative sequence, so messages are still read after the recurring events at the same time
+
+    def sequence(self, receiver_id, sender_id, arrival_time):
+        link = (receiver_id, sender_id)
+        last = self._last_arrivals.get(link)
+        count = last[1] + 1 if last is not None and last[0] == arrival_time else 0
+        self._last_arrivals[link] = (arrival_time, count)
+        return (self._ranks[sender_id] << self.SENDER_SHIFT) + count
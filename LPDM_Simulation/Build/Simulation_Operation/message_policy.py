@@ -0,0 +1,102 @@
+########################################################################################################################
+# *** Copyright Notice ***
+#
+# "Price Based Local Power Distribution Management System (Local Power Distribution Manager) v2.0"
+# Copyright (c) 2017, The Regents of the University of California, through Lawrence Berkeley National Laboratory
+# (subject to receipt of any required approvals from the U.S. Dept. of Energy).  All rights reserved.
+#
+# If you have questions about your rights to use or distribute this software, please contact
+# Berkeley Lab's Innovation & Partnerships Office at  IPO@lbl.gov.
+########################################################################################################################
+
+"""
+An optional delivery policy for PRICE and POWER messages, applied per link (sender, receiver and message type).
+
+A device only acts on the latest price or power flow of a neighbor, so on a link:
+    - a message superseded by a newer one due for delivery at the same time is never read. The newer message takes the
+      older one's place in the receiver's queue.
+    - a message with the same value as the previous message on the link (the one still waiting to be delivered, or
+      else the last one delivered) is dropped.
+
+Other message types are always delivered. The policy keeps counts of the messages it folded away.
+"""
+
+from Build.Simulation_Operation.message import MessageType
+
+FOLDED_TYPES = (MessageType.PRICE, MessageType.POWER)
+
+
+class LinkMessagePolicy:
+
+    def __init__(self):
+        self._pending = {}  # (receiver_id, sender_id, message_type) -> the queued MessageEvent not yet delivered
+        self._last_delivered = {}  # (receiver_id, sender_id, message_type) -> (value, extra_info) of last delivery
+        self._num_superseded = 0
+        self._num_duplicates = 0
+        self._num_delivered = 0
+
+    ##
+    # Applies the policy to a message a device has received, before it is queued.
+    # @param receiver_id the device receiving the message
+    # @param message the received message
+    # @return True if the message should be queued, or False if it was folded into a queued message or dropped, in
+    # which case it has been released.
+
+    def admit(self, receiver_id, message):
+        if message.message_type not in FOLDED_TYPES:
+            return True
+        link = (receiver_id, message.sender_id, message.message_type)
+        pending = self._pending.get(link)
+        if pending is not None:
+            previous = pending.get_message()
+            if (message.value, message.extra_info) == (previous.value, previous.extra_info):
+                self._num_duplicates += 1
+                message.release()
+                return False
+            if message.time == previous.time:
+                pending.replace_message(message).release()
+                self._num_superseded += 1
+                return False
+        elif (message.value, message.extra_info) == self._last_delivered.get(link):
+            self._num_duplicates += 1
+            message.release()
+            return False
+        return True
+
+    ##
+    # Records a message event queued after its message was admitted, as the one pending on its link.
+    # @param receiver_id the device receiving the message
+    # @param event the MessageEvent queued to deliver the message
+    def queued(self, receiver_id, event):
+        message = event.get_message()
+        if message.message_type in FOLDED_TYPES:
+            self._pending[(receiver_id, message.sender_id, message.message_type)] = event
+
+    ##
+    # Applies the policy to a message about to be read by its receiver.
+    # @param receiver_id the device reading the message
+    # @param event the MessageEvent delivering the message
+    # @return whether the message should be read. It is not if it repeats the value last delivered on its link.
+
+    def deliver(self, receiver_id, event):
+        message = event.get_message()
+        if message.message_type not in FOLDED_TYPES:
+            return True
+        link = (receiver_id, message.sender_id, message.message_type)
+        if self._pending.get(link) is event:
+            del self._pending[link]
+        value = (message.value, message.extra_info)
+        if self._last_delivered.get(link) == value:
+            self._num_duplicates += 1
+            return False
+        self._last_delivered[link] = value
+        self._num_delivered += 1
+        return True
+
+    ##
+    # Returns the counts of the PRICE and POWER messages delivered, superseded by a newer message and dropped as
+    # duplicates.
+    # @return a dictionary of the counts
+    def get_stats(self):
+        return {"delivered": self._num_delivered, "superseded": self._num_superseded,
+                "duplicates": self._num_duplicates}
@@ -0,0 +1,421 @@
+########################################################################################################################
+# *** Copyright Notice ***
+#
+# "Price Based Local Power Distribution Management System (Local Power Distribution Manager) v2.0"
+# Copyright (c) 2017, The Regents of the University of California, through Lawrence Berkeley National Laboratory
+# (subject to receipt of any required approvals from the U.S. Dept. of Energy).  All rights reserved.
+#
+# If you have questions about your rights to use or distribute this software, please contact
+# Berkeley Lab's Innovation & Partnerships Office at  IPO@lbl.gov.
+########################################################################################################################
+
+"""
+Runs one simulation across several processes. The devices are split into partitions of neighboring grid controllers
+with the devices attached to them, and each partition is run by its own supervisor in a forked child process. The
+devices of the other partitions are replaced there by stand-ins which collect the messages sent to them.
+
+The partitions are kept in step conservatively, in time windows no longer than the shortest message latency: every
+partition runs its events before the end of the window, then the collected messages are passed on to the partitions of
+their receivers. As a message sent during a window is not read before the window ends, no partition ever receives a
+message for a time it has already run. Windows start at the earliest pending event of any partition, so idle stretches
+of the simulation are skipped.
+
+Devices read the messages arriving at the same time in the canonical order (see message_order.py), so the results are
+exactly those of run_simulation with canonical_order=True, however the devices are partitioned. They are not those of
+a default run_simulation, where devices read such messages in the order they were sent: prices, loads and the system
+totals can all differ, so compare a partitioned run against a sequential run with canonical_order=True only. Passing
+the messages on costs a round trip through a pipe per partition and window, so a partitioned run is only faster than
+a sequential one when each window holds plenty of work for each processor (see the parallel mode of
+Benchmark/benchmark_suite.py). Each partition logs
+its devices to its own sim_results_partition_N.log in the simulation folder, and the system totals are logged to the
+simulation's own log. The database and columnar results sinks (log_to_database, log_to_results) are not supported.
+
+A simulation of several islands, groups of devices with no connection to each other (see
+SimulationSetup.find_islands), needs none of this: each island is run to the end on its own (see run_islands), and the
+results are exactly those of run_simulation.
+
+Requires os.fork, so runs on POSIX systems only.
+"""
+
+import logging
+import os
+import sys
+import time
+import traceback
+from collections import deque
+from multiprocessing import Pipe
+
+from Build.Objects.grid_controller import GridController
+from Build.Simulation_Operation.message import Message
+from Build.Simulation_Operation.simulation import SimulationSetup
+from Build.Simulation_Operation.simulation_result import SimulationResult
+from Build.Simulation_Operation.supervisor import Supervisor
+
+
+class ParallelSimulationResult:
+
+    ##
+    # @param result the SimulationResult of the whole simulation
+    # @param partitions a list of the device ids of each partition
+    # @param windows the number of time windows the partitions were run in
+    # @param remote_messages the number of messages passed between partitions
+    # @param wall_time the wall-clock time of the parallel run after the setup, in seconds
+
+    def __init__(self, result, partitions, windows, remote_messages, wall_time):
+        self.result = result
+        self.partitions = partitions
+        self.windows = windows
+        self.remote_messages = remote_messages
+        self.wall_time = wall_time
+
+    def __repr__(self):
+        return "ParallelSimulationResult(partitions={}, windows={}, remote_messages={}, wall_time={:.3f})".format(
+            len(self.partitions), self.windows, self.remote_messages, self.wall_time)
+
+
+##
+# Stands in for a device run by another partition, collecting the messages sent to it to be passed on.
+
+class RemoteDevice:
+
+    __slots__ = ("_device_id", "neighbor_roles", "_outbox")
+
+    ##
+    # @param device_id the id of the device it stands in for
+    # @param neighbor_roles the roles of that device (see Device.neighbor_roles)
+    # @param outbox the list to append the messages sent to the device to, as (receiver id, time, sender id, message
+    # type, value, extra info, redirect) tuples
+
+    def __init__(self, device_id, neighbor_roles, outbox):
+        self._device_id = device_id
+        self.neighbor_roles = neighbor_roles
+        self._outbox = outbox
+
+    def get_id(self):
+        return self._device_id
+
+    def receive_message(self, message):
+        self._outbox.append((self._device_id, message.time, message.sender_id, message.message_type, message.value,
+                             message.extra_info, message.redirect))
+        message.release()
+
+
+##
+# Splits the devices of a simulation into partitions of neighboring grid controllers. Every other device goes with
+# its nearest grid controller (the first found, in the order the devices were registered), and the grid controllers
+# are taken in depth-first order of their connections, so that each partition is a connected part of the grid where
+# possible, and cut into partitions of about the same number of devices.
+# @param supervisor the supervisor of the simulation, with all its devices registered and connected
+# @param num_partitions the number of partitions wanted. There are never more than there are grid controllers.
+# @return a list of the device ids of each partition, in the order the devices were registered
+
+def partition_devices(supervisor, num_partitions):
+    devices = list(supervisor.all_devices())
+    gc_ids = [device.get_id() for device in devices if isinstance(device, GridController)]
+    if num_partitions < 1:
+        raise ValueError("A simulation needs at least one partition")
+    if not gc_ids:
+        return [[device.get_id() for device in devices]]
+
+    # the nearest grid controller of every device, by a breadth-first search from all of them at once
+    home = {gc_id: gc_id for gc_id in gc_ids}
+    frontier = deque(gc_ids)
+    while frontier:
+        device_id = frontier.popleft()
+        for neighbor_id in supervisor.get_device(device_id).get_connected_device_ids():
+            if neighbor_id not in home:
+                home[neighbor_id] = home[device_id]
+                frontier.append(neighbor_id)
+    weights = {gc_id: 0 for gc_id in gc_ids}
+    gc_neighbors = {gc_id: [] for gc_id in gc_ids}
+    for device in devices:
+        device_id = device.get_id()
+        if device_id not in home:
+            continue  # not connected to any grid controller
+        weights[home[device_id]] += 1
+        for neighbor_id in device.get_connected_device_ids():
+            if home.get(neighbor_id, home[device_id]) != home[device_id]:
+                gc_neighbors[home[device_id]].append(home[neighbor_id])
+
+    order = []
+    visited = set()
+    for root_id in gc_ids:
+        stack = [root_id]
+        while stack:
+            gc_id = stack.pop()
+            if gc_id in visited:
+                continue
+            visited.add(gc_id)
+            order.append(gc_id)
+            stack.extend(reversed(gc_neighbors[gc_id]))
+
+    num_partitions = min(num_partitions, len(gc_ids))
+    total_weight = sum(weights.values())
+    partition_of_gc = {}
+    partition = 0
+    cumulative = 0
+    for position, gc_id in enumerate(order):
+        partition_of_gc[gc_id] = partition
+        cumulative += weights[gc_id]
+        gcs_left = len(order) - position - 1
+        if partition < num_partitions - 1 and (cumulative * num_partitions >= total_weight * (partition + 1) or
+                                               gcs_left == num_partitions - partition - 1):
+            partition += 1
+
+    partitions = [[] for _ in range(num_partitions)]
+    for device in devices:
+        device_id = device.get_id()
+        partitions[partition_of_gc[home[device_id]] if device_id in home else 0].append(device_id)
+    return partitions
+
+
+##
+# Runs a simulation in parallel, one forked child process per partition of its devices (see partition_devices).
+# @param config_file the configuration json of the scenario
+# @param override_args list of override arguments in the format 'device_id.attribute_name=value'
+# @param num_partitions the number of partitions, and so of processes. Defaults to the number of processors.
+# @return a ParallelSimulationResult with the SimulationResult of the simulation, which is the same as that of
+# run_simulation with canonical_order=True
+# @raise ValueError if a device has a message latency under one second, which leaves no time to pass messages on, or
+# if the simulation logs to the database or columnar results sinks
+# @raise RuntimeError if a partition fails
+
+def run_parallel_simulation(config_file, override_args, num_partitions=None):
+    sim = SimulationSetup(supervisor=Supervisor(canonical_order=True))
+    sim.setup_simulation(config_file, override_args)
+    return run_partitioned(sim, num_partitions)
+
+
+##
+# Runs a simulation which has been set up but not started in parallel (see run_parallel_simulation).
+# @param sim the SimulationSetup of the simulation. Its supervisor must use the canonical order.
+# @param num_partitions the number of partitions, and so of processes. Defaults to the number of processors.
+# @return a ParallelSimulationResult. Its wall time does not include the setup.
+# @raise ValueError as run_parallel_simulation does
+
+def run_partitioned(sim, num_partitions=None):
+    start = time.perf_counter()
+    _check_log_handlers()
+    supervisor = sim.supervisor
+    if supervisor.get_message_order() is None:
+        raise ValueError("A parallel simulation needs a supervisor which uses the canonical message order")
+    lookahead = min(device.get_message_latency() for device in supervisor.all_devices())
+    if lookahead < 1:
+        raise ValueError("Every device needs a message latency of at least one second to run in parallel")
+    partitions = partition_devices(supervisor, num_partitions or os.cpu_count() or 1)
+    result, windows, remote_messages = _run_in_processes(sim, partitions, lookahead)
+    parallel = ParallelSimulationResult(result, partitions, windows, remote_messages, time.perf_counter() - start)
+    logger = logging.getLogger("lpdm")
+    logger.info("Parallel run: {} partitions, {} windows of up to {} s, {} messages between partitions, "
+                "total {:.3f} s".format(len(partitions), windows, lookahead, remote_messages, parallel.wall_time))
+    for handler in logger.handlers:
+        handler.flush()
+    return parallel
+
+
+##
+# Runs the islands of a simulation (see SimulationSetup.find_islands) which has been set up but not started in
+# parallel, in as many forked child processes as there are processors (or islands, if fewer). As no message passes
+# between islands, each process runs its islands to the end without waiting on the others. The devices of an island
+# take their turns in the same order relative to each other as when the whole simulation is run together, so the
+# results are exactly those of run_simulation, whatever the order of the messages.
+# @param sim the SimulationSetup of the simulation
+# @param num_workers the most processes to run the islands in. Defaults to the number of processors.
+# @return a ParallelSimulationResult, whose partitions are the device ids run by each process. Its wall time does
+# not include the setup.
+# @raise ValueError if the simulation logs to the database or columnar results sinks
+
+def run_islands(sim, num_workers=None):
+    start = time.perf_counter()
+    _check_log_handlers()
+    partitions = group_islands(sim.islands, num_workers or os.cpu_count() or 1)
+    result, windows, remote_messages = _run_in_processes(sim, partitions, None)
+    parallel = ParallelSimulationResult(result, partitions, windows, remote_messages, time.perf_counter() - start)
+    logger = logging.getLogger("lpdm")
+    logger.info("Island run: {} islands in {} processes, total {:.3f} s".format(
+        len(sim.islands), len(partitions), parallel.wall_time))
+    for handler in logger.handlers:
+        handler.flush()
+    return parallel
+
+
+##
+# Shares out islands among processes, each island in turn from the largest to the process with the fewest devices.
+# @param islands a list of the device ids of each island
+# @param num_workers the most processes to share the islands among
+# @return a list of the device ids run by each process, the islands in the order given
+
+def group_islands(islands, num_workers):
+    if num_workers < 1:
+        raise ValueError("Islands need at least one process to run in")
+    groups = [[] for _ in range(min(num_workers, len(islands)))]
+    sizes = [0] * len(groups)
+    group_of = {}
+    for index in sorted(range(len(islands)), key=lambda index: -len(islands[index])):
+        group = sizes.index(min(sizes))
+        group_of[index] = group
+        sizes[group] += len(islands[index])
+    for index, island in enumerate(islands):
+        groups[group_of[index]].extend(island)
+    return groups
+
+
+##
+# Checks that the simulation only logs to the console and to log files, which are all a partition logs to (see
+# _run_partition). The records of the other handlers, e.g. of the database and columnar results sinks, would be lost.
+# @raise ValueError if the logger has any other handler
+
+def _check_log_handlers():
+    for handler in logging.getLogger("lpdm").handlers:
+        if not isinstance(handler, logging.StreamHandler):
+            raise ValueError("Simulations run in parallel can only log to the console and log files, not to {} (set "
+                             "log_to_database and log_to_results to false)".format(type(handler).__name__))
+
+
+##
+# Runs each partition of a simulation in its own forked child process, in windows of the given lookahead, and merges
+# their results.
+# @param sim the SimulationSetup of the simulation
+# @param partitions a list of the device ids of each partition
+# @param lookahead the most simulation time, in seconds, to run before passing messages between partitions, or None
+# to run to the end in a single window (if no message passes between them)
+# @return a tuple of the merged SimulationResult, the number of windows and the number of messages passed on
+
+def _run_in_processes(sim, partitions, lookahead):
+    supervisor = sim.supervisor
+    latencies = {device.get_id(): device.get_message_latency() for device in supervisor.all_devices()}
+    partition_of = {device_id: index for index, device_ids in enumerate(partitions) for device_id in device_ids}
+    logger = logging.getLogger("lpdm")
+    for handler in logger.handlers:
+        handler.flush()  # or the children would write out the parent's buffered records too
+    sys.stdout.flush()
+    workers = []
+    for index, device_ids in enumerate(partitions):
+        connection, child_connection = Pipe()
+        pid = os.fork()
+        if pid == 0:
+            connection.close()
+            for other_pid, other_connection in workers:
+                other_connection.close()
+            exit_code = 1
+            try:
+                _run_partition(sim, index, set(device_ids), child_connection)
+                exit_code = 0
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                os._exit(exit_code)  # never return into the parent's code
+        child_connection.close()
+        workers.append((pid, connection))
+
+    windows = 0
+    remote_messages = 0
+    try:
+        next_times = [_receive(connection, index) for index, (pid, connection) in enumerate(workers)]
+        inboxes = [[] for _ in partitions]
+        while True:
+            pending = [next_time for next_time in next_times if next_time is not None]
+            pending.extend(message[1] + latencies[message[0]] for inbox in inboxes for message in inbox)
+            if not pending or min(pending) > sim.end_time:
+                break
+            window_end = min(pending) + lookahead if lookahead is not None else sim.end_time + 1
+            for (pid, connection), inbox in zip(workers, inboxes):
+                connection.send((window_end, inbox))
+            inboxes = [[] for _ in partitions]
+            for index, (pid, connection) in enumerate(workers):
+                next_times[index], outbox = _receive(connection, index)
+                for message in outbox:
+                    inboxes[partition_of[message[0]]].append(message)
+                remote_messages += len(outbox)
+            windows += 1
+        for pid, connection in workers:
+            connection.send(None)  # finish
+        partials = [_receive(connection, index) for index, (pid, connection) in enumerate(workers)]
+    finally:
+        for pid, connection in workers:
+            connection.close()
+            os.waitpid(pid, 0)
+    return _merge_results(supervisor, sim.end_time, partials), windows, remote_messages
+
+
+def _receive(connection, index):
+    try:
+        return connection.recv()
+    except EOFError:
+        raise RuntimeError("Partition {} of the simulation failed".format(index))
+
+
+##
+# Runs one partition in a forked child: replaces the devices of the other partitions with stand-ins, then runs the
+# windows it is sent until told to finish, replying with the time of its next event and the messages for the other
+# partitions after each, and finally with its devices' part of the result.
+
+def _run_partition(sim, index, device_ids, connection):
+    logger = logging.getLogger("lpdm")
+    file_handlers = [handler for handler in logger.handlers if isinstance(handler, logging.FileHandler)]
+    for handler in list(logger.handlers):  # these write to the parent's log, which the parent closes
+        logger.removeHandler(handler)
+    if file_handlers:
+        handler = logging.FileHandler(os.path.join(sim.log_path, "sim_results_partition_{}.log".format(index)),
+                                      mode='w')
+        handler.setLevel(file_handlers[0].level)
+        handler.setFormatter(file_handlers[0].formatter)
+        logger.addHandler(handler)
+
+    supervisor = sim.supervisor
+    outbox = []
+    supervisor.replace_devices({device.get_id(): RemoteDevice(device.get_id(), device.neighbor_roles, outbox)
+                                for device in list(supervisor.all_devices()) if device.get_id() not in device_ids})
+    connection.send(_next_event_time(supervisor))
+    while True:
+        window = connection.recv()
+        if window is None:
+            break
+        window_end, inbox = window
+        for receiver_id, message_time, sender_id, message_type, value, extra_info, redirect in inbox:
+            supervisor.get_device(receiver_id).receive_message(
+                Message(message_time, sender_id, message_type, value, extra_info, redirect))
+        while supervisor.has_next_event():
+            device_id, time_stamp = supervisor.peek_next_event()
+            if time_stamp >= window_end or time_stamp > sim.end_time:
+                break
+            supervisor.occur_next_event()
+        connection.send((_next_event_time(supervisor), list(outbox)))
+        del outbox[:]
+
+    for device in supervisor.all_devices():
+        device.finish(sim.end_time)
+    for handler in logger.handlers:
+        handler.flush()
+    connection.send((supervisor.build_result(sim.end_time, None),
+                     {device.get_id(): supervisor.energy_sums(device) for device in supervisor.all_devices()}))
+
+
+def _next_event_time(supervisor):
+    if supervisor.has_next_event():
+        device_id, time_stamp = supervisor.peek_next_event()
+        return time_stamp
+    return None
+
+
+##
+# Puts the results of the partitions together in the order the devices were registered, as Supervisor.finish_all
+# would, and logs the system totals.
+
+def _merge_results(supervisor, end_time, partials):
+    energy_sums = {}
+    devices = {}
+    grid_controllers = {}
+    batteries_by_gc = {}
+    for partial, partial_energy_sums in partials:
+        energy_sums.update(partial_energy_sums)
+        devices.update(partial.devices)
+        grid_controllers.update(partial.grid_controllers)
+        for battery_id, battery in partial.batteries.items():
+            batteries_by_gc[battery["grid_controller"]] = (battery_id, battery)
+    device_ids = [device.get_id() for device in supervisor.all_devices()]
+    totals = supervisor.log_totals([energy_sums[device_id] for device_id in device_ids])
+    gc_ids = [device_id for device_id in device_ids if device_id in grid_controllers]
+    return SimulationResult(end_time, totals, {device_id: devices[device_id] for device_id in device_ids},
+                            dict(batteries_by_gc[gc_id] for gc_id in gc_ids),
+                            {gc_id: grid_controllers[gc_id] for gc_id in gc_ids})
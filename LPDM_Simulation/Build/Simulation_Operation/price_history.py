@@ -0,0 +1,136 @@
+########################################################################################################################
+# *** Copyright Notice ***
+#
+# "Price Based Local Power Distribution Management System (Local Power Distribution Manager) v2.0"
+# Copyright (c) 2017, The Regents of the University of California, through Lawrence Berkeley National Laboratory
+# (subject to receipt of any required approvals from the U.S. Dept. of Energy).  All rights reserved.
+#
+# If you have questions about your rights to use or distribute this software, please contact
+# Berkeley Lab's Innovation & Partnerships Office at  IPO@lbl.gov.
+########################################################################################################################
+
+"""
+A history of prices by interval (e.g. the hourly average prices of a grid controller), with the mean, minimum and
+maximum over a sliding window of the latest intervals (e.g. the last day) kept up to date as prices are recorded, so
+that updating a price and querying the statistics both take constant time.
+
+Intervals are numbered from the start of the simulation. The latest interval is the current one, whose price may be
+updated any number of times until the history moves on to a later interval. The prices of the intervals are kept in a
+fixed-size ring buffer which may span several windows (e.g. a week of hourly prices), and the window statistics keep a
+running sum and monotonic deques of the minimum and maximum of the completed intervals in the window, which are then
+combined with the price of the current interval. Intervals before the first recorded one have the initial price.
+"""
+
+from collections import deque
+
+import numpy as np
+
+
+class IntervalPriceHistory:
+
+    ##
+    # @param initial_price the price of every interval before the first recorded price
+    # @param window_intervals the number of intervals in the window of the statistics, including the current one
+    # @param history_intervals the number of intervals of prices to keep. At least the window is always kept.
+
+    def __init__(self, initial_price, window_intervals, history_intervals=None):
+        if window_intervals < 1:
+            raise ValueError("the price statistics window must have at least one interval")
+        self._initial_price = initial_price
+        self._window = window_intervals
+        self._prices = np.full(max(window_intervals, history_intervals or 0), initial_price, dtype=float)
+        self._current = 0  # the number of the current interval
+        self._current_price = initial_price
+        # the statistics of the completed intervals in the window, i.e. of the window_intervals - 1 before the current
+        self._completed_sum = initial_price * (window_intervals - 1)
+        self._min_deque = deque()  # (interval, price) of increasing price, the window's minimum at the front
+        self._max_deque = deque()  # (interval, price) of decreasing price, the window's maximum at the front
+        if window_intervals > 1:
+            self._min_deque.append((-1, initial_price))
+            self._max_deque.append((-1, initial_price))
+
+    ##
+    # Returns the number of the current interval.
+    def get_current_interval(self):
+        return self._current
+
+    ##
+    # Returns the number of intervals in the window of the statistics, including the current one.
+    def get_window_length(self):
+        return self._window
+
+    ##
+    # Returns the price of an interval.
+    # @param interval the number of the interval, at most the current one
+    # @return the price of the interval, or the initial price if it is before the first recorded price or no longer
+    # kept in the history
+    def get_price(self, interval):
+        if interval == self._current:
+            return self._current_price
+        if interval > self._current:
+            raise ValueError("interval {} is after the current interval {}".format(interval, self._current))
+        if interval < 0 or interval <= self._current - len(self._prices):
+            return self._initial_price
+        return float(self._prices[interval % len(self._prices)])
+
+    ##
+    # Returns the prices of the latest intervals kept in the history, oldest first.
+    # @param num_intervals the number of intervals, including the current one. Defaults to the whole history.
+    # @return a NumPy array of the prices
+    def get_prices(self, num_intervals=None):
+        capacity = len(self._prices)
+        num_intervals = capacity if num_intervals is None else min(num_intervals, capacity)
+        start = self._current - num_intervals + 1
+        return np.array([self.get_price(interval) for interval in range(start, self._current + 1)])
+
+    ##
+    # Sets the price of an interval. Moving on to a later interval completes the current one, and the intervals in
+    # between (if any were skipped) keep the price of the current one.
+    # @param interval the number of the interval, at least the current one
+    # @param price the price of the interval
+    def set_price(self, interval, price):
+        if interval < self._current:
+            raise ValueError("interval {} is before the current interval {}".format(interval, self._current))
+        while self._current < interval:
+            self._complete_current()
+        self._current_price = price
+        self._prices[interval % len(self._prices)] = price
+
+    def _complete_current(self):
+        completed, price = self._current, self._current_price
+        expired = completed + 1 - self._window  # the interval which falls out of the window
+        if self._window > 1:
+            self._completed_sum += price - self.get_price(expired)
+        self._current += 1
+        self._prices[self._current % len(self._prices)] = price
+        if self._window == 1:
+            return
+        while self._min_deque and self._min_deque[-1][1] >= price:
+            self._min_deque.pop()
+        self._min_deque.append((completed, price))
+        while self._max_deque and self._max_deque[-1][1] <= price:
+            self._max_deque.pop()
+        self._max_deque.append((completed, price))
+        if self._min_deque[0][0] <= expired:
+            self._min_deque.popleft()
+        if self._max_deque[0][0] <= expired:
+            self._max_deque.popleft()
+
+    ##
+    # Returns the mean price of the intervals in the window.
+    def get_mean(self):
+        return (self._completed_sum + self._current_price) / self._window
+
+    ##
+    # Returns the minimum price of the intervals in the window.
+    def get_min(self):
+        if self._min_deque:
+            return min(self._min_deque[0][1], self._current_price)
+        return self._current_price
+
+    ##
+    # Returns the maximum price of the intervals in the window.
+    def get_max(self):
+        if self._max_deque:
+            return max(self._max_deque[0][1], self._current_price)
+        return self._current_price
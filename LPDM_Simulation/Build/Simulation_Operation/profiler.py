@@ -0,0 +1,142 @@
+########################################################################################################################
+# *** Copyright Notice ***
+#
+# "Price Based Local Power Distribution Management System (Local Power Distribution Manager) v2.0"
+# Copyright (c) 2017, The Regents of the University of California, through Lawrence Berkeley National Laboratory
+# (subject to receipt of any required approvals from the U.S. Dept. of Energy).  All rights reserved.
+#
+# If you have questions about your rights to use or distribute this software, please contact
+# Berkeley Lab's Innovation & Partnerships Office at  IPO@lbl.gov.
+########################################################################################################################
+
+"""
+Opt-in profiling counters for a simulation (see Supervisor's profile argument). Counts the events run and the time
+spent in them per device, per device class and per handler: the function an event calls (e.g.
+GridController.modulate_power), or for a message delivery the receiving class and the message type (e.g.
+GridController.read_message[PRICE]). Also times the supervisor's turns in occur_next_event (which also covers queue
+upkeep between events) and each phase of setting up the simulation.
+
+When profiling is off, devices and the supervisor only check once per turn that there is no profiler.
+"""
+
+import json
+import time
+
+from Build.Simulation_Operation.event import MessageEvent
+
+
+class SimulationProfiler:
+
+    def __init__(self):
+        self._devices = {}  # device_id -> [device class name, events, ns]
+        self._handlers = {}  # handler name -> [events, ns]
+        self._handler_names = {}  # handler function, or (device class, message type) -> handler name
+        self._num_turns = 0
+        self._turn_ns = 0
+        self._setup_phases = []  # list of (phase name, ns) in order
+
+    ##
+    # Runs an event of a device, counting it and its time against the device and the event's handler.
+    # @param device the device running the event
+    # @param event the event to run
+    def run_event(self, device, event):
+        if isinstance(event, MessageEvent):
+            handler = (type(device), event.get_message().message_type)
+        else:
+            handler = event.get_handler()
+            handler = getattr(handler, "__func__", handler)  # the function of a bound method
+        name = self._handler_names.get(handler)
+        if name is None:
+            name = self._handler_names[handler] = _handler_name(handler)
+        start = time.perf_counter_ns()
+        event.run_event()
+        elapsed = time.perf_counter_ns() - start
+        device_counts = self._devices.get(device.get_id())
+        if device_counts is None:
+            device_counts = self._devices[device.get_id()] = [type(device).__name__, 0, 0]
+        device_counts[1] += 1
+        device_counts[2] += elapsed
+        handler_counts = self._handlers.get(name)
+        if handler_counts is None:
+            handler_counts = self._handlers[name] = [0, 0]
+        handler_counts[0] += 1
+        handler_counts[1] += elapsed
+
+    ##
+    # Records one turn of the supervisor, i.e. one device processing its events at one time.
+    # @param elapsed_ns the time of the turn, including the supervisor's queue upkeep, in nanoseconds
+    def record_turn(self, elapsed_ns):
+        self._num_turns += 1
+        self._turn_ns += elapsed_ns
+
+    ##
+    # Records the time of a phase of setting up the simulation.
+    # @param name the name of the phase
+    # @param elapsed_ns the time of the phase, in nanoseconds
+    def record_setup_phase(self, name, elapsed_ns):
+        self._setup_phases.append((name, elapsed_ns))
+
+    ##
+    # Returns the counters, with each table sorted by decreasing time.
+    # @return a dictionary of plain values, e.g. to write out as JSON
+    def to_dict(self):
+        classes = {}
+        for class_name, num_events, elapsed in self._devices.values():
+            class_counts = classes.setdefault(class_name, [0, 0])
+            class_counts[0] += num_events
+            class_counts[1] += elapsed
+        event_ns = sum(elapsed for num_events, elapsed in self._handlers.values())
+        return {
+            "setup": [{"phase": name, "ns": elapsed} for name, elapsed in self._setup_phases],
+            "turns": {"count": self._num_turns, "ns": self._turn_ns, "event_ns": event_ns},
+            "device_classes": _sorted_rows("device_class", classes.items()),
+            "handlers": _sorted_rows("handler", self._handlers.items()),
+            "devices": _sorted_rows("device_id",
+                                    ((device_id, counts[1:]) for device_id, counts in self._devices.items()),
+                                    {device_id: counts[0] for device_id, counts in self._devices.items()})
+        }
+
+    ##
+    # Writes the counters to a JSON file.
+    # @param filename the path of the file to write
+    def write_json(self, filename):
+        with open(filename, 'w') as profile_file:
+            json.dump(self.to_dict(), profile_file, indent=2)
+
+    ##
+    # Returns the counters as lines of text tables, the most expensive first in each.
+    # @param max_rows the most rows to list in the per-handler and per-device tables
+    # @return a list of lines
+    def format_tables(self, max_rows=20):
+        profile = self.to_dict()
+        lines = ["Setup: {}".format(", ".join("{} {:.1f} ms".format(phase["phase"], phase["ns"] / 1e6)
+                                               for phase in profile["setup"]))]
+        turns = profile["turns"]
+        lines.append("Turns: {}, {:.1f} ms, of which events {:.1f} ms".format(turns["count"], turns["ns"] / 1e6,
+                                                                            turns["event_ns"] / 1e6))
+        for title, key, rows in (("device class", "device_class", profile["device_classes"]),
+                                 ("handler", "handler", profile["handlers"][:max_rows]),
+                                 ("device", "device_id", profile["devices"][:max_rows])):
+            lines.append("{:<44}{:>10}{:>12}{:>12}".format(title, "events", "ms", "us/event"))
+            for row in rows:
+                lines.append("{:<44}{:>10}{:>12.2f}{:>12.2f}".format(row[key], row["events"], row["ns"] / 1e6,
+                                                                   row["ns"] / row["events"] / 1e3))
+        return lines
+
+
+def _handler_name(handler):
+    if isinstance(handler, tuple):
+        device_class, message_type = handler
+        return "{}.read_message[{}]".format(device_class.__name__, message_type.name)
+    return getattr(handler, "__qualname__", type(handler).__name__)
+
+
+def _sorted_rows(key, items, device_classes=None):
+    rows = []
+    for name, (num_events, elapsed) in items:
+        row = {key: name, "events": num_events, "ns": elapsed}
+        if device_classes is not None:
+            row["device_class"] = device_classes[name]
+        rows.append(row)
+    rows.sort(key=lambda row: row["ns"], reverse=True)
+    return rows
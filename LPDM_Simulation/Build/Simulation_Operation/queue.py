@@ -12,6 +12,10 @@
 """
 A priority queue implementing a queue of items sorted by priority.
 Adapted from https://docs.python.org/2/library/heapq.html.
+
+Removed (or re-prioritized) tasks are left in the heap as REMOVED tombstones and skipped over lazily. The number of
+tombstones is tracked, and once they make up more than half of a heap of reasonable size the heap is rebuilt from the
+live entries, so the heap stays bounded by a constant factor of the number of queued tasks.
 """
 
 import itertools
@@ -21,21 +25,26 @@ import heapq
 class PriorityQueue:
 
     REMOVED = '<removed-task>'  # placeholder for a removed task
+    COMPACT_MIN_TOMBSTONES = 64  # never rebuild the heap for fewer tombstones than this
 
     def __init__(self):
         self._pq = []  # list of entries (priority, count, task) arranged in a heap
         self._entry_finder = {}  # mapping of tasks to entries
         self._counter = itertools.count()  # unique sequence count to be used as a tiebreaker comparison in heap
+        self._tombstones = 0  # number of REMOVED entries still in the heap
+        self._compactions = 0  # number of times the heap has been rebuilt to drop tombstones
 
     ##
     # Adds a new task to the priority queue, or if that task already exists, updates that tasks priority.
     # @param task the task to add to the priority queue
     # @param priority the priority to assign to this task. Default to 0
+    # @param sequence optional tiebreaker to order this task among tasks of equal priority. Defaults to the order in
+    # which tasks are added.
 
-    def add(self, task, priority=0):
+    def add(self, task, priority=0, sequence=None):
         if task in self._entry_finder:
             self.remove(task)
-        count = next(self._counter)
+        count = next(self._counter) if sequence is None else sequence
         entry = [priority, count, task]
         self._entry_finder[task] = entry
         heapq.heappush(self._pq, entry)
@@ -46,6 +55,9 @@ class PriorityQueue:
     def remove(self, task):
         entry = self._entry_finder.pop(task)
         entry[-1] = self.REMOVED
+        self._tombstones += 1
+        if self._tombstones > self.COMPACT_MIN_TOMBSTONES and self._tombstones > len(self._entry_finder):
+            self.compact()
 
     ##
     # Remove and return the lowest priority task and its priority. Raise KeyError if queue is empty.
@@ -56,18 +68,21 @@ class PriorityQueue:
             if task is not self.REMOVED:
                 del self._entry_finder[task]
                 return task, priority
+            self._tombstones -= 1
         raise KeyError('pop from an empty priority queue')
 
     ##
     # Returns the lowest priority task in the queue and its priority without removing. Raise KeyError if queue is empty.
+    # Tombstones at the front of the heap are discarded, but the order of the live entries is left untouched.
     # @return tuple of task with lowest priority and that priority
     def peek(self):
-        while self._pq:  # Must loop in case front of queue is 'removed'
-            priority, count, task = heapq.heappop(self._pq)
+        pq = self._pq
+        while pq:  # Must loop in case front of queue is 'removed'
+            priority, count, task = pq[0]
             if task is not self.REMOVED:
-                put_back = [priority, count, task]
-                heapq.heappush(self._pq, put_back)
                 return task, priority
+            heapq.heappop(pq)
+            self._tombstones -= 1
         raise KeyError('peek from an empty priority queue')
 
     ##
@@ -76,6 +91,42 @@ class PriorityQueue:
         # Implementation note: pq heap may still contain items, but they are all classified as 'REMOVED'.
         return len(self._entry_finder) == 0
 
+    ##
+    # Returns whether a task is in the queue.
+    def contains(self, task):
+        return task in self._entry_finder
+
+    ##
+    # Returns the number of tasks in the queue.
+    def size(self):
+        return len(self._entry_finder)
+
+    ##
+    # Returns statistics on the heap: the number of queued tasks, the length of the heap, the number of tombstones in it
+    # and the number of times it has been compacted.
+    # @return a dictionary of the statistic names to their values
+    def get_stats(self):
+        return {"size": len(self._entry_finder), "heap_size": len(self._pq), "tombstones": self._tombstones,
+                "compactions": self._compactions}
+
+    ##
+    # Rebuilds the heap from the live entries only, dropping all tombstones.
+    def compact(self):
+        self._pq = list(self._entry_finder.values())
+        heapq.heapify(self._pq)
+        self._tombstones = 0
+        self._compactions += 1
+
+    ##
+    # Returns the state to pickle: the live entries only. Tombstones are recognized by identity with REMOVED, which an
+    # unpickled string would not keep, so they are dropped rather than written.
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_pq"] = list(self._entry_finder.values())
+        heapq.heapify(state["_pq"])
+        state["_tombstones"] = 0
+        return state
+
     ##
     # Clears out all values from the priority queue
     def clear(self):
@@ -83,6 +134,7 @@ class PriorityQueue:
         self._pq.clear()
         self._entry_finder.clear()
         self._counter = itertools.count()
+        self._tombstones = 0
 
     ##
     # Updates all tasks with a given task_attribute equal to an attribute_value to have a new priority.
@@ -0,0 +1,348 @@
+########################################################################################################################
+# *** Copyright Notice ***
+#
+# "Price Based Local Power Distribution Management System (Local Power Distribution Manager) v2.0"
+# Copyright (c) 2017, The Regents of the University of California, through Lawrence Berkeley National Laboratory
+# (subject to receipt of any required approvals from the U.S. Dept. of Energy).  All rights reserved.
+#
+# If you have questions about your rights to use or distribute this software, please contact
+# Berkeley Lab's Innovation & Partnerships Office at  IPO@lbl.gov.
+########################################################################################################################
+
+"""
+Runs a simulation paced against the wall clock, for hardware in the loop: each supervisor tick runs when the wall
+clock reaches its simulation time, scaled by a speedup (1 for real time, 60 for a simulated minute every second, and
+so on). The runner is built on asyncio, and between ticks it serves external devices over local TCP sockets.
+
+An external device stands in for one of the simulated devices, e.g. a driver for a physical load in place of an EUD.
+It connects and sends a line of JSON naming the device it replaces, {"device_id": "eud_1"}. From the next tick on,
+that device is no longer simulated: the messages sent to it are written to the socket instead, one JSON object per
+line with the time, sender, type and value of the message, and every line the external device sends, e.g.
+{"target": "gc_1", "type": "REQUEST", "value": 100.0}, is delivered as a message from it at the current simulation
+time. The type is the name of a MessageType, and "extra_info" may also be given. A line which cannot be read is
+answered with {"error": ...}.
+
+For every tick, the runner records its scheduling lag (how long after its wall clock time it started) and whether it
+missed its deadline, i.e. finished more than the slack (by default one simulated second) after its wall clock time.
+These are logged at debug level per tick and summarized at the end of the run. Only the summary is kept, unless the
+runner is asked to keep the statistics of every tick, as a long run has very many ticks.
+
+Run from the LPDM_Simulation folder, e.g. at 60 times real time with external devices on port 8765:
+    python -m Build.Simulation_Operation.realtime base-case.json --speedup 60 --port 8765
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import time
+
+from Build.Simulation_Operation.message import Message, MessageType
+from Build.Simulation_Operation.simulation import SimulationSetup
+from Build.Simulation_Operation.supervisor import Supervisor
+
+
+class TickStats:
+
+    __slots__ = ("time", "events", "lag", "duration", "missed")
+
+    ##
+    # @param time the simulation time of the tick, in seconds
+    # @param events the number of events processed during the tick
+    # @param lag how long after its wall clock time the tick started, in seconds
+    # @param duration the wall clock time the tick took, in seconds
+    # @param missed whether the tick finished after its deadline
+
+    def __init__(self, time, events, lag, duration, missed):
+        self.time = time
+        self.events = events
+        self.lag = lag
+        self.duration = duration
+        self.missed = missed
+
+
+class RealTimeResult:
+
+    ##
+    # @param result the SimulationResult of the simulation, without the devices replaced by external devices
+    # @param num_ticks the number of ticks run
+    # @param total_lag the sum of the scheduling lags of the ticks, in seconds
+    # @param max_lag the largest scheduling lag of any tick, in seconds
+    # @param deadline_misses the number of ticks which missed their deadline
+    # @param external_devices a list of the ids of the devices replaced by external devices
+    # @param injected_messages the number of messages sent by external devices
+    # @param wall_time the wall clock time of the run, in seconds
+    # @param ticks a list of the TickStats of every tick, or None if they were not kept
+
+    def __init__(self, result, num_ticks, total_lag, max_lag, deadline_misses, external_devices, injected_messages,
+                 wall_time, ticks=None):
+        self.result = result
+        self.num_ticks = num_ticks
+        self.total_lag = total_lag
+        self.mean_lag = total_lag / num_ticks if num_ticks else 0.0  # the mean scheduling lag of the ticks, in seconds
+        self.max_lag = max_lag
+        self.deadline_misses = deadline_misses
+        self.external_devices = external_devices
+        self.injected_messages = injected_messages
+        self.wall_time = wall_time
+        self.ticks = ticks
+
+    def __repr__(self):
+        return "RealTimeResult(ticks={}, mean_lag={:.6f}, max_lag={:.6f}, deadline_misses={})".format(
+            self.num_ticks, self.mean_lag, self.max_lag, self.deadline_misses)
+
+
+##
+# Stands in for a simulated device replaced by an external device, writing the messages sent to it to the external
+# device's socket.
+
+class SocketDevice:
+
+    __slots__ = ("_device_id", "neighbor_roles", "_writer")
+
+    ##
+    # @param device_id the id of the replaced device
+    # @param neighbor_roles the roles of the replaced device (see Device.neighbor_roles)
+    # @param writer the asyncio StreamWriter of the external device's connection
+
+    def __init__(self, device_id, neighbor_roles, writer):
+        self._device_id = device_id
+        self.neighbor_roles = neighbor_roles
+        self._writer = writer
+
+    def get_id(self):
+        return self._device_id
+
+    def receive_message(self, message):
+        if not self._writer.is_closing():
+            _write_line(self._writer, {"time": message.time, "sender": message.sender_id,
+                                       "type": message.message_type.name, "value": message.value,
+                                       "extra_info": message.extra_info})
+        message.release()
+
+
+class RealTimeRunner:
+
+    ##
+    # @param sim the SimulationSetup of a simulation which has been set up but not started. Its supervisor must use
+    # per-device event queues.
+    # @param speedup how many simulated seconds pass per second of wall clock time
+    # @param host the address to listen for external devices on
+    # @param port the port to listen for external devices on, or 0 for any free port (see get_port)
+    # @param deadline_slack how long after its wall clock time a tick may finish, in seconds. Defaults to the wall
+    # clock time of one simulated second.
+    # @param keep_ticks whether to keep the TickStats of every tick in the result, rather than only their summary
+
+    def __init__(self, sim, speedup=1.0, host="127.0.0.1", port=0, deadline_slack=None, keep_ticks=False):
+        if speedup <= 0:
+            raise ValueError("The speedup must be positive")
+        self._sim = sim
+        self._speedup = speedup
+        self._host = host
+        self._port = port
+        self._deadline_slack = 1.0 / speedup if deadline_slack is None else deadline_slack
+        self._keep_ticks = keep_ticks
+        self._logger = logging.getLogger("lpdm")
+        self._pending = []  # (device_id, writer) replacements and (sender_id, line) messages from external devices
+        self._wakeup = None  # set when an external device sends something, to run it before the next tick
+        self._started = None  # set once the runner is listening
+        self._start_wall = 0.0
+        self._start_time = 0
+        self._last_tick_time = 0
+        self._external_devices = []
+        self._injected_messages = 0
+        self._num_ticks = 0
+        self._total_lag = 0.0
+        self._max_lag = 0.0
+        self._deadline_misses = 0
+
+    ##
+    # Returns the port the runner listens for external devices on, once it has started (see wait_started).
+    def get_port(self):
+        return self._port
+
+    ##
+    # Waits until the runner listens for external devices.
+    async def wait_started(self):
+        while self._started is None:
+            await asyncio.sleep(0)
+        await self._started.wait()
+
+    ##
+    # Returns the simulation time the wall clock is at.
+    def current_time(self):
+        return self._start_time + (time.perf_counter() - self._start_wall) * self._speedup
+
+    def _wall_time_of(self, sim_time):
+        return self._start_wall + (sim_time - self._start_time) / self._speedup
+
+    ##
+    # Runs the simulation to its end time, paced against the wall clock.
+    # @return a RealTimeResult
+
+    async def run(self):
+        supervisor = self._sim.supervisor
+        end_time = self._sim.end_time
+        self._wakeup = asyncio.Event()
+        self._started = asyncio.Event()
+        server = await asyncio.start_server(self._serve, self._host, self._port)
+        self._port = server.sockets[0].getsockname()[1]
+        self._logger.info("Listening for external devices on {}:{}".format(self._host, self._port))
+        self._start_wall = time.perf_counter()
+        self._start_time = self._last_tick_time = 0
+        self._started.set()
+        ticks = [] if self._keep_ticks else None
+        try:
+            while True:
+                self._run_pending()
+                next_time = supervisor.peek_next_event()[1] if supervisor.has_next_event() else None
+                if next_time is None or next_time > end_time:
+                    if time.perf_counter() >= self._wall_time_of(end_time):
+                        break
+                    await self._wait_until(self._wall_time_of(end_time))
+                    continue
+                deadline = self._wall_time_of(next_time)
+                if time.perf_counter() < deadline:
+                    await self._wait_until(deadline)
+                    continue  # run anything sent while waiting first
+                tick = self._run_tick(next_time, deadline)
+                if ticks is not None:
+                    ticks.append(tick)
+        finally:
+            server.close()
+            await server.wait_closed()
+
+        wall_time = time.perf_counter() - self._start_wall
+        result = RealTimeResult(supervisor.finish_all(end_time), self._num_ticks, self._total_lag, self._max_lag,
+                                self._deadline_misses, self._external_devices, self._injected_messages, wall_time,
+                                ticks)
+        self._logger.info("Real time run at {}x: {} ticks, lag mean {:.6f} s, max {:.6f} s, {} deadline misses, "
+                          "{} external devices sent {} messages, total {:.3f} s".format(
+                              self._speedup, result.num_ticks, result.mean_lag, result.max_lag,
+                              result.deadline_misses, len(self._external_devices), self._injected_messages,
+                              wall_time))
+        for handler in self._logger.handlers:
+            handler.flush()
+        return result
+
+    def _run_tick(self, tick_time, deadline):
+        start = time.perf_counter()
+        tick_time, num_events = self._sim.supervisor.occur_next_tick()
+        end = time.perf_counter()
+        self._last_tick_time = tick_time
+        tick = TickStats(tick_time, num_events, start - deadline, end - start, end > deadline + self._deadline_slack)
+        self._num_ticks += 1
+        self._total_lag += tick.lag
+        self._max_lag = max(self._max_lag, tick.lag)
+        if tick.missed:
+            self._deadline_misses += 1
+        self._logger.debug("Tick at {} s: {} events, lag {:.6f} s, took {:.6f} s{}".format(
+            tick_time, num_events, tick.lag, tick.duration, ", missed its deadline" if tick.missed else ""))
+        return tick
+
+    async def _wait_until(self, wall_time):
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), max(wall_time - time.perf_counter(), 0))
+        except asyncio.TimeoutError:
+            pass
+
+    ##
+    # Applies what the external devices sent since the last tick, in the order it arrived.
+    def _run_pending(self):
+        pending, self._pending = self._pending, []
+        for sender_id, item in pending:
+            if isinstance(item, asyncio.StreamWriter):
+                self._replace_device(sender_id, item)
+            else:
+                self._inject(sender_id, item)
+
+    def _replace_device(self, device_id, writer):
+        supervisor = self._sim.supervisor
+        device = supervisor.get_device(device_id)
+        supervisor.replace_devices({device_id: SocketDevice(device_id, device.neighbor_roles, writer)})
+        self._external_devices.append(device_id)
+        self._logger.info("External device replaced {}".format(device_id))
+
+    def _inject(self, sender_id, request):
+        target = self._sim.supervisor.get_device(request["target"])
+        message_time = max(self._last_tick_time, int(math.floor(self.current_time())))
+        target.receive_message(Message(message_time, sender_id, MessageType[request["type"]], request["value"],
+                                       request.get("extra_info")))
+        self._injected_messages += 1
+
+    ##
+    # Serves one external device: reads the device it replaces, then the messages it sends, until it disconnects.
+    async def _serve(self, reader, writer):
+        device_id = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if device_id is None:
+                        device_id = self._check_device(request["device_id"])
+                        self._pending.append((device_id, writer))
+                    else:
+                        self._check_message(request)
+                        self._pending.append((device_id, request))
+                    self._wakeup.set()
+                except (ValueError, KeyError, TypeError) as error:
+                    _write_line(writer, {"error": str(error)})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def _check_device(self, device_id):
+        supervisor = self._sim.supervisor
+        if device_id in self._external_devices or any(device_id == pending[0] for pending in self._pending):
+            raise ValueError("Device {} is already replaced by an external device".format(device_id))
+        supervisor.get_device(device_id)  # raises ValueError if there is no such device
+        return device_id
+
+    def _check_message(self, request):
+        self._sim.supervisor.get_device(request["target"])
+        if request["type"] not in MessageType.__members__:
+            raise ValueError("Unknown message type {}".format(request["type"]))
+        float(request["value"])
+
+
+def _write_line(writer, value):
+    writer.write(json.dumps(value).encode() + b"\n")
+
+
+##
+# Sets up a simulation and runs it paced against the wall clock (see RealTimeRunner).
+# @param config_file the configuration json of the scenario
+# @param override_args list of override arguments in the format 'device_id.attribute_name=value'
+# @param speedup how many simulated seconds pass per second of wall clock time
+# @param host the address to listen for external devices on
+# @param port the port to listen for external devices on, or 0 for any free port
+# @param deadline_slack how long after its wall clock time a tick may finish, in seconds (see RealTimeRunner)
+# @param keep_ticks whether to keep the TickStats of every tick in the result
+# @return a RealTimeResult
+
+def run_realtime_simulation(config_file, override_args, speedup=1.0, host="127.0.0.1", port=0, deadline_slack=None,
+                            keep_ticks=False):
+    sim = SimulationSetup(supervisor=Supervisor())
+    sim.setup_simulation(config_file, override_args)
+    return asyncio.run(RealTimeRunner(sim, speedup, host, port, deadline_slack, keep_ticks).run())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run an LPDM simulation paced against the wall clock")
+    parser.add_argument("config", help="the configuration JSON of the scenario")
+    parser.add_argument("overrides", nargs="*", help="override arguments, as 'device_id.attribute_name=value'")
+    parser.add_argument("--speedup", type=float, default=1.0,
+                        help="simulated seconds per second of wall clock time (default: 1, real time)")
+    parser.add_argument("--host", default="127.0.0.1", help="the address to listen for external devices on")
+    parser.add_argument("--port", type=int, default=0, help="the port to listen for external devices on")
+    parser.add_argument("--deadline-slack", type=float, default=None,
+                        help="seconds a tick may finish after its wall clock time (default: one simulated second)")
+    args = parser.parse_args()
+    print(run_realtime_simulation(args.config, args.overrides, args.speedup, args.host, args.port,
+                                  args.deadline_slack))
@@ -0,0 +1,187 @@
+########################################################################################################################
+# *** Copyright Notice ***
+#
+# "Price Based Local Power Distribution Management System (Local Power Distribution Manager) v2.0"
+# Copyright (c) 2017, The Regents of the University of California, through Lawrence Berkeley National Laboratory
+# (subject to receipt of any required approvals from the U.S. Dept. of Energy).  All rights reserved.
+#
+# If you have questions about your rights to use or distribute this software, please contact
+# Berkeley Lab's Innovation & Partnerships Office at  IPO@lbl.gov.
+########################################################################################################################
+
+"""A recurring event is a series of scheduled occurrences (a daily profile, a periodic update, etc.) of which only the
+next occurrence is kept in the device's event queue. When that occurrence is run, the series places its following
+occurrence onto the queue, so a device's queue does not grow with the length of the simulation.
+
+Occurrences are described by iterables of (time_stamp, order, action, args) tuples in non-decreasing time order,
+where order is the position the occurrence would have had if the whole series had been added to the queue up front.
+The generator functions below build these iterables for the schedule types used by the devices.
+"""
+
+import heapq
+
+from Build.Simulation_Operation.event import Event
+from Build.Simulation_Operation.support import SECONDS_IN_DAY
+
+
+class RecurringEvent(Event):
+
+    __slots__ = ("_device", "_occurrences", "_sequence_base")
+
+    # Occurrences are queued with explicit sequence numbers below those of every individually added event, ordered by
+    # series rank and then by occurrence order. This is the tie-break order the device's queue would have given them
+    # had every occurrence been added when the device was built.
+    SEQUENCE_BASE = -(1 << 62)
+    SEQUENCE_STRIDE = 1 << 40
+
+    ##
+    # @param device the device whose event queue the occurrences are added to
+    # @param occurrences an iterable of (time_stamp, order, action, args) tuples in non-decreasing time order
+    # @param rank the position of this series among all the series of the device, in order of creation
+
+    def __init__(self, device, occurrences, rank):
+        super().__init__(None)
+        self._device = device
+        self._occurrences = iter(occurrences)
+        self._sequence_base = self.SEQUENCE_BASE + rank * self.SEQUENCE_STRIDE
+
+    ##
+    # Adds the next occurrence of the series to the device's queue.
+    # @return whether there was another occurrence to add
+    def schedule_next(self):
+        occurrence = next(self._occurrences, None)
+        if occurrence is None:
+            return False
+        time_stamp, order, self._action, self._args = occurrence
+        self._device.add_event(self, time_stamp, self._sequence_base + order)
+        return True
+
+    ##
+    # Queues the following occurrence of the series, then runs the current one.
+    def run_event(self):
+        action, args = self._action, self._args
+        self.schedule_next()
+        action(*args)
+
+
+##
+# Occurrences of a single action repeating at a fixed interval.
+# @param action the function to call at each occurrence
+# @param start the time of the first occurrence
+# @param interval the time between occurrences (must be positive)
+# @param end occurrences are generated up to, but not including, this time
+# @param args the arguments to pass to the action
+
+def periodic_occurrences(action, start, interval, end, args=()):
+    if interval <= 0:
+        return iter(())
+    return _PeriodicOccurrences(action, start, interval, end, args)
+
+
+##
+# Occurrences of a profile of actions which repeats every period (by default daily).
+# @param profile a list of (offset, action, args) tuples, offset being the time in seconds into the period
+# @param start the start time of the first period
+# @param end periods are started up to, but not including, this time
+# @param period the length of the repeating period in seconds
+
+def profile_occurrences(profile, start, end, period=SECONDS_IN_DAY):
+    if not profile or period <= 0:
+        return iter(())
+    offsets = [offset for offset, action, args in profile]
+    if offsets == sorted(offsets) and offsets[-1] <= offsets[0] + period:
+        # Walking through the profile period by period is already in time order.
+        return _ProfileOccurrences(profile, start, end, period)
+    else:
+        # Offsets overlap the next period, so merge each profile entry's own periodic series into time order.
+        return _MergedProfileOccurrences(profile, start, end, period)
+
+
+##
+# Occurrences of a list of actions that each happen once.
+# @param entries a list of (time_stamp, action, args) tuples, in any order
+def single_occurrences(entries):
+    ordered = sorted(((time_stamp, order, action, args) for order, (time_stamp, action, args) in enumerate(entries)),
+                     key=lambda occurrence: occurrence[:2])
+    return iter(ordered)
+
+
+# The occurrence iterators below keep their position in plain attributes rather than in a generator frame, so that a
+# recurring event part way through its series can be pickled with the rest of the simulation (see checkpoint.py).
+
+class _PeriodicOccurrences:
+
+    def __init__(self, action, start, interval, end, args):
+        self._action = action
+        self._args = args
+        self._interval = interval
+        self._end = end
+        self._time_stamp = start
+        self._order = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        time_stamp = self._time_stamp
+        if time_stamp >= self._end:
+            raise StopIteration
+        order = self._order
+        self._time_stamp = time_stamp + self._interval
+        self._order = order + 1
+        return time_stamp, order, self._action, self._args
+
+
+class _ProfileOccurrences:
+
+    def __init__(self, profile, start, end, period):
+        self._profile = list(profile)
+        self._end = end
+        self._period = period
+        self._period_start = start
+        self._index = 0  # the position in the profile of the next occurrence
+        self._order = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._period_start >= self._end:
+            raise StopIteration
+        offset, action, args = self._profile[self._index]
+        occurrence = (self._period_start + offset, self._order, action, args)
+        self._order += 1
+        self._index += 1
+        if self._index == len(self._profile):
+            self._index = 0
+            self._period_start += self._period
+        return occurrence
+
+
+# Merges each profile entry's own periodic series, ordered as if the whole profile had been walked period by period.
+class _MergedProfileOccurrences:
+
+    def __init__(self, profile, start, end, period):
+        self._profile = list(profile)
+        self._end = end
+        self._period = period
+        # heap of (time_stamp, order, period_start, index) of the next occurrence of each profile entry
+        self._heap = [(start + offset, index, start, index) for index, (offset, action, args) in enumerate(profile)
+                      if start < end]
+        heapq.heapify(self._heap)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self._heap:
+            raise StopIteration
+        time_stamp, order, period_start, index = self._heap[0]
+        offset, action, args = self._profile[index]
+        next_period_start = period_start + self._period
+        if next_period_start < self._end:
+            heapq.heapreplace(self._heap, (next_period_start + offset, order + len(self._profile), next_period_start,
+                                           index))
+        else:
+            heapq.heappop(self._heap)
+        return time_stamp, order, action, args
@@ -0,0 +1,177 @@
+########################################################################################################################
+# *** Copyright Notice ***
+#
+# "Price Based Local Power Distribution Management System (Local Power Distribution Manager) v2.0"
+# Copyright (c) 2017, The Regents of the University of California, through Lawrence Berkeley National Laboratory
+# (subject to receipt of any required approvals from the U.S. Dept. of Energy).  All rights reserved.
+#
+# If you have questions about your rights to use or distribute this software, please contact
+# Berkeley Lab's Innovation & Partnerships Office at  IPO@lbl.gov.
+########################################################################################################################
+
+"""
+A columnar binary sink for the simulation results, written alongside sim_results.log, and a reader for it.
+
+Each device log record (see LogNotation) is stored as one row of four typed columns: time (int64), device (int32 code),
+tag (int32 code) and value (float64, NaN where the value is not numeric). Device ids and tags are dictionary-encoded.
+Rows are collected in fixed-size NumPy buffers and appended chunk by chunk to one raw little-endian file per column,
+so memory use is bounded by the chunk size. A metadata.json file records the column types, the number of rows written
+and the device and tag dictionaries, and is rewritten after every chunk.
+
+Since each column is a single contiguous file, the reader memory-maps it, so even a year-long run is not read into
+memory until the values are used.
+"""
+
+import json
+import logging
+import os
+
+import numpy as np
+
+from Build.Simulation_Operation.support import LogNotation
+
+METADATA_FILENAME = "metadata.json"
+COLUMNS = (("time", "<i8"), ("device", "<i4"), ("tag", "<i4"), ("value", "<f8"))
+
+
+class ColumnarResultsHandler(logging.Handler):
+
+    DEFAULT_CHUNK_SIZE = 65536  # number of rows buffered in memory before they are written out
+
+    ##
+    # @param folder the folder to write the column files and metadata into. It is created if it does not exist.
+    # @param chunk_size the number of rows to buffer before appending them to the column files
+    # @param level the minimum level of records to store
+
+    def __init__(self, folder, chunk_size=DEFAULT_CHUNK_SIZE, level=logging.NOTSET):
+        super().__init__(level)
+        os.makedirs(folder, exist_ok=True)
+        self._folder = folder
+        self._chunk_size = chunk_size
+        self._buffers = {name: np.empty(chunk_size, dtype=dtype) for name, dtype in COLUMNS}
+        self._num_buffered = 0  # number of rows in the buffers
+        self._length = 0  # number of rows written to the column files
+        self._devices = {}  # device id -> code, in order of first appearance
+        self._tags = {}  # tag -> code, in order of first appearance
+        self._files = {name: open(os.path.join(folder, "{}.bin".format(name)), "wb") for name, dtype in COLUMNS}
+        self._write_metadata()
+
+    ##
+    # Stores a device log record as a row. Records which are not a LogNotation (e.g. simulation totals) are ignored.
+    # @param record the logging record
+
+    def emit(self, record):
+        notation = record.msg
+        if not isinstance(notation, LogNotation):
+            return
+        try:
+            value = float(notation.value)
+        except (TypeError, ValueError):
+            value = np.nan
+
+        device_id = str(notation.device_id)
+        device_code = self._devices.get(device_id)
+        if device_code is None:
+            device_code = self._devices[device_id] = len(self._devices)
+        tag = str(notation.tag)
+        tag_code = self._tags.get(tag)
+        if tag_code is None:
+            tag_code = self._tags[tag] = len(self._tags)
+
+        row = self._num_buffered
+        buffers = self._buffers
+        buffers["time"][row] = notation.time
+        buffers["device"][row] = device_code
+        buffers["tag"][row] = tag_code
+        buffers["value"][row] = value
+        self._num_buffered = row + 1
+        if self._num_buffered == self._chunk_size:
+            self._write_chunk()
+
+    ##
+    # Appends the buffered rows to the column files and updates the metadata.
+    def flush(self):
+        self.acquire()
+        try:
+            if self._files:
+                self._write_chunk()
+        finally:
+            self.release()
+
+    ##
+    # Writes out any buffered rows and closes the column files.
+    def close(self):
+        self.acquire()
+        try:
+            if self._files:
+                self._write_chunk()
+                for column_file in self._files.values():
+                    column_file.close()
+                self._files = {}
+        finally:
+            self.release()
+        super().close()
+
+    def _write_chunk(self):
+        num_rows = self._num_buffered
+        for name, dtype in COLUMNS:
+            self._buffers[name][:num_rows].tofile(self._files[name])
+            self._files[name].flush()
+        self._length += num_rows
+        self._num_buffered = 0
+        self._write_metadata()
+
+    def _write_metadata(self):
+        metadata = {
+            "length": self._length,
+            "columns": dict(COLUMNS),
+            "devices": list(self._devices),
+            "tags": list(self._tags)
+        }
+        path = os.path.join(self._folder, METADATA_FILENAME)
+        with open(path + ".tmp", "w") as metadata_file:
+            json.dump(metadata, metadata_file)
+        os.replace(path + ".tmp", path)  # never leave a partially written metadata file
+
+
+class ResultsReader:
+
+    ##
+    # Opens the results written by a ColumnarResultsHandler, memory-mapping each column.
+    # @param folder the folder the results were written into
+
+    def __init__(self, folder):
+        with open(os.path.join(folder, METADATA_FILENAME), "r") as metadata_file:
+            metadata = json.load(metadata_file)
+        self.length = metadata["length"]
+        self.devices = metadata["devices"]  # list of device ids, indexed by code
+        self.tags = metadata["tags"]  # list of tags, indexed by code
+        self._device_codes = {device_id: code for code, device_id in enumerate(self.devices)}
+        self._tag_codes = {tag: code for code, tag in enumerate(self.tags)}
+        self._columns = {}
+        for name, dtype in metadata["columns"].items():
+            if self.length:
+                self._columns[name] = np.memmap(os.path.join(folder, "{}.bin".format(name)), dtype=dtype, mode="r",
+                                                shape=(self.length,))
+            else:
+                self._columns[name] = np.empty(0, dtype=dtype)  # an empty file cannot be memory-mapped
+
+    ##
+    # Returns a whole column, memory-mapped
+    # @param name one of "time", "device", "tag" or "value"
+    def column(self, name):
+        return self._columns[name]
+
+    ##
+    # Returns the times and values logged by a device under a tag, e.g. series("gc_1", "price").
+    # @param device_id the id of the device
+    # @param tag the tag of the records
+    # @return a tuple of arrays of the times and the values, empty if there are no such records
+
+    def series(self, device_id, tag):
+        device_code = self._device_codes.get(str(device_id))
+        tag_code = self._tag_codes.get(str(tag))
+        if device_code is None or tag_code is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        mask = (self._columns["device"] == device_code) & (self._columns["tag"] == tag_code)
+        return np.asarray(self._columns["time"][mask]), np.asarray(self._columns["value"][mask])
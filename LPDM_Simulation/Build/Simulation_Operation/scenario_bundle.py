@@ -0,0 +1,243 @@
+########################################################################################################################
+# *** Copyright Notice ***
+#
+# "Price Based Local Power Distribution Management System (Local Power Distribution Manager) v2.0"
+# Copyright (c) 2017, The Regents of the University of California, through Lawrence Berkeley National Laboratory
+# (subject to receipt of any required approvals from the U.S. Dept. of Energy).  All rights reserved.
+#
+# If you have questions about your rights to use or distribute this software, please contact
+# Berkeley Lab's Innovation & Partnerships Office at  IPO@lbl.gov.
+########################################################################################################################
+
+"""
+Precompiled scenario bundles, so that repeated runs of a scenario start without setting it up again.
+
+Setting up a simulation reads the configuration JSON, applies the overrides, parses every CSV, builds every device
+with its expanded schedules and connects the devices. A bundle is the result: the supervisor with every device built
+and connected and its first events queued, pickled as a checkpoint at time 0 is (see checkpoint.py), together with the
+log settings of the configuration. Loading a bundle skips the JSON and CSV path completely, but it still unpickles
+every device and every schedule entry, so the saving is modest: for JSON_WeekTest (70k schedule entries, a 1.9 MB
+bundle) the setup takes about 0.08 s and loading the bundle about 0.045 s, and for the small bundled scenarios both
+take about a millisecond. Most of the setup time is the expansion of the schedules, which a bundle skips.
+
+As a bundle is a pickle, loading one could run any code. Bundles are therefore signed with an HMAC by a secret key
+kept in ~/.lpdm/bundle.key (created on first use, readable by its owner only), and only bundles signed with that key
+are loaded. A bundle which is unsigned, signed with another key or written by another version of this module is
+compiled again by setup_from_bundle.
+
+Bundles are keyed by a hash of the content of the configuration file, the overrides, the supervisor options and the
+source of the simulation, so a bundle is never used for a changed scenario or a changed simulation. A bundle also
+records the size and modification time of every data file it was built from, and is rebuilt if any has changed.
+By default bundles are kept in scenario_data/.bundles, named after their key.
+
+To compile a bundle ahead of time, e.g. before a sweep, run from the LPDM_Simulation folder:
+    python -m Build.Simulation_Operation.scenario_bundle base-case.json [override arguments]
+"""
+
+import contextlib
+import glob
+import hashlib
+import hmac
+import io
+import json
+import logging
+import os
+import pickle
+import sys
+
+from Build.Simulation_Operation import timeseries
+from Build.Simulation_Operation.simulation import SimulationSetup
+from Build.Simulation_Operation.supervisor import Supervisor
+
+BUNDLE_VERSION = 2  # 2: signed with the bundle key
+BUNDLE_EXTENSION = ".bundle"
+BUNDLE_HEADER = "LPDM bundle {}\n".format(BUNDLE_VERSION).encode()
+SIMULATION_FOLDER = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+BUNDLE_FOLDER = os.path.join(SIMULATION_FOLDER, "scenario_data", ".bundles")
+KEY_FILE = os.path.join(os.path.expanduser("~"), ".lpdm", "bundle.key")
+KEY_SIZE = 32
+# the configuration settings read by SimulationSetup.setup_logging, which are kept in the bundle
+LOG_SETTINGS = ("console_log_level", "file_log_level", "database_log_level", "log_to_database", "database_filename",
+                "results_log_level", "log_to_results")
+
+_code_fingerprint = None
+
+
+##
+# Returns a hash of the source of the simulation (every module of the Build package), computed once per process.
+def code_fingerprint():
+    global _code_fingerprint
+    if _code_fingerprint is None:
+        digest = hashlib.sha256()
+        build_folder = os.path.join(SIMULATION_FOLDER, "Build")
+        for path in sorted(glob.glob(os.path.join(build_folder, "**", "*.py"), recursive=True)):
+            digest.update(os.path.relpath(path, build_folder).encode())
+            with open(path, 'rb') as source:
+                digest.update(source.read())
+        _code_fingerprint = digest.hexdigest()
+    return _code_fingerprint
+
+
+##
+# Returns the secret key bundles are signed with, creating it if there is none yet. The key file is created readable
+# by its owner only, and atomically, so that concurrent sweep workers all end up with the same key.
+# @param key_file the path of the key file. Defaults to KEY_FILE.
+# @return the key, as bytes
+
+def signing_key(key_file=None):
+    key_file = key_file or KEY_FILE
+    try:
+        with open(key_file, 'rb') as key:
+            return key.read()
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(os.path.abspath(key_file)), mode=0o700, exist_ok=True)
+    try:
+        handle = os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:  # another process created it first
+        with open(key_file, 'rb') as key:
+            return key.read()
+    key = os.urandom(KEY_SIZE)
+    with os.fdopen(handle, 'wb') as key_file_handle:
+        key_file_handle.write(key)
+    return key
+
+
+def _signature(key, payload):
+    return hmac.new(key, BUNDLE_HEADER + payload, hashlib.sha256).digest()
+
+
+##
+# Returns the key of the bundle of a scenario: a hash of the content of its configuration file, the overrides, the
+# supervisor options and the source of the simulation.
+# @param config_file the configuration json of the scenario (see SimulationSetup.config_file_path)
+# @param override_args list of override arguments in the format 'device_id.attribute_name=value'
+# @param supervisor_options a dictionary of the keyword arguments of the Supervisor, e.g. {"event_calendar": True}
+# @return the key, as a hexadecimal string
+
+def bundle_key(config_file, override_args, supervisor_options=None):
+    digest = hashlib.sha256()
+    digest.update(json.dumps([BUNDLE_VERSION, code_fingerprint(), list(override_args),
+                              sorted((supervisor_options or {}).items())]).encode())
+    with open(SimulationSetup(supervisor=None).config_file_path(config_file), 'rb') as config:
+        digest.update(config.read())
+    return digest.hexdigest()
+
+
+##
+# Returns the path of the bundle of a scenario in a folder (see bundle_key for the parameters).
+# @param folder the folder of the bundles. Defaults to BUNDLE_FOLDER.
+
+def bundle_path(config_file, override_args, supervisor_options=None, folder=None):
+    return os.path.join(folder or BUNDLE_FOLDER,
+                        bundle_key(config_file, override_args, supervisor_options) + BUNDLE_EXTENSION)
+
+
+##
+# Sets up a scenario without logging and writes it to a signed bundle file. The file is replaced atomically, so
+# concurrent sweep workers compiling the same bundle never read a partly written one.
+# @param config_file the configuration json of the scenario
+# @param override_args list of override arguments in the format 'device_id.attribute_name=value'
+# @param supervisor_options a dictionary of the keyword arguments of the Supervisor
+# @param filename the path of the bundle file. Defaults to the bundle_path of the scenario.
+# @param key_file the path of the file of the key to sign the bundle with (see signing_key)
+# @return the path of the bundle file
+
+def compile_bundle(config_file, override_args, supervisor_options=None, filename=None, key_file=None):
+    filename = filename or bundle_path(config_file, override_args, supervisor_options)
+    sim = SimulationSetup(supervisor=Supervisor(**(supervisor_options or {})))
+    param_dict = sim.read_config_file(sim.config_file_path(config_file))
+    logger = logging.getLogger("lpdm")
+    was_disabled = logger.disabled
+    logger.disabled = True  # devices check their log levels again once loaded (see Device.update_log_levels)
+    timeseries.forget_loaded_files()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):  # the connections are printed as they are made
+            sim.build_simulation(param_dict, override_args)
+    finally:
+        logger.disabled = was_disabled
+    state = {"version": BUNDLE_VERSION, "supervisor": sim.supervisor, "end_time": sim.end_time,
+             "islands": sim.islands, "files": timeseries.loaded_files(),
+             "log_settings": {key: param_dict[key] for key in LOG_SETTINGS if key in param_dict}}
+    os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+    payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    temp_filename = "{}.{}.tmp".format(filename, os.getpid())
+    with open(temp_filename, 'wb') as bundle_file:
+        bundle_file.write(BUNDLE_HEADER)
+        bundle_file.write(_signature(signing_key(key_file), payload))
+        bundle_file.write(payload)
+    os.replace(temp_filename, filename)
+    return filename
+
+
+##
+# Reads a bundle written by compile_bundle, checking its signature before unpickling it.
+# @param filename the path of the bundle file
+# @param key_file the path of the file of the key the bundle must be signed with (see signing_key)
+# @return a dictionary of the bundle's supervisor, end_time, islands, data files and log settings
+# @raise ValueError if the bundle was written by another version of this module, or is not signed with the key
+
+def load_bundle(filename, key_file=None):
+    with open(filename, 'rb') as bundle_file:
+        header = bundle_file.readline()
+        signature = bundle_file.read(hashlib.sha256().digest_size)
+        payload = bundle_file.read()
+    if header != BUNDLE_HEADER:
+        raise ValueError("Unsupported bundle {}: expected a version {} bundle".format(filename, BUNDLE_VERSION))
+    if not hmac.compare_digest(signature, _signature(signing_key(key_file), payload)):
+        raise ValueError("Bundle {} was not signed with this installation's bundle key, so it is not loaded".format(
+            filename))
+    return pickle.loads(payload)
+
+
+##
+# Returns whether the data files a bundle was built from are unchanged.
+# @param state a bundle read by load_bundle
+def is_current(state):
+    for path, (mtime_ns, size) in state["files"].items():
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        if (stat.st_mtime_ns, stat.st_size) != (mtime_ns, size):
+            return False
+    return True
+
+
+##
+# Sets up a simulation from the bundle of a scenario, compiling the bundle first if there is none or it is out of
+# date, and then sets up the logging of the simulation as setup_simulation does.
+# @param config_file the configuration json of the scenario
+# @param override_args list of override arguments in the format 'device_id.attribute_name=value'
+# @param supervisor_options a dictionary of the keyword arguments of the Supervisor
+# @param folder the folder of the bundles. Defaults to BUNDLE_FOLDER.
+# @param key_file the path of the file of the key bundles are signed with (see signing_key)
+# @return the SimulationSetup of the simulation, ready to run
+
+def setup_from_bundle(config_file, override_args, supervisor_options=None, folder=None, key_file=None):
+    filename = bundle_path(config_file, override_args, supervisor_options, folder)
+    state = None
+    if os.path.exists(filename):
+        try:
+            state = load_bundle(filename, key_file)
+        except ValueError as error:  # compiled again below
+            logging.getLogger("lpdm").warning("Ignoring bundle: %s", error)
+    if state is None or not is_current(state):
+        compile_bundle(config_file, override_args, supervisor_options, filename, key_file)
+        state = load_bundle(filename, key_file)
+    sim = SimulationSetup(supervisor=state["supervisor"])
+    sim.end_time = state["end_time"]
+    sim.islands = state["islands"]
+    sim.setup_logging(config_filename=config_file, config=state["log_settings"], override_args=override_args)
+    for device in sim.supervisor.all_devices():
+        device.update_log_levels()
+    logger = logging.getLogger("lpdm")
+    logger.info("Loaded from bundle {}".format(filename))
+    logger.info("Total Run Time (s): {}".format(sim.end_time))
+    return sim
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        raise FileNotFoundError("Must enter a configuration filename")
+    print(compile_bundle(sys.argv[1], sys.argv[2:]))
@@ -0,0 +1,313 @@
+########################################################################################################################
+# *** Copyright Notice ***
+#
+# "Price Based Local Power Distribution Management System (Local Power Distribution Manager) v2.0"
+# Copyright (c) 2017, The Regents of the University of California, through Lawrence Berkeley National Laboratory
+# (subject to receipt of any required approvals from the U.S. Dept. of Energy).  All rights reserved.
+#
+# If you have questions about your rights to use or distribute this software, please contact
+# Berkeley Lab's Innovation & Partnerships Office at  IPO@lbl.gov.
+########################################################################################################################
+
+"""
+Generates synthetic scenarios of any size for scale testing: configuration JSON of the same form as the files in
+scenario_data/configuration_files, and seeded variations of the Load_*.csv load profiles for the load profile EUDs.
+The same arguments and seed always give the same scenario.
+
+The grid controllers are laid out as a tree, a mesh or a chain, with the utility meters on the first of them. Each
+grid controller has a number of EUDs, of types drawn from SimulationSetup's EUD dictionary, and may have a PV. A grid
+controller with a PV also gets a utility meter of its own, since it can only pass on the PV's surplus to a utility meter
+(a PV does not accept being told to produce less). Some EUDs are fed through a converter, and some of the direct links
+are wired. Several scenarios can be combined into one of independent sites (see combine_sites).
+
+Run from the LPDM_Simulation folder, e.g. for 100 buildings of 20 EUDs each:
+    python -m Build.Simulation_Operation.scenario_generator scenario_data/configuration_files/synthetic.json 100 20
+(see the --help of the command for the other options). The configuration can then be run as 'synthetic.json'.
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+
+import numpy as np
+
+from Build.Simulation_Operation.timeseries import load_timeseries, TIME_HMS
+
+LAYOUTS = ("tree", "mesh", "chain")
+LOAD_PROFILE_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))),
+                                   "scenario_data/load_profiles")
+PRICE_SCHEDULE = {"multiday": 1, "items": [[0, 0.10], [11, 0.05], [15, 0.10], [17, 0.15], [23, 0.10]]}
+EFFICIENCY_CURVE = [{"capacity": capacity, "efficiency": efficiency} for capacity, efficiency in
+                    ((-1.0, 0.97), (-0.5, 0.96), (-0.1, 0.9), (0.1, 0.9), (0.5, 0.96), (1.0, 0.97))]
+
+
+##
+# Builds the connections between grid controllers.
+# @param num_gcs the number of grid controllers
+# @param layout "tree" (each grid controller under the one branching places before it), "mesh" (a ring with random
+# extra links) or "chain"
+# @param rng the random number generator of the scenario
+# @param branching the number of children of each grid controller in a tree
+# @param mesh_degree the average number of links of each grid controller in a mesh
+# @return a list of (index, index) links between grid controllers, each listed once
+
+def gc_links(num_gcs, layout, rng, branching=3, mesh_degree=3):
+    if layout == "chain":
+        return [(index - 1, index) for index in range(1, num_gcs)]
+    if layout == "tree":
+        return [((index - 1) // branching, index) for index in range(1, num_gcs)]
+    if layout == "mesh":
+        links = {(index, index + 1) for index in range(num_gcs - 1)}
+        if num_gcs > 2:
+            links.add((0, num_gcs - 1))
+        num_extra = max(0, (num_gcs * mesh_degree) // 2 - len(links))
+        for _ in range(min(num_extra, num_gcs * (num_gcs - 1) // 2 - len(links))):
+            while True:
+                link = tuple(sorted(rng.sample(range(num_gcs), 2)))
+                if link not in links:
+                    links.add(link)
+                    break
+        return sorted(links)
+    raise ValueError("Unknown grid controller layout {}, expected one of {}".format(layout, LAYOUTS))
+
+
+##
+# Writes seeded variations of the Load_*.csv load profiles, each one of them scaled, shifted by a whole number of
+# hours and with multiplicative noise on every value.
+# @param folder the folder to write the profiles to, within scenario_data/load_profiles
+# @param count the number of variations
+# @param seed the seed of the variations
+# @return the list of the profile filenames, relative to scenario_data/load_profiles
+
+def generate_load_profiles(folder, count, seed=0):
+    rng = np.random.default_rng(seed)
+    sources = sorted(glob.glob(os.path.join(LOAD_PROFILE_FOLDER, "Load_*.csv")))
+    if not sources:
+        raise FileNotFoundError("No Load_*.csv profiles in {}".format(LOAD_PROFILE_FOLDER))
+    os.makedirs(os.path.join(LOAD_PROFILE_FOLDER, folder), exist_ok=True)
+    filenames = []
+    for num in range(count):
+        times, powers = load_timeseries(sources[rng.integers(len(sources))], value_column=1, time_format=TIME_HMS)
+        shifted = np.roll(powers, int(rng.integers(24)))
+        varied = shifted * rng.uniform(0.5, 1.5) * rng.lognormal(0.0, 0.1, len(shifted))
+        filename = os.path.join(folder, "Load_var_{}.csv".format(num + 1))
+        with open(os.path.join(LOAD_PROFILE_FOLDER, filename), 'w') as profile_file:
+            profile_file.writelines("{:.1f},{:.6g}\n".format(time, power) for time, power in zip(times, varied))
+        filenames.append(filename)
+    return filenames
+
+
+def _light(rng, eud):
+    on_hour = rng.randint(5, 9)
+    eud.update({"max_operating_power": round(rng.uniform(50.0, 500.0), 1), "modulation_interval": 600,
+                "schedule": {"multiday": 1, "items": [[0, "start_up"], [0, "off"], [on_hour, "on"],
+                                                      [on_hour + rng.randint(2, 6), "off"], [rng.randint(17, 19), "on"],
+                                                      [rng.randint(21, 23), "off"]]}})
+
+
+def _notebook(rng, eud):
+    _light(rng, eud)
+    eud["max_operating_power"] = round(rng.uniform(30.0, 90.0), 1)
+
+
+def _air_conditioner(rng, eud):
+    low_setpoint = rng.uniform(16.0, 19.0)
+    eud.update({"compressor_operating_power": round(rng.uniform(500.0, 1500.0), 1),
+                "initial_temp": round(rng.uniform(22.0, 28.0), 1), "temp_max_delta": 0.5,
+                "initial_set_point": 23.0, "heat_exchange_rate": 0.1, "modulation_interval": 600,
+                "price_to_setpoint": [[0.05, low_setpoint], [0.10, low_setpoint + 4.0], [0.15, low_setpoint + 12.0]],
+                "schedule": {"multiday": 0, "items": [[0, "start_up"]]},
+                "external_data": {"temperature_schedule": {"readin_function": "read_air_conditioner_data",
+                                                           "source_file": "weather_5_secs.csv"}}})
+
+
+def _fixed_consumption(rng, eud):
+    start_hour = rng.randint(6, 9)
+    eud.update({"desired_power_level": round(rng.uniform(20.0, 200.0), 1),
+                "schedule": {"multiday": 1, "items": [[0, "start_up"], [start_hour, "shut_down"],
+                                                      [start_hour + rng.randint(6, 10), "start_up"]]}})
+
+
+def _load_profile(rng, eud, load_profiles):
+    eud.update({"data_filename": rng.choice(load_profiles), "schedule": {"multiday": 0, "items": [[0, "start_up"]]}})
+
+
+# the parameters of each type of EUD, as read by SimulationSetup.make_euds
+EUD_BUILDERS = {"light": _light, "notebook_personal_computer": _notebook, "air_conditioner": _air_conditioner,
+                "fixed_consumption": _fixed_consumption, "load_profile_eud": _load_profile}
+
+
+def _wire(rng, device_id, voltage):
+    return {"device_id": device_id, "voltage": voltage, "resistance": round(rng.uniform(0.01, 0.1), 4)}
+
+
+##
+# Generates the configuration of a synthetic scenario.
+# @param num_gcs the number of grid controllers
+# @param euds_per_gc the number of EUDs on each grid controller
+# @param layout how the grid controllers are connected: "tree", "mesh" or "chain" (see gc_links)
+# @param eud_types the types of EUD to draw from. Defaults to all of EUD_BUILDERS.
+# @param pv_fraction the fraction of grid controllers with a PV
+# @param num_utility_meters the number of utility meters connected to the first grid controllers, besides those of the
+# grid controllers with a PV
+# @param converter_fraction the fraction of EUDs fed through a converter
+# @param wire_fraction the fraction of direct links (between grid controllers, and to EUDs and PVs) which are wired
+# @param load_profiles the load profile filenames (see generate_load_profiles) to draw from for load profile EUDs.
+# Defaults to the bundled Load_*.csv profiles.
+# @param run_time_days the length of the simulation in days
+# @param price_logic the price logic of the grid controllers
+# @param seed the seed of the scenario
+# @param branching the number of children of each grid controller in a tree layout
+# @param mesh_degree the average number of links of each grid controller in a mesh layout
+# @return the configuration dictionary
+
+def generate_scenario(num_gcs, euds_per_gc, layout="tree", eud_types=None, pv_fraction=0.5, num_utility_meters=1,
+                      converter_fraction=0.1, wire_fraction=0.25, load_profiles=None, run_time_days=1,
+                      price_logic="weighted_average", seed=0, branching=3, mesh_degree=3):
+    rng = random.Random(seed)
+    eud_types = list(eud_types) if eud_types else sorted(EUD_BUILDERS)
+    for eud_type in eud_types:
+        if eud_type not in EUD_BUILDERS:
+            raise ValueError("Unknown EUD type {}, expected one of {}".format(eud_type, sorted(EUD_BUILDERS)))
+    if load_profiles is None:
+        load_profiles = sorted(os.path.basename(path)
+                               for path in glob.glob(os.path.join(LOAD_PROFILE_FOLDER, "Load_*.csv")))
+
+    gc_ids = ["gc_{}".format(num + 1) for num in range(num_gcs)]
+    connected = {gc_id: [] for gc_id in gc_ids}
+    grid_controllers, utility_meters, pvs, euds, converters = [], [], [], [], []
+
+    def add_utility_meter(gc_id):
+        utm_id = "utm_{}".format(len(utility_meters) + 1)
+        connected[gc_id].append(utm_id)
+        utility_meters.append({"device_id": utm_id, "capacity": 1e9,
+                               "schedule": {"multiday": 0, "items": [[0, "turn_on"]]},
+                               "buy_price_schedule": PRICE_SCHEDULE, "sell_price_schedule": PRICE_SCHEDULE})
+
+    for num in range(num_utility_meters):
+        add_utility_meter(gc_ids[num % num_gcs])
+
+    for first, second in gc_links(num_gcs, layout, rng, branching, mesh_degree):
+        link = _wire(rng, gc_ids[second], 380) if rng.random() < wire_fraction else gc_ids[second]
+        connected[gc_ids[first]].append(link)
+
+    for gc_num, gc_id in enumerate(gc_ids, 1):
+        if rng.random() < pv_fraction:
+            pv_id = "pv_{}".format(gc_num)
+            if not any(device_id.startswith("utm_") for device_id in connected[gc_id] if isinstance(device_id, str)):
+                add_utility_meter(gc_id)
+            connected[gc_id].append(_wire(rng, pv_id, 380) if rng.random() < wire_fraction else pv_id)
+            pvs.append({"device_id": pv_id, "peak_power": round(rng.uniform(1000.0, 5000.0), 1),
+                        "data_filename": "pv_data_winter.csv"})
+        for eud_num in range(1, euds_per_gc + 1):
+            eud_type = rng.choice(eud_types)
+            eud = {"device_id": "eud_{}_{}".format(gc_num, eud_num), "eud_type": eud_type}
+            if eud_type == "load_profile_eud":
+                _load_profile(rng, eud, load_profiles)
+            else:
+                EUD_BUILDERS[eud_type](rng, eud)
+            euds.append(eud)
+            if rng.random() < converter_fraction:
+                converters.append({"device_id": "conv_{}_{}".format(gc_num, eud_num), "capacity": 10000.0,
+                                   "device_input": gc_id, "device_output": eud["device_id"],
+                                   "efficiency_curve": EFFICIENCY_CURVE})
+            elif rng.random() < wire_fraction:
+                connected[gc_id].append(_wire(rng, eud["device_id"], 48))
+            else:
+                connected[gc_id].append(eud["device_id"])
+        grid_controllers.append({
+            "device_id": gc_id, "price_logic": price_logic, "threshold_alloc": 1, "message_latency": 1,
+            "connected_devices": connected[gc_id],
+            "battery": {"battery_id": "battery_{}".format(gc_num), "price_logic": "hourly_preference",
+                        "capacity": round(rng.uniform(2000.0, 10000.0), 1), "max_discharge_rate": 2000.0,
+                        "max_charge_rate": 2000.0, "starting soc": round(rng.uniform(0.2, 0.8), 2)}})
+
+    return {"run_time_days": run_time_days, "console_log_level": 30, "file_log_level": 20,
+            "devices": {"grid_controllers": grid_controllers, "utility_meters": utility_meters, "pvs": pvs,
+                        "euds": euds, "converters": converters}}
+
+
+##
+# Combines scenarios into one of independent sites, e.g. several campuses simulated together. The devices of each site
+# are renamed after the site (gc_1 of the second site becomes gc_s2_1), and are only connected within their site.
+# @param configs the configuration dictionaries of the sites (see generate_scenario)
+# @return the configuration dictionary of the combined scenario, which runs for as long as the longest site
+
+def combine_sites(configs):
+    devices = {kind: [] for kind in ("grid_controllers", "utility_meters", "pvs", "euds", "converters")}
+    for site_num, config in enumerate(configs, 1):
+        def rename(device_id):
+            kind, rest = device_id.split("_", 1)
+            return "{}_s{}_{}".format(kind, site_num, rest)
+
+        site = json.loads(json.dumps(config["devices"]))  # renamed in a copy
+        for kind, site_devices in site.items():
+            for device in site_devices:
+                device["device_id"] = rename(device["device_id"])
+                for key in ("device_input", "device_output"):
+                    if key in device:
+                        device[key] = rename(device[key])
+                if "connected_devices" in device:
+                    device["connected_devices"] = [
+                        rename(link) if isinstance(link, str) else dict(link, device_id=rename(link["device_id"]))
+                        for link in device["connected_devices"]]
+                if "battery" in device:
+                    device["battery"]["battery_id"] = rename(device["battery"]["battery_id"])
+            devices[kind].extend(site_devices)
+    combined = {key: value for key, value in configs[0].items() if key != "devices"}
+    combined["run_time_days"] = max(config["run_time_days"] for config in configs)
+    combined["devices"] = devices
+    return combined
+
+
+##
+# Writes a scenario configuration to a JSON file.
+# @param config the configuration dictionary
+# @param filename the path of the file to write
+def write_scenario(config, filename):
+    with open(filename, 'w') as config_file:
+        json.dump(config, config_file, indent=1)
+
+
+##
+# Returns the number of devices of each kind in a scenario configuration, and in total.
+def count_devices(config):
+    counts = {kind: len(devices) for kind, devices in config["devices"].items()}
+    counts["total"] = sum(counts.values())
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic LPDM scenario")
+    parser.add_argument("output", help="the configuration JSON file to write")
+    parser.add_argument("num_gcs", type=int, help="the number of grid controllers")
+    parser.add_argument("euds_per_gc", type=int, help="the number of EUDs on each grid controller")
+    parser.add_argument("--layout", choices=LAYOUTS, default="tree")
+    parser.add_argument("--eud-types", nargs="+", choices=sorted(EUD_BUILDERS), default=None)
+    parser.add_argument("--pv-fraction", type=float, default=0.5)
+    parser.add_argument("--utility-meters", type=int, default=1)
+    parser.add_argument("--converter-fraction", type=float, default=0.1)
+    parser.add_argument("--wire-fraction", type=float, default=0.25)
+    parser.add_argument("--load-profiles", type=int, default=0,
+                        help="the number of load profile variations to generate (default: use the bundled profiles)")
+    parser.add_argument("--days", type=int, default=1, help="the length of the simulation in days")
+    parser.add_argument("--price-logic", default="weighted_average")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sites", type=int, default=1,
+                        help="the number of independent sites of this size, each with the next seed (default: 1)")
+    args = parser.parse_args()
+
+    profiles = None
+    if args.load_profiles:
+        profiles = generate_load_profiles("generated_{}".format(args.seed), args.load_profiles, args.seed)
+    sites = [generate_scenario(args.num_gcs, args.euds_per_gc, layout=args.layout, eud_types=args.eud_types,
+                               pv_fraction=args.pv_fraction, num_utility_meters=args.utility_meters,
+                               converter_fraction=args.converter_fraction, wire_fraction=args.wire_fraction,
+                               load_profiles=profiles, run_time_days=args.days, price_logic=args.price_logic,
+                               seed=args.seed + site) for site in range(args.sites)]
+    scenario = sites[0] if args.sites == 1 else combine_sites(sites)
+    write_scenario(scenario, args.output)
+    print("Wrote {} ({})".format(args.output, ", ".join("{} {}".format(count, kind)
+                                                        for kind, count in count_devices(scenario).items())))
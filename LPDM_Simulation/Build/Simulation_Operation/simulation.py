@@ -16,6 +16,7 @@ import json
 import logging
 import os
 import importlib
+import time
 
 from Build.Objects.air_conditioner import AirConditionerSimple
 from Build.Objects.battery import Battery
@@ -31,6 +32,7 @@ from Build.Objects.utility_meter import UtilityMeter
 from Build.Simulation_Operation.logger import SimulationLogger
 from Build.Simulation_Operation.supervisor import Supervisor
 from Build.Simulation_Operation.support import SECONDS_IN_DAY
+from Build.Simulation_Operation.timeseries import load_timeseries, use_sidecars, TIME_HMS, TIME_ROW, TIME_SECONDS
 
 
 class SimulationSetup:
@@ -44,6 +46,8 @@ class SimulationSetup:
     # @param supervisor the supervisor for this simulation
     def __init__(self, supervisor):
         self.end_time = 0  # time until which to run simulation. Update this in setup_simulation.
+        self.log_path = None  # the folder this simulation logs to. Set in setup_logging.
+        self.islands = []  # the device ids of each group of connected devices. Set in connect_devices.
         self.supervisor = supervisor   # Supervisor class orchestrating the simulation.
         # A dictionary of eud class names and their respective constructor input names to read from the JSON file
         self.eud_dictionary = {
@@ -77,8 +81,12 @@ class SimulationSetup:
             file_log_level=config.get("file_log_level", logging.DEBUG),
             database_log_level=config.get("database_log_level", logging.DEBUG),
             log_to_database=config.get("log_to_database", False),
+            database_filename=config.get("database_filename", None),
+            results_log_level=config.get("results_log_level", logging.DEBUG),
+            log_to_results=config.get("log_to_results", False),
         )
         log_manager.initialize_logging(config_filename, override_args)
+        self.log_path = log_manager.simulation_log_path()
 
     #  ________________________JSON READ-IN/DEVICE-INITIALIZATION FUNCTIONS ____________________________________________
 
@@ -216,49 +224,26 @@ class SimulationSetup:
     # Reads in the PV csv data containing information about the proportion of power used at different times during
     # the simulation. Can use PV Watts input
     # @param filename the input filename containing a list of times and associated percentages of peak power
-    # @return a list of tuples of time (seconds), and power produced (watts).
+    # @return a tuple of arrays of the times (seconds) and proportions of peak power, read-only as they may be shared
 
     def read_pv_data(self, filename):
-        data_out = []  # list of tuples of time and power ratios
         pv_data = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))),
                                "scenario_data/pv_data/{}".format(filename))
-        with open(pv_data, 'r') as data:
-            # parsing settings depend on whether PVWatts or LPDM data
-            if filename == "pvwatts_hourly.csv":
-                # Parse data from a PV Watts hourly data format
-                DATASTART = 18
-                DCPOWERIND = 9
-                TIMEPARSE = False
-                POWERSCALAR = 1
+        # parsing settings depend on whether PVWatts or LPDM data
+        if filename == "pvwatts_hourly.csv":
+            # Parse data from a PV Watts hourly data format, with times from the row index in hourly increments
+            times, powers = load_timeseries(pv_data, value_column=9, data_start=18, time_format=TIME_ROW)
+            with open(pv_data, 'r') as data:
                 for i, line in enumerate(data):
                     # Find the kW solar capacity of the PVWatts data
                     if i == 6:
                         parts = line.strip().split(',')
-                        POWERSCALAR = float(parts[1])*1000
+                        powers = powers / (float(parts[1]) * 1000)
                         break
-            else:
-                # Parse data from LPDM power ratio format
-                DATASTART = 0
-                DCPOWERIND = 1
-                TIMEPARSE = True
-                POWERSCALAR = 1
-            # Go through each line in CSV and parse power and time data
-            data.seek(0)
-            for i, line in enumerate(data):
-                if i < DATASTART:
-                    continue
-                parts = line.strip().split(',')
-                if len(parts) >= DCPOWERIND + 1 and parts[0].strip():
-                    time_parts = parts[0].split(':')
-                    if TIMEPARSE and len(time_parts) == 3:
-                        # For LPDM format, Parse time from H:M:S format
-                        time_secs = (int(time_parts[0]) * 60 * 60) + (int(time_parts[1]) * 60) + int(time_parts[2])
-                    else:
-                        # For PVWatts format, get time from row index in hourly increments
-                        time_secs = (i - DATASTART)*3600
-                    power_ratio = float(parts[DCPOWERIND])/POWERSCALAR
-                    data_out.append((time_secs, power_ratio))
-        return data_out
+        else:
+            # Parse data from LPDM power ratio format, with times in H:M:S format
+            times, powers = load_timeseries(pv_data, value_column=1, time_format=TIME_HMS)
+        return times, powers
 
     ##
     # Reads in information from the parameter dictionary, makes all specified PV's and registers them with
@@ -291,20 +276,12 @@ class SimulationSetup:
     ##
     # Reads in the air conditioner temperature data
     # @param filename the name of the input CSV file, containing times and associated temperatures
-    # @return a list of tuples of time(seconds) and temperature (celcius).
+    # @return a tuple of arrays of the times (seconds) and temperatures (celcius), read-only as they are shared
 
     def read_air_conditioner_data(self, filename):
-        data_out = []  # list of tuples of time and temperature values
         ac_data = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))),
                                "scenario_data/air_conditioner_data/{}".format(filename))
-        with open(ac_data, 'r') as data:
-            for line in data:
-                parts = line.strip().split(',')
-                if len(parts) == 2 and parts[0].strip():
-                    time_secs = int(float(parts[0]))
-                    temp = float(parts[1].strip())
-                    data_out.append((time_secs, temp))
-        return data_out
+        return load_timeseries(ac_data, value_column=1, time_format=TIME_SECONDS)
 
     ##
     # Reads in all the information from the JSON about all listed EUD's and creates their connections.
@@ -414,17 +391,29 @@ class SimulationSetup:
     # 'device_X.parameter_Y=Z'
 
     def setup_simulation(self, config_file, override_args_list):
+        phase_start = time.perf_counter_ns()
         # Read in the JSON and turn it into a dictionary.
-        param_dict = self.read_config_file(os.path.join(
-                          os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))),
-                          "scenario_data/configuration_files/{}".format(config_file)))
+        param_dict = self.read_config_file(self.config_file_path(config_file))
+        phase_start = self.record_setup_phase("read_config", phase_start)
 
         self.setup_logging(config_filename=config_file, config=param_dict, override_args=override_args_list)
+        self.record_setup_phase("setup_logging", phase_start)
+        self.build_simulation(param_dict, override_args_list)
 
+    ##
+    # Creates all the devices of a simulation from its parsed configuration and any override parameters, and then
+    # registers all connected devices with each other. Logs to whatever logging is set up (see setup_simulation).
+    # @param param_dict the configuration dictionary parsed from the input JSON file
+    # @param override_args_list the list of unparsed override arguments (see setup_simulation)
 
+    def build_simulation(self, param_dict, override_args_list):
+        phase_start = time.perf_counter_ns()
         # Transform the override list into a dictionary of override key, value dictionary
         overrides = self.parse_inputs_to_dict(override_args_list)
 
+        # Whether to keep parsed input timeseries in .npy files next to the CSVs, to skip parsing them in later runs
+        use_sidecars(param_dict.get("timeseries_sidecars", False))
+
         run_time_days = param_dict['run_time_days']
         run_time_days = int(overrides.get('run_time_days', run_time_days))
         self.end_time = SECONDS_IN_DAY * run_time_days
@@ -434,15 +423,55 @@ class SimulationSetup:
             raise ValueError("Tried to run a simulation with no devices!")
 
         # Makes a list of all device's connections before registering them
-        connections = [self.make_grid_controllers(config=param_dict, runtime=self.end_time, override_args=overrides),
-                       self.make_utility_meters(config=param_dict, runtime=self.end_time, override_args=overrides),
-                       self.make_pvs(config=param_dict, runtime=self.end_time, override_args=overrides),
-                       self.make_euds(config=param_dict, runtime=self.end_time, override_args=overrides),
-                       self.make_converters(config=param_dict, runtime=self.end_time, override_args=overrides)]
+        connections = []
+        for make_devices in (self.make_grid_controllers, self.make_utility_meters, self.make_pvs, self.make_euds,
+                             self.make_converters):
+            connections.append(make_devices(config=param_dict, runtime=self.end_time, override_args=overrides))
+            phase_start = self.record_setup_phase(make_devices.__name__, phase_start)
 
         # connect devices together
         self.connect_devices(connections)
+        phase_start = self.record_setup_phase("connect_devices", phase_start)
         [d.init() for d in self.supervisor.all_devices()]
+        self.record_setup_phase("init_devices", phase_start)
+
+    ##
+    # Records the time of a phase of setup_simulation in the supervisor's profiler, if the simulation is profiled.
+    # @param name the name of the phase
+    # @param start the perf_counter_ns time at which the phase started
+    # @return the time at which the phase ended, i.e. the start of the next phase
+
+    def record_setup_phase(self, name, start):
+        end = time.perf_counter_ns()
+        if self.supervisor.get_profiler() is not None:
+            self.supervisor.get_profiler().record_setup_phase(name, end - start)
+        return end
+
+    ##
+    # Resumes a simulation from a checkpoint instead of creating its devices, setting up logging as configured.
+    # @param config_file the configuration json of the simulation, for its log settings
+    # @param override_args_list the override arguments, to include in the log header
+    # @param checkpoint_file the checkpoint file written by Supervisor.save_checkpoint
+    # @return the simulation time of the checkpoint
+
+    def resume_simulation(self, config_file, override_args_list, checkpoint_file):
+        param_dict = self.read_config_file(self.config_file_path(config_file))
+        self.setup_logging(config_filename=config_file, config=param_dict, override_args=override_args_list)
+        self.supervisor, checkpoint_time, self.end_time = Supervisor.load_checkpoint(checkpoint_file)
+        for device in self.supervisor.all_devices():
+            device.update_log_levels()  # as the logging set up for the resumed simulation may differ
+        logging.getLogger("lpdm").info("Resumed from {} at time (s): {}".format(checkpoint_file, checkpoint_time))
+        logging.getLogger("lpdm").info("Total Run Time (s): {}".format(self.end_time))
+        return checkpoint_time
+
+    ##
+    # Returns the path of a configuration file in the scenario_data/configuration_files folder. An absolute path, e.g.
+    # of a generated configuration, is used as it is.
+    def config_file_path(self, config_file):
+        if os.path.isabs(config_file):
+            return config_file
+        return os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))),
+                            "scenario_data/configuration_files/{}".format(config_file))
 
     def connect_devices(self, connections):
         # For each connection, register those devices with each other
@@ -454,6 +483,31 @@ class SimulationSetup:
                         self.connect_devices_without_wire(this_device_id, this_device, connection_item)
                     elif type(connection_item) is dict:
                         self.connect_devices_with_wire(this_device_id, this_device, connection_item)
+        self.islands = self.find_islands()
+
+    ##
+    # Finds the islands of the simulation: the groups of devices connected to each other but to no other device, which
+    # can be simulated independently of each other (see parallel.run_islands).
+    # @return a list of the device ids of each island in the order the devices were registered, the islands in the
+    # order of their first device
+
+    def find_islands(self):
+        registration_order = {device.get_id(): position
+                              for position, device in enumerate(self.supervisor.all_devices())}
+        islands = []
+        found = set()
+        for device_id in registration_order:
+            if device_id in found:
+                continue
+            island = [device_id]
+            found.add(device_id)
+            for island_device_id in island:  # grows as the island is explored
+                for neighbor_id in self.supervisor.get_device(island_device_id).get_connected_device_ids():
+                    if neighbor_id not in found:
+                        found.add(neighbor_id)
+                        island.append(neighbor_id)
+            islands.append(sorted(island, key=registration_order.get))
+        return islands
 
     def connect_devices_without_wire(self, device_id_a, device_a, device_id_b):
         # connect 2 devices together without any wire information
@@ -505,17 +559,87 @@ class SimulationSetup:
 # Then, iterates through all events created in the simulation and writes output to the log file.
 # @param config_file the configuration json containing the specifications of the run. See docs for more details.
 # @param override_args list of manual parameters to override in the format 'device_id.attribute_name=value'.
-
-def run_simulation(config_file, override_args):
-
-    sim = SimulationSetup(supervisor=Supervisor())
-    sim.setup_simulation(config_file, override_args)
+# @param event_calendar whether to run the simulation on a single event calendar rather than per-device event queues.
+# @param tick_mode whether to process all the devices due at a time together in one supervisor tick, rather than one
+# device at a time. The number of events handled by each tick is summarized in the log.
+# @param message_policy whether to fold superseded and duplicate PRICE and POWER messages on each link rather than
+# deliver every one. The number of messages folded away is summarized in the log.
+# @param checkpoint_file the file to write checkpoints of the simulation to, or to resume the simulation from
+# @param checkpoint_interval if given, write a checkpoint every this many seconds of simulation time
+# @param resume whether to resume the simulation from checkpoint_file rather than start it from the beginning. The
+# event_calendar, message_policy, profile and canonical_order settings are then those of the checkpointed simulation.
+# @param profile whether to count the events and time spent per device, device class and handler, and the time of
+# each setup phase. A table of the counters is logged at the end, and written as JSON to profile.json in the log folder.
+# @param canonical_order whether devices read the messages arriving at the same time in the canonical order (see
+# message_order.py). A partitioned parallel run (see parallel.run_partitioned) reproduces the results of a run with
+# canonical_order=True only: with the default order, devices read such messages in the order they were sent, and the
+# results differ.
+# @param parallel_islands whether to run each island of the simulation, i.e. each group of devices with no connection
+# to the others, in its own process (see parallel.run_islands). The results are the same. Checkpoints, tick mode and
+# profiling do not apply to a simulation run this way, it needs per-device event queues, and it cannot log to the
+# database or columnar results sinks.
+# @param bundle whether to set the simulation up from a precompiled scenario bundle (see scenario_bundle.py), which is
+# compiled first if there is none for the configuration, overrides and options. The devices are then not logged as
+# they are created and connected.
+# @return a SimulationResult summarizing the simulation
+
+def run_simulation(config_file, override_args, event_calendar=False, tick_mode=False, message_policy=False,
+                   checkpoint_file=None, checkpoint_interval=None, resume=False, profile=False, canonical_order=False,
+                   parallel_islands=False, bundle=False):
+
+    if resume:
+        sim = SimulationSetup(supervisor=None)
+        start_time = sim.resume_simulation(config_file, override_args, checkpoint_file)
+    elif bundle:
+        # imported here as bundles are built on this module
+        from Build.Simulation_Operation.scenario_bundle import setup_from_bundle
+        sim = setup_from_bundle(config_file, override_args, {"event_calendar": event_calendar,
+                                                             "message_policy": message_policy, "profile": profile,
+                                                             "canonical_order": canonical_order})
+        start_time = 0
+    else:
+        sim = SimulationSetup(supervisor=Supervisor(event_calendar=event_calendar, message_policy=message_policy,
+                                                    profile=profile, canonical_order=canonical_order))
+        sim.setup_simulation(config_file, override_args)
+        start_time = 0
+    if parallel_islands and not resume and len(sim.islands) > 1:
+        # imported here as the parallel runner is built on this module
+        from Build.Simulation_Operation.parallel import run_islands
+        return run_islands(sim).result
+    next_checkpoint_time = start_time + checkpoint_interval if checkpoint_file and checkpoint_interval else None
 
     while sim.supervisor.has_next_event():
         device_id, time_stamp = sim.supervisor.peek_next_event()
         if time_stamp > sim.end_time:
             # Reached end of simulation. Stop processing events
             break
-        sim.supervisor.occur_next_event()
-
-    sim.supervisor.finish_all(sim.end_time)
+        if next_checkpoint_time is not None and time_stamp >= next_checkpoint_time:
+            sim.supervisor.save_checkpoint(checkpoint_file, next_checkpoint_time, sim.end_time)
+            while next_checkpoint_time <= time_stamp:
+                next_checkpoint_time += checkpoint_interval
+        if tick_mode:
+            sim.supervisor.occur_next_tick()
+        else:
+            sim.supervisor.occur_next_event()
+
+    if tick_mode:
+        tick_stats = sim.supervisor.get_tick_stats()
+        if tick_stats["ticks"]:
+            logging.getLogger("lpdm").info("Ticks: {}, events per tick: mean {:.2f}, max {}".format(
+                tick_stats["ticks"], tick_stats["events"] / tick_stats["ticks"], tick_stats["max_events"]))
+
+    if sim.supervisor.get_message_policy() is not None:
+        logging.getLogger("lpdm").info(
+            "Messages: {delivered} delivered, {superseded} superseded, {duplicates} duplicates dropped".format(
+                **sim.supervisor.get_message_policy().get_stats()))
+
+    profiler = sim.supervisor.get_profiler()
+    if profiler is not None:
+        for line in profiler.format_tables():
+            logging.getLogger("lpdm").info(line)
+        profiler.write_json(os.path.join(sim.log_path, "profile.json"))
+
+    result = sim.supervisor.finish_all(sim.end_time)
+    for handler in logging.getLogger("lpdm").handlers:
+        handler.flush()  # write out any buffered results
+    return result
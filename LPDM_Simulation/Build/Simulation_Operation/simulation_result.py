@@ -0,0 +1,48 @@
+########################################################################################################################
+# *** Copyright Notice ***
+#
+# "Price Based Local Power Distribution Management System (Local Power Distribution Manager) v2.0"
+# Copyright (c) 2017, The Regents of the University of California, through Lawrence Berkeley National Laboratory
+# (subject to receipt of any required approvals from the U.S. Dept. of Energy).  All rights reserved.
+#
+# If you have questions about your rights to use or distribute this software, please contact
+# Berkeley Lab's Innovation & Partnerships Office at  IPO@lbl.gov.
+########################################################################################################################
+
+"""
+The summary of a finished simulation, returned by run_simulation, so that callers get the results of a run without
+reading them back from the log.
+"""
+
+
+class SimulationResult:
+
+    ##
+    # @param end_time the time the simulation ran until, in seconds
+    # @param totals a dictionary of the system totals (see Supervisor.total_calcs)
+    # @param devices a dictionary of device_id to a dictionary of the device's type and energy sums, in Wh
+    # @param batteries a dictionary of battery_id to a dictionary of its grid controller, energy charged and discharged
+    # in Wh, and final state of charge
+    # @param grid_controllers a dictionary of grid controller device_id to its price statistics
+    # (see GridController.get_price_stats)
+
+    def __init__(self, end_time, totals, devices, batteries, grid_controllers):
+        self.end_time = end_time
+        self.totals = totals
+        self.devices = devices
+        self.batteries = batteries
+        self.grid_controllers = grid_controllers
+
+    ##
+    # Returns the result as a dictionary of plain values, e.g. to write out as JSON.
+    def to_dict(self):
+        return {
+            "end_time": self.end_time,
+            "totals": self.totals,
+            "devices": self.devices,
+            "batteries": self.batteries,
+            "grid_controllers": self.grid_controllers
+        }
+
+    def __repr__(self):
+        return "SimulationResult(end_time={}, totals={})".format(self.end_time, self.totals)
@@ -17,17 +17,42 @@ calculating some of the final simulation power statistics.
 """
 
 import logging
+import time
 
+from Build.Simulation_Operation import checkpoint
 from Build.Simulation_Operation.queue import PriorityQueue
+from Build.Simulation_Operation.event_calendar import EventCalendar
+from Build.Simulation_Operation.message_order import CanonicalMessageOrder
+from Build.Simulation_Operation.message_policy import LinkMessagePolicy
+from Build.Simulation_Operation.profiler import SimulationProfiler
 from Build.Objects.converter.converter import Converter
 from Build.Objects.eud import Eud
+from Build.Objects.grid_controller import GridController
+from Build.Simulation_Operation.simulation_result import SimulationResult
 
 
 class Supervisor:
 
-    def __init__(self):
+    ##
+    # @param event_calendar if True, keep the events of all devices in a single event calendar which the supervisor
+    # drains directly, instead of in per-device queues with a supervisor queue of devices. Both process events in the
+    # same order.
+    # @param message_policy if True, devices fold superseded and duplicate PRICE and POWER messages on each link
+    # instead of reading every one of them (see message_policy.py)
+    # @param profile if True, count the events and time spent per device, device class and handler (see profiler.py)
+    # @param canonical_order if True, devices read the messages arriving at the same time in the canonical order (see
+    # message_order.py) rather than the order they were sent, so the results do not depend on the order of the turns
+    def __init__(self, event_calendar=False, message_policy=False, profile=False, canonical_order=False):
         self._event_queue = PriorityQueue()  # queue items are device_ids prioritized by next event time
+        self._event_calendar = EventCalendar() if event_calendar else None
+        self._message_policy = LinkMessagePolicy() if message_policy else None
+        self._profiler = SimulationProfiler() if profile else None
+        self._message_order = CanonicalMessageOrder() if canonical_order else None
+        self._num_ticks = 0  # the number of ticks run by occur_next_tick
+        self._num_tick_events = 0  # the total number of events processed by those ticks
+        self._max_tick_events = 0  # the most events processed by any one tick
         self._devices = {}  # dictionary of device_id's mapping to their associated devices. All devices in simulation.
+        self._stand_ins = {}  # device_id -> stand-in for each device run by another process (see replace_devices)
         self._logger = logging.getLogger("lpdm")  # Setup logging
 
     ##
@@ -37,9 +62,50 @@ class Supervisor:
     def get_device(self, device_id):
         if device_id in self._devices:
             return self._devices[device_id]
+        elif device_id in self._stand_ins:
+            return self._stand_ins[device_id]
         else:
             raise ValueError("There is no such requested device in the simulation " + device_id)
 
+    ##
+    # Returns the single event calendar of the simulation, or None if devices keep their own event queues.
+    def get_event_calendar(self):
+        return self._event_calendar
+
+    ##
+    # Returns the message delivery policy of the simulation, or None if every message is read.
+    def get_message_policy(self):
+        return self._message_policy
+
+    ##
+    # Returns the profiling counters of the simulation, or None if it is not profiled.
+    def get_profiler(self):
+        return self._profiler
+
+    ##
+    # Returns the canonical order of the messages read at the same time, or None if they are read in the order sent.
+    def get_message_order(self):
+        return self._message_order
+
+    ##
+    # Writes the full state of the simulation to a checkpoint file, from which it can be resumed (see checkpoint.py).
+    # Call this between events.
+    # @param filename the path of the checkpoint file
+    # @param time the simulation time of the checkpoint. Every event before it must have been processed, and none after.
+    # @param end_time the time the simulation runs until
+
+    def save_checkpoint(self, filename, time, end_time):
+        checkpoint.save_checkpoint(filename, self, time, end_time)
+
+    ##
+    # Restores a simulation from a checkpoint file written by save_checkpoint.
+    # @param filename the path of the checkpoint file
+    # @return a tuple of the restored supervisor, the time of the checkpoint and the time the simulation runs until
+
+    @staticmethod
+    def load_checkpoint(filename):
+        return checkpoint.load_checkpoint(filename)
+
     ##
     # Returns the list of all devices in the simulation.
     #
@@ -54,6 +120,26 @@ class Supervisor:
     def register_device(self, device):
         device_id = device.get_id()
         self._devices[device_id] = device
+        if self._message_order is not None:
+            self._message_order.add_device(device_id)
+
+    ##
+    # Replaces devices which another process runs (see parallel.py) with stand-ins which pass on the messages sent to
+    # them. The replaced devices are no longer run or finished by this supervisor, and the remaining devices send to
+    # the stand-ins instead. Only for per-device event queues.
+    # @param stand_ins a dictionary of device_id to the stand-in for that device
+
+    def replace_devices(self, stand_ins):
+        if self._event_calendar is not None:
+            raise ValueError("Devices cannot be replaced in a simulation on the event calendar")
+        for device_id, stand_in in stand_ins.items():
+            del self._devices[device_id]
+            if self._event_queue.contains(device_id):
+                self._event_queue.remove(device_id)
+            self._stand_ins[device_id] = stand_in
+        for device in self._devices.values():
+            for device_id, stand_in in stand_ins.items():
+                device.replace_neighbor(device_id, stand_in)
 
     ##
     # Registers an event
@@ -66,55 +152,169 @@ class Supervisor:
     ##
     # Runs the next event in the supervisor's queue, advancing that device's local time to that point
     # Assumes queue is not empty. Call has_next_event first.
+    # @return the number of events the device processed
 
     def occur_next_event(self):
-        device_id, time_of_next_event = self._event_queue.pop()
-        if device_id in self._devices:
+        profiler = self._profiler
+        start = time.perf_counter_ns() if profiler is not None else 0
+        if self._event_calendar is not None:
+            device_id, time_of_next_event = self._event_calendar.peek()
+            device = self._devices[device_id]
+            device.update_time(time_of_next_event)
+            num_events = device.process_events()  # runs the device's events at this time from the calendar
+        else:
+            device_id, time_of_next_event = self._event_queue.pop()
+            if device_id not in self._devices:
+                raise KeyError("Device has not been properly initialized!")
             device = self._devices[device_id]
             device.update_time(time_of_next_event)  # set the device's local time to the time of next event
-            device.process_events()  # process all events at device's local time
+            num_events = device.process_events()  # process all events at device's local time
             if device.has_upcoming_event():
                 device_id, device_next_time = device.report_next_event_time()
                 self.register_event(device_id, device_next_time)  # add the next earliest time for device
-        else:
-            raise KeyError("Device has not been properly initialized!")
+        if profiler is not None:
+            profiler.record_turn(time.perf_counter_ns() - start)
+        return num_events
+
+    ##
+    # Runs a tick: every device due at the time of the next event processes its events at that time, in the order in
+    # which the devices were registered at that time. The due devices are collected from the queue in one pass rather
+    # than being popped and re-peeked one at a time. Events added for the same time during the tick (i.e. zero latency
+    # messages) are left for the following tick at that time.
+    # Assumes queue is not empty. Call has_next_event first.
+    # @return a tuple of the time of the tick and the number of events processed during it
+
+    def occur_next_tick(self):
+        if self._event_calendar is not None:
+            return self._occur_next_calendar_tick()
+        event_queue = self._event_queue
+        device_id, tick_time = event_queue.pop()
+        due_devices = [device_id]
+        while not event_queue.is_empty():
+            device_id, time_of_next_event = event_queue.peek()
+            if time_of_next_event != tick_time:
+                break
+            event_queue.pop()
+            due_devices.append(device_id)
+
+        num_events = 0
+        for device_id in due_devices:
+            if device_id not in self._devices:
+                raise KeyError("Device has not been properly initialized!")
+            device = self._devices[device_id]
+            device.update_time(tick_time)
+            num_events += device.process_events()
+            if device.has_upcoming_event():
+                device_id, device_next_time = device.report_next_event_time()
+                self.register_event(device_id, device_next_time)
+        self._count_tick(num_events)
+        return tick_time, num_events
+
+    ##
+    # Runs a tick from the event calendar, giving each device due at the time of the next event its turn.
+    # @return a tuple of the time of the tick and the number of events processed during it
+
+    def _occur_next_calendar_tick(self):
+        calendar = self._event_calendar
+        device_id, tick_time = calendar.peek()
+        num_events = 0
+        while True:
+            device = self._devices[device_id]
+            device.update_time(tick_time)
+            num_events += device.process_events()
+            if calendar.is_empty():
+                break
+            device_id, time_of_next_event = calendar.peek()
+            if time_of_next_event != tick_time:
+                break
+        self._count_tick(num_events)
+        return tick_time, num_events
+
+    ##
+    # Adds a tick of the given number of events to the tick counters.
+    def _count_tick(self, num_events):
+        self._num_ticks += 1
+        self._num_tick_events += num_events
+        if num_events > self._max_tick_events:
+            self._max_tick_events = num_events
+
+    ##
+    # Returns the counters of the ticks run so far with occur_next_tick: a dictionary of the number of ticks, the total
+    # number of events processed by them and the most events processed by any one tick.
+    def get_tick_stats(self):
+        return {"ticks": self._num_ticks, "events": self._num_tick_events, "max_events": self._max_tick_events}
+
+    ##
+    # Returns the number of events pending across all devices.
+    def pending_event_count(self):
+        if self._event_calendar is not None:
+            return self._event_calendar.size()
+        return sum(device.pending_event_count() for device in self._devices.values())
+
+    ##
+    # Returns the number of devices waiting in the supervisor's queue for their next event (with the event calendar,
+    # the number of devices with pending events).
+    def queued_device_count(self):
+        if self._event_calendar is not None:
+            return sum(1 for device in self._devices.values() if device.has_upcoming_event())
+        return self._event_queue.size()
 
     ##
     # Determines if the simulation is unfinished and there are unprocessed events in its queue
 
     def has_next_event(self):
+        if self._event_calendar is not None:
+            return not self._event_calendar.is_empty()
         return not self._event_queue.is_empty()
 
     ##
     # Returns an (event, time_stamp) with next, or None.
     # Call has next event first to be safe.
     def peek_next_event(self):
+        if self._event_calendar is not None:
+            return self._event_calendar.peek() if self.has_next_event() else None
         if self.has_next_event():
             return self._event_queue.peek()
         else:
             return None
 
     ##
-    # Returns the total simulation power in and total simulation power out for the device.
+    # Logs the total simulation power in and total simulation power out for the device, as well as the losses.
     # Total simulation power in should approximately equal simulation power out, with small margin of error
     # allowed because of float rounding and because message latency slightly affects the calculations.
+    # @return a dictionary of the logged totals (in Wh, efficiency in %)
 
     def total_calcs(self):
+        return self.log_totals([self.energy_sums(device) for device in self._devices.values()])
+
+    ##
+    # Returns the energy sums of a device which make up the system totals.
+    # @return a tuple of the device's power in, power out, wire loss in, wire loss out, converter loss and EUD load
+    @staticmethod
+    def energy_sums(device):
+        return (device._sum_power_in, device._sum_power_out, device._wire_loss_in, device._wire_loss_out,
+                device._converter_loss_energy if isinstance(device, Converter) else 0.0,
+                device._sum_power_in if isinstance(device, Eud) else 0.0)
+
+    ##
+    # Adds up and logs the system totals from the energy sums of every device (see total_calcs).
+    # @param energy_sums a list of the energy_sums of every device, in the order the devices were registered
+    # @return a dictionary of the logged totals (in Wh, efficiency in %)
+
+    def log_totals(self, energy_sums):
         total_power_in = 0.0
         total_power_out = 0.0
         total_wire_loss_in = 0.0
         total_wire_loss_out = 0.0
         total_converter_loss_energy = 0.0
         total_eud_energy = 0.0
-        for device in self._devices.values():
-            total_power_in += device._sum_power_in
-            total_power_out += device._sum_power_out
-            total_wire_loss_in += device._wire_loss_in
-            total_wire_loss_out += device._wire_loss_out
-            if isinstance(device, Converter):
-                total_converter_loss_energy += device._converter_loss_energy
-            if isinstance(device, Eud):
-                total_eud_energy += device._sum_power_in
+        for power_in, power_out, wire_loss_in, wire_loss_out, converter_loss, eud_load in energy_sums:
+            total_power_in += power_in
+            total_power_out += power_out
+            total_wire_loss_in += wire_loss_in
+            total_wire_loss_out += wire_loss_out
+            total_converter_loss_energy += converter_loss
+            total_eud_energy += eud_load
         total_loss_energy = total_converter_loss_energy + total_wire_loss_in
         if total_eud_energy > 0:
             efficiency = 1 - total_loss_energy/total_eud_energy
@@ -128,12 +328,53 @@ class Supervisor:
         self._logger.info("total simulation loss: {} Wh".format(total_loss_energy))
         self._logger.info("total simulation EUD load: {} Wh".format(total_eud_energy))
         self._logger.info("total simulation efficiency: {} %".format(efficiency*100.0))
+        return {
+            "power_in": total_power_in,
+            "power_out": total_power_out,
+            "wire_loss_in": total_wire_loss_in,
+            "wire_loss_out": total_wire_loss_out,
+            "converter_loss": total_converter_loss_energy,
+            "loss": total_loss_energy,
+            "eud_load": total_eud_energy,
+            "efficiency": efficiency * 100.0
+        }
 
     ##
     # Called at the end of the simulation. Finishes each device and instructs them to write their energy
     # consumption calculations
     # @param end_time the time of the finish event, to update each device to so they can perform their calculations.
+    # @return the result of the simulation (see build_result)
     def finish_all(self, end_time):
         for device in self._devices.values():
             device.finish(end_time)
-        self.total_calcs()
+        return self.build_result(end_time, self.total_calcs())
+
+    ##
+    # Collects the summary of the finished simulation: the system totals, the energy sums of every device, the charge
+    # and discharge of every battery and the price statistics of every grid controller.
+    # @param end_time the time the simulation ran until
+    # @param totals the system totals (see total_calcs)
+    # @return a SimulationResult
+
+    def build_result(self, end_time, totals):
+        devices = {}
+        batteries = {}
+        grid_controllers = {}
+        for device_id, device in self._devices.items():
+            devices[device_id] = {
+                "device_type": device.get_type(),
+                "sum_power_in": device._sum_power_in,
+                "sum_power_out": device._sum_power_out,
+                "wire_loss_in": device._wire_loss_in,
+                "wire_loss_out": device._wire_loss_out
+            }
+            if isinstance(device, GridController):
+                grid_controllers[device_id] = device.get_price_stats()
+                battery = device.get_battery()
+                batteries[battery.get_id()] = {
+                    "grid_controller": device_id,
+                    "sum_charge_wh": battery.sum_charge_wh,
+                    "sum_discharge_wh": battery.sum_discharge_wh,
+                    "soc": battery.get_current_soc()
+                }
+        return SimulationResult(end_time, totals, devices, batteries, grid_controllers)
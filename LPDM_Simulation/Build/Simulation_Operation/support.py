@@ -39,4 +39,44 @@ def format_time_from_seconds(seconds):
     (hours, seconds) = divmod(seconds, SECONDS_IN_HOUR)
     (minutes, seconds) = divmod(seconds, SECONDS_IN_MINUTE)
     t_format = datetime.time(hour=hours, minute=minutes, second=seconds).isoformat()
-    return "{} {}".format(days, t_format)
\ No newline at end of file
+    return "{} {}".format(days, t_format)
+
+
+##
+# A structured log record of the form (time, device_id, tag, value, message), passed to the logger in place of a
+# formatted string. The message may be a format string with its arguments kept separately, as with logger.info(msg,
+# *args). Logging formats a record only when a handler actually emits it, so a record which is filtered out costs no
+# string formatting. Handlers can also read the fields directly.
+
+class LogNotation:
+
+    __slots__ = ("time", "device_id", "tag", "value", "message", "args")
+
+    ##
+    # @param time the simulation time in seconds the record is for
+    # @param device_id the id of the device logging the record
+    # @param tag the tag to associate with this record
+    # @param value the value of this record
+    # @param message the message of this record, or a str.format string for args
+    # @param args the arguments to format the message with, if any
+
+    def __init__(self, time, device_id, tag, value, message, args=()):
+        self.time = time
+        self.device_id = device_id
+        self.tag = tag
+        self.value = value
+        self.message = message
+        self.args = args
+
+    ##
+    # Returns the message of the record, formatted with its arguments.
+    def get_message(self):
+        if self.args:
+            return self.message.format(*self.args)
+        return self.message
+
+    ##
+    # Formats the record as "D HH:MM:SS; time; device_id; tag; value; message"
+    def __str__(self):
+        return "{}; {}; {}; {}; {}; {}".format(
+            format_time_from_seconds(self.time), self.time, self.device_id, self.tag, self.value, self.get_message())
@@ -0,0 +1,132 @@
+########################################################################################################################
+# *** Copyright Notice ***
+#
+# "Price Based Local Power Distribution Management System (Local Power Distribution Manager) v2.0"
+# Copyright (c) 2017, The Regents of the University of California, through Lawrence Berkeley National Laboratory
+# (subject to receipt of any required approvals from the U.S. Dept. of Energy).  All rights reserved.
+#
+# If you have questions about your rights to use or distribute this software, please contact
+# Berkeley Lab's Innovation & Partnerships Office at  IPO@lbl.gov.
+########################################################################################################################
+
+"""
+Runs a parameter sweep: one scenario simulated under many sets of override arguments (of the same
+'devices.<id>.<param>=value' form main.py accepts), each in its own worker process, collecting the simulation totals of
+every run into one results table.
+
+Each run logs to its own simulation_N folder as usual. A worker process may run several simulations in turn, so after
+each run the worker closes that run's log handlers, and the console output of the runs is discarded.
+"""
+
+import contextlib
+import csv
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import Build.Simulation_Operation.simulation as sim
+
+# The columns of the results table which hold the simulation totals, in order (see Supervisor.total_calcs)
+TOTALS_COLUMNS = ["power_in", "power_out", "wire_loss_in", "wire_loss_out", "converter_loss", "loss", "eud_load",
+                  "efficiency"]
+
+
+##
+# Builds the override sets for every combination of the values in a grid.
+# @param grid a dictionary of override keys (e.g. 'devices.gc_1.battery_1.capacity') to lists of values
+# @return a list of override sets, each a list of 'key=value' override arguments, with the last key varying fastest
+
+def override_grid(grid):
+    keys = list(grid)
+    return [["{}={}".format(key, value) for key, value in zip(keys, values)]
+            for values in itertools.product(*(grid[key] for key in keys))]
+
+
+##
+# Returns the values of a set of override arguments by key, parsed the way the simulation parses them.
+# @param override_args a list of 'key=value' override arguments
+# @return a dictionary of override keys to values
+
+def override_values(override_args):
+    values = {}
+    for arg in override_args:
+        key_value = arg.split('=')
+        if len(key_value) == 2:
+            key, value = map(str.strip, key_value)
+            values[key] = value
+    return values
+
+
+##
+# Runs one simulation of a sweep. This is the function run in the worker processes.
+# @param config_file the configuration json of the scenario
+# @param override_args the list of override arguments of this run
+# @param event_calendar whether to run the simulation on the single event calendar
+# @param bundle whether to set the simulation up from its precompiled scenario bundle (see scenario_bundle.py)
+# @return a dictionary of the simulation totals, and the log folder of the run
+
+def run_sweep_simulation(config_file, override_args, event_calendar=False, bundle=False):
+    logger = logging.getLogger("lpdm")
+    log_folder = None
+    try:
+        # Runs share the worker's console, so discard it. The console handler writes to stdout for the whole run, so
+        # it must not be kept in memory.
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            result = sim.run_simulation(config_file, override_args, event_calendar=event_calendar, bundle=bundle)
+    finally:
+        # Close this run's handlers, so the next run in this worker does not also log into this run's files.
+        for handler in list(logger.handlers):
+            if isinstance(handler, logging.FileHandler):
+                log_folder = os.path.dirname(handler.baseFilename)
+            logger.removeHandler(handler)
+            handler.close()
+    row = dict(result.totals)
+    row["log_folder"] = log_folder
+    return row
+
+
+##
+# Runs a simulation for each of a number of override sets, in parallel worker processes.
+# @param config_file the configuration json of the scenario
+# @param override_sets a list of override sets, each a list of 'key=value' override arguments
+# @param max_workers the number of worker processes. Defaults to the number of processors.
+# @param event_calendar whether to run the simulations on the single event calendar
+# @param bundle whether to set each simulation up from its precompiled scenario bundle, compiling the bundles which do
+# not exist yet, so that repeating a sweep skips setting up the simulations (see scenario_bundle.py)
+# @return a list of result rows in the order of the override sets. Each row is a dictionary of the override values
+# (by key), the simulation totals, the log folder of the run and an error message if the run failed.
+
+def run_sweep(config_file, override_sets, max_workers=None, event_calendar=False, bundle=False):
+    rows = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run_sweep_simulation, config_file, override_args, event_calendar, bundle)
+                   for override_args in override_sets]
+        for override_args, future in zip(override_sets, futures):
+            row = override_values(override_args)
+            try:
+                row.update(future.result())
+                row["error"] = None
+            except Exception as error:  # one failed run should not lose the results of the others
+                row["error"] = "{}: {}".format(type(error).__name__, error)
+            rows.append(row)
+    return rows
+
+
+##
+# Writes the rows of a sweep to a CSV file, with a column for each override key followed by the totals.
+# @param rows the result rows returned by run_sweep
+# @param filename the path of the CSV file to write
+
+def write_sweep_results(rows, filename):
+    override_keys = []
+    for row in rows:
+        for key in row:
+            if key not in TOTALS_COLUMNS and key not in ("log_folder", "error") and key not in override_keys:
+                override_keys.append(key)
+    columns = override_keys + TOTALS_COLUMNS + ["log_folder", "error"]
+    with open(filename, 'w', newline='') as results_file:
+        writer = csv.DictWriter(results_file, fieldnames=columns)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
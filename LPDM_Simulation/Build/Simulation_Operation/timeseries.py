@@ -0,0 +1,158 @@
+########################################################################################################################
+# *** Copyright Notice ***
+#
+# "Price Based Local Power Distribution Management System (Local Power Distribution Manager) v2.0"
+# Copyright (c) 2017, The Regents of the University of California, through Lawrence Berkeley National Laboratory
+# (subject to receipt of any required approvals from the U.S. Dept. of Energy).  All rights reserved.
+#
+# If you have questions about your rights to use or distribute this software, please contact
+# Berkeley Lab's Innovation & Partnerships Office at  IPO@lbl.gov.
+########################################################################################################################
+
+"""
+Loads the CSV timeseries inputs of the simulation (PV output, load profiles, weather data) into NumPy arrays of times
+(in seconds) and values.
+
+A parsed file is cached for the rest of the process, keyed by its path, modification time and parse settings, so
+devices which share an input file (e.g. several load profiles reading Load_1.csv) only parse it once. Optionally, the
+parsed arrays are also saved as a .npy sidecar in a .timeseries_cache folder next to the CSV, which later processes
+(e.g. the runs of a parameter sweep) load instead of parsing the CSV at all.
+
+The supported time formats are:
+    TIME_HMS: an H:M:S time in the first column. Rows whose first column is not an H:M:S time are instead placed on an
+        hourly grid by their row number, which is how plain-seconds load profiles and PVWatts rows are read.
+    TIME_ROW: always place rows on an hourly grid by their row number (counted from the start of the data).
+    TIME_SECONDS: a time in (possibly fractional) seconds in the first column, truncated to whole seconds.
+"""
+
+import os
+
+import numpy as np
+
+from Build.Simulation_Operation.support import SECONDS_IN_HOUR
+
+TIME_HMS = "hms"
+TIME_ROW = "row"
+TIME_SECONDS = "seconds"
+
+SIDECAR_FOLDER = ".timeseries_cache"
+SIDECAR_DTYPE = np.dtype([("time", "<i8"), ("value", "<f8")])
+
+_cache = {}  # (path, mtime, size, settings) -> (times, values)
+_use_sidecars = False
+_loaded_files = {}  # path -> (mtime, size) of every file loaded in this process (see loaded_files)
+
+
+##
+# Sets whether parsed timeseries are saved to and loaded from .npy sidecar files, for all later loads in this process.
+# @param enabled whether to use sidecar files
+def use_sidecars(enabled):
+    global _use_sidecars
+    _use_sidecars = enabled
+
+
+##
+# Returns the files loaded in this process, e.g. to tell whether what was built from them is out of date.
+# @return a dictionary of the real path of every file loaded to its (modification time in ns, size) when loaded
+def loaded_files():
+    return dict(_loaded_files)
+
+
+##
+# Forgets the files loaded so far (see loaded_files).
+def forget_loaded_files():
+    _loaded_files.clear()
+
+
+##
+# Empties the in-process cache of parsed timeseries.
+def clear_cache():
+    _cache.clear()
+
+
+##
+# Loads a timeseries from a CSV file, from the in-process cache if the file has not changed since it was parsed.
+# The returned arrays are shared by all callers and so are read-only.
+# @param path the path of the CSV file
+# @param value_column the index of the column containing the values
+# @param data_start the number of lines to skip before the data begins
+# @param time_format how the times of rows are determined: TIME_HMS, TIME_ROW or TIME_SECONDS
+# @return a tuple of an int64 array of times in seconds and a float64 array of values
+
+def load_timeseries(path, value_column=1, data_start=0, time_format=TIME_HMS):
+    path = os.path.realpath(path)
+    stat = os.stat(path)
+    settings = (value_column, data_start, time_format)
+    key = (path, stat.st_mtime_ns, stat.st_size, settings)
+    _loaded_files[path] = (stat.st_mtime_ns, stat.st_size)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    sidecar = _sidecar_path(path, settings) if _use_sidecars else None
+    if sidecar is not None and os.path.exists(sidecar) and os.stat(sidecar).st_mtime_ns >= stat.st_mtime_ns:
+        data = np.load(sidecar)
+        times, values = np.ascontiguousarray(data["time"]), np.ascontiguousarray(data["value"])
+    else:
+        times, values = parse_timeseries(path, value_column, data_start, time_format)
+        if sidecar is not None:
+            _write_sidecar(sidecar, times, values)
+
+    times.setflags(write=False)
+    values.setflags(write=False)
+    _cache[key] = (times, values)
+    return times, values
+
+
+##
+# Parses a timeseries from a CSV file (see load_timeseries for the parameters). Rows that do not have a value column
+# or have an empty first column are skipped, although they still count towards the row number. The rows are picked
+# out and parsed by NumPy (np.char and np.loadtxt) rather than one at a time in Python.
+# @return a tuple of an int64 array of times in seconds and a float64 array of values
+
+def parse_timeseries(path, value_column=1, data_start=0, time_format=TIME_HMS):
+    if time_format not in (TIME_HMS, TIME_ROW, TIME_SECONDS):
+        raise ValueError("Unknown timeseries time format {}".format(time_format))
+    with open(path, 'r') as data:  # universal newlines, as some of the data files use '\r' line endings
+        lines = np.char.strip(np.array(data.read().split('\n')[data_start:]))
+
+    # a row has a value column if it has at least value_column commas, and an empty first column if it starts with one
+    is_row = (np.char.count(lines, ',') >= value_column) & ~np.char.startswith(lines, ',')
+    row_numbers = np.flatnonzero(is_row)
+    if not len(row_numbers):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    rows = lines[is_row].tolist()  # np.loadtxt reads a list of str faster than an array of them
+
+    if time_format == TIME_SECONDS:
+        columns = _load_columns(rows, (0, value_column), np.float64, ndmin=2)
+        return columns[:, 0].astype(np.int64), np.ascontiguousarray(columns[:, 1])
+    times = row_numbers.astype(np.int64) * SECONDS_IN_HOUR
+    if time_format == TIME_ROW:
+        return times, _load_columns(rows, value_column, np.float64)
+    columns = _load_columns(rows, (0, value_column), [("time", lines.dtype), ("value", np.float64)])
+    time_fields = columns["time"]
+    is_hms = np.char.count(time_fields, ':') == 2
+    if is_hms.any():
+        hms = np.loadtxt(time_fields[is_hms], dtype=np.int64, delimiter=':', comments=None, ndmin=2)
+        times[is_hms] = hms @ np.array([SECONDS_IN_HOUR, 60, 1], dtype=np.int64)
+    return times, np.ascontiguousarray(columns["value"])
+
+
+def _load_columns(rows, columns, dtype, ndmin=1):
+    return np.loadtxt(rows, dtype=dtype, delimiter=',', comments=None, usecols=columns, ndmin=ndmin)
+
+
+def _sidecar_path(path, settings):
+    folder, filename = os.path.split(path)
+    return os.path.join(folder, SIDECAR_FOLDER, "{}.{}.npy".format(filename, "-".join(str(s) for s in settings)))
+
+
+def _write_sidecar(sidecar, times, values):
+    data = np.empty(len(times), dtype=SIDECAR_DTYPE)
+    data["time"] = times
+    data["value"] = values
+    os.makedirs(os.path.dirname(sidecar), exist_ok=True)
+    temp_path = "{}.{}.tmp".format(sidecar, os.getpid())  # concurrent sweep processes may write the same sidecar
+    with open(temp_path, 'wb') as sidecar_file:
+        np.save(sidecar_file, data)
+    os.replace(temp_path, sidecar)
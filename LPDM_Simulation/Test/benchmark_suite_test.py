@@ -0,0 +1,43 @@
+import unittest
+
+from Benchmark.benchmark_suite import compare_results, run_parallel
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+
+    def test_compare_flags_slowdowns(self):
+        baseline = {"scenarios": [{"scenario": "base-case.json", "events_per_s": 1000.0, "run_s": 1.0}],
+                    "micro": {"priority_queue_cycle": {"ns_per_op": 100.0, "ops": 10}}}
+        current = {"scenarios": [{"scenario": "base-case.json", "events_per_s": 800.0, "run_s": 1.05}],
+                   "micro": {"priority_queue_cycle": {"ns_per_op": 90.0, "ops": 10}}}
+        rows = {row[0]: row for row in compare_results(baseline, current, threshold=0.1)}
+        self.assertTrue(rows["base-case.json.events_per_s"][4])
+        self.assertAlmostEqual(rows["base-case.json.events_per_s"][3], 0.2)
+        self.assertFalse(rows["base-case.json.run_s"][4])
+        self.assertFalse(rows["priority_queue_cycle"][4])
+
+    def test_compare_skips_unmatched_measurements(self):
+        baseline = {"scenarios": [{"scenario": "wire.json", "error": "IndexError"}],
+                    "micro": {"priority_queue_cycle": {"ns_per_op": 100.0, "ops": 10}}}
+        current = {"scenarios": [{"scenario": "wire.json", "events_per_s": 800.0}],
+                   "micro": {"priority_queue_cycle": {"ns_per_op": 200.0, "ops": 1000}}}
+        self.assertEqual(compare_results(baseline, current), [])
+
+    def test_compare_parallel_speedup(self):
+        baseline = {"parallel": [{"scenario": "mesh_8x16", "partitions": 2, "speedup": 1.5},
+                                 {"scenario": "mesh_16x16", "partitions": 2, "speedup": 1.5}]}
+        current = {"parallel": [{"scenario": "mesh_8x16", "partitions": 2, "speedup": 1.2},
+                                {"scenario": "mesh_16x16", "partitions": 4, "speedup": 3.0}]}
+        rows = compare_results(baseline, current, threshold=0.1)
+        self.assertEqual([row[0] for row in rows], ["mesh_8x16.parallel_speedup"])
+        self.assertTrue(rows[0][4])
+
+    def test_parallel_run_matches_canonical_order(self):
+        run, = run_parallel([(2, 2)], num_partitions=2, repeats=1, run_seconds=3600)
+        self.assertEqual(run["partitions"], 2)
+        self.assertTrue(run["matches_canonical"])
+        self.assertGreater(run["speedup"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+from Build.Objects.battery import Battery
+from Build.Objects.fixed_consumption import FixedConsumption
+from Build.Objects.grid_controller import GridController
+from Build.Simulation_Operation.branching import BranchedSimulationResult, resolve_overrides
+from Build.Simulation_Operation.simulation import SimulationSetup
+from Build.Simulation_Operation.supervisor import Supervisor
+
+
+class TestResolveOverrides(unittest.TestCase):
+
+    def setUp(self):
+        self.sim = SimulationSetup(supervisor=Supervisor())
+        self.battery = Battery("batt_1", price_logic="hourly_preference", capacity=5000.0, max_charge_rate=2000.0,
+                               max_discharge_rate=2000.0)
+        self.gc = GridController(device_id="gc_1", supervisor=self.sim.supervisor, battery=self.battery,
+                                 price_logic='weighted_average', min_alloc_response_threshold=0.5)
+        self.eud = FixedConsumption(device_id="eud_1", supervisor=self.sim.supervisor, desired_power_level=100.0,
+                                    total_runtime=86400, modulation_interval=0)
+        self.sim.supervisor.register_device(self.gc)
+        self.sim.supervisor.register_device(self.eud)
+
+    def test_changes_applied_only_when_called(self):
+        changes = resolve_overrides(self.sim, ["devices.gc_1.batt_1.capacity=8000", "devices.gc_1.message_latency=5",
+                                               "devices.eud_1.desired_power_level=50"])
+        self.assertEqual(self.battery._capacity, 5000.0)
+        for change in changes:
+            change()
+        self.assertEqual(self.battery._capacity, 8000.0)
+        self.assertEqual(self.gc._msg_latency, 5)
+        self.assertEqual(self.eud._desired_power_level, 50.0)
+
+    def test_discharge_rate_keeps_allocation_threshold(self):
+        for change in resolve_overrides(self.sim, ["devices.gc_1.batt_1.max_discharge_rate=4000"]):
+            change()
+        self.assertEqual(self.battery.get_max_discharge_rate(), 4000.0)
+        self.assertEqual(self.gc._minimum_allocate, 2000.0)
+
+    def test_rejected_overrides(self):
+        for override in ("devices.gc_1.price_logic=marginal_price", "devices.gc_2.message_latency=5",
+                         "devices.gc_1.batt_2.capacity=8000", "run_time_days=3"):
+            with self.assertRaises(ValueError):
+                resolve_overrides(self.sim, [override])
+
+    def test_time_saved(self):
+        branched = BranchedSimulationResult(100, [None, None, None], prefix_time=2.0, branch_times=[1.0, 1.0, 2.0],
+                                            wall_time=5.0)
+        self.assertEqual(branched.serial_time(), 10.0)
+        self.assertEqual(branched.time_saved(), 5.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from Build.Objects.battery import Battery
+from Build.Objects.grid_controller import GridController
+from Build.Simulation_Operation.checkpoint import CHECKPOINT_VERSION
+from Build.Simulation_Operation.queue import PriorityQueue
+from Build.Simulation_Operation.recurring_event import periodic_occurrences, profile_occurrences
+from Build.Simulation_Operation.supervisor import Supervisor
+
+
+def _make_supervisor(event_calendar=False):
+    sup = Supervisor(event_calendar=event_calendar)
+    for gc_id, batt_id in (("gc_1", "batt_1"), ("gc_2", "batt_2")):
+        batt = Battery(batt_id, price_logic="hourly_preference", capacity=5000.0, max_charge_rate=2000.0,
+                       max_discharge_rate=2000.0)
+        sup.register_device(GridController(device_id=gc_id, supervisor=sup, battery=batt,
+                                           price_logic='weighted_average', total_runtime=86400))
+    gc_1, gc_2 = sup.get_device("gc_1"), sup.get_device("gc_2")
+    gc_1.register_device(gc_2, "gc_2", 1)
+    gc_2.register_device(gc_1, "gc_1", 1)
+    return sup
+
+
+def _run_until(sup, end_time):
+    while sup.has_next_event() and sup.peek_next_event()[1] <= end_time:
+        sup.occur_next_event()
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.filename = tempfile.mkstemp(suffix=".ckpt")
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def test_occurrences_resume_after_pickling(self):
+        profile = [(0, max, (1, 2)), (43200, min, (1, 2)), (90000, abs, (-1,))]
+        for occurrences in (periodic_occurrences(abs, 0, 900, 86400, args=(-1,)),
+                            profile_occurrences(profile[:2], 0, 3 * 86400),
+                            profile_occurrences(profile, 0, 3 * 86400)):
+            next(occurrences)
+            restored = pickle.loads(pickle.dumps(occurrences))
+            self.assertEqual(list(restored), list(occurrences))
+
+    def test_queue_drops_tombstones(self):
+        queue = PriorityQueue()
+        for task in range(5):
+            queue.add(task, 10 - task)
+        queue.remove(2)
+        queue.add(4, 20)
+        restored = pickle.loads(pickle.dumps(queue))
+        self.assertEqual(restored.get_stats()["tombstones"], 0)
+        self.assertEqual([restored.pop() for _ in range(restored.size())], [(3, 7), (1, 9), (0, 10), (4, 20)])
+
+    def test_resumed_run_matches_uninterrupted_run(self):
+        for event_calendar in (False, True):
+            uninterrupted = _make_supervisor(event_calendar)
+            _run_until(uninterrupted, 86400)
+            interrupted = _make_supervisor(event_calendar)
+            _run_until(interrupted, 40000)
+            interrupted.save_checkpoint(self.filename, 40000, 86400)
+            resumed, time, end_time = Supervisor.load_checkpoint(self.filename)
+            self.assertEqual((time, end_time), (40000, 86400))
+            _run_until(resumed, end_time)
+            self.assertEqual(resumed.finish_all(end_time).to_dict(), uninterrupted.finish_all(86400).to_dict())
+
+    def test_version_1_checkpoint_rejected(self):
+        supervisor = _make_supervisor()
+        with open(self.filename, 'wb') as checkpoint_file:
+            pickle.dump({"version": 1, "time": 0, "end_time": 86400, "supervisor": supervisor}, checkpoint_file)
+        expected = "Unsupported checkpoint version 1 in .*reads version {} checkpoints".format(CHECKPOINT_VERSION)
+        with self.assertRaisesRegex(ValueError, expected):
+            Supervisor.load_checkpoint(self.filename)
+
+    def test_version_mismatch(self):
+        with open(self.filename, 'wb') as checkpoint_file:
+            pickle.dump({"version": -1}, checkpoint_file)
+        with self.assertRaises(ValueError):
+            Supervisor.load_checkpoint(self.filename)
+
+
+if __name__ == '__main__':
+    unittest.main()
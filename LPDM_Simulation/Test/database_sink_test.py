@@ -0,0 +1,60 @@
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from Build.Simulation_Operation.database_sink import SQLiteLogHandler
+from Build.Simulation_Operation.support import LogNotation
+
+
+class TestSQLiteLogHandler(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, "results.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def emit(self, handler, msg):
+        handler.handle(logging.LogRecord("lpdm", logging.INFO, __file__, 0, msg, None, None))
+
+    def query(self, sql):
+        connection = sqlite3.connect(self.filename)
+        try:
+            return connection.execute(sql).fetchall()
+        finally:
+            connection.close()
+
+    def test_records_written_in_batches(self):
+        handler = SQLiteLogHandler(self.filename, run_name="simulation_1", batch_size=3, max_queued_batches=2)
+        for time in range(10):
+            self.emit(handler, LogNotation(time, "gc_1", "price", time * 0.5, "price changed"))
+        self.emit(handler, LogNotation(10, "gc_1", "turn_off", "1", "turn off"))
+        self.emit(handler, LogNotation(10, "gc_1", None, "on", "state"))
+        self.emit(handler, "total simulation power in: 5 Wh")
+        handler.flush()
+        self.assertEqual(self.query("SELECT COUNT(*) FROM records"), [(13,)])
+        handler.close()
+
+        self.assertEqual(self.query("SELECT time, value FROM records WHERE device_id = 'gc_1' AND tag = 'price' "
+                                    "ORDER BY time LIMIT 2"), [(0, 0.0), (1, 0.5)])
+        self.assertEqual(self.query("SELECT value FROM records WHERE tag = 'turn_off'"), [(1.0,)])
+        self.assertEqual(self.query("SELECT value FROM records WHERE device_id = 'gc_1' AND tag IS NULL"), [("on",)])
+        self.assertEqual(self.query("SELECT message FROM records WHERE device_id IS NULL"),
+                         [("total simulation power in: 5 Wh",)])
+        self.assertEqual(self.query("PRAGMA journal_mode"), [("wal",)])
+
+    def test_runs_share_database(self):
+        for run_name in ["simulation_1", "simulation_2"]:
+            handler = SQLiteLogHandler(self.filename, run_name=run_name)
+            self.emit(handler, LogNotation(0, "gc_1", "price", 0.1, ""))
+            handler.close()
+        self.assertEqual(self.query("SELECT run_id, run_name FROM runs"), [(1, "simulation_1"), (2, "simulation_2")])
+        self.assertEqual(self.query("SELECT run_id FROM records ORDER BY run_id"), [(1,), (2,)])
+
+
+if __name__ == '__main__':
+    unittest.main()
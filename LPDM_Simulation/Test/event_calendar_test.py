@@ -0,0 +1,62 @@
+import unittest
+
+from Build.Simulation_Operation.event import Event
+from Build.Simulation_Operation.event_calendar import EventCalendar
+
+
+class TestEventCalendar(unittest.TestCase):
+
+    def setUp(self):
+        self.calendar = EventCalendar()
+        self.processed = []
+
+    def make_event(self, name, time_stamp=None, device_id=None, follow_up=None):
+        def action():
+            self.processed.append(name)
+            if follow_up:
+                self.calendar.add(device_id, self.make_event(follow_up), time_stamp)
+        return Event(action)
+
+    def run_all(self):
+        while not self.calendar.is_empty():
+            device_id, time_stamp = self.calendar.peek()
+            self.calendar.run_events(device_id, time_stamp)
+
+    def test_is_empty(self):
+        self.assertTrue(self.calendar.is_empty())
+        self.calendar.add("d1", self.make_event("a"), 5)
+        self.assertFalse(self.calendar.is_empty())
+        self.assertEqual(self.calendar.size(), 1)
+        self.assertTrue(self.calendar.has_events("d1"))
+        self.assertFalse(self.calendar.has_events("d2"))
+        self.assertEqual(self.calendar.next_event_time("d1"), 5)
+
+    def test_peek_empty_raises(self):
+        with self.assertRaises(KeyError):
+            self.calendar.peek()
+
+    def test_time_order(self):
+        self.calendar.add("d1", self.make_event("late"), 10)
+        self.calendar.add("d2", self.make_event("early"), 1)
+        self.assertEqual(self.calendar.peek(), ("d2", 1))
+        self.run_all()
+        self.assertEqual(self.processed, ["early", "late"])
+
+    def test_devices_take_turns_in_registration_order(self):
+        self.calendar.add("d1", self.make_event("d1_a"), 0)
+        self.calendar.add("d2", self.make_event("d2_a"), 0)
+        self.calendar.add("d1", self.make_event("d1_b"), 0)  # moves d1 behind d2
+        self.run_all()
+        self.assertEqual(self.processed, ["d2_a", "d1_a", "d1_b"])
+
+    def test_events_added_during_turn_run_in_same_turn(self):
+        self.calendar.add("d1", self.make_event("d1_a", 0, "d1", follow_up="d1_b"), 0)
+        self.calendar.add("d2", self.make_event("d2_a", 0, "d1", follow_up="d1_c"), 0)
+        self.run_all()
+        # d1 runs both of its events in its turn, and gets a second turn for the event d2 gave it.
+        self.assertEqual(self.processed, ["d1_a", "d1_b", "d2_a", "d1_c"])
+        self.assertTrue(self.calendar.is_empty())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from Build.Objects.battery import Battery
+from Build.Objects.converter.converter import Converter
+from Build.Objects.grid_controller import GridController
+from Build.Objects.light import Light
+from Build.Simulation_Operation.message import MessageType
+from Build.Simulation_Operation.supervisor import Supervisor
+
+
+class TestLight(unittest.TestCase):
+
+    def setUp(self):
+        self.sup = Supervisor()
+        self.light = Light(device_id="eud_1", supervisor=self.sup, max_operating_power=500.0)
+        batt = Battery("batt_1", price_logic="hourly_preference", capacity=5000.0, max_charge_rate=2000.0,
+                       max_discharge_rate=2000.0)
+        self.gc = GridController(device_id="gc_1", supervisor=self.sup, battery=batt, price_logic='weighted_average')
+        self.converter = Converter(device_id="cv_1", supervisor=self.sup, device_input="gc_1", device_output="eud_1",
+                                   capacity=2000)
+        for device in (self.light, self.gc, self.converter):
+            self.sup.register_device(device)
+        self.light.register_device(self.gc, "gc_1", 1)
+        self.light.register_device(self.converter, "cv_1", 1)
+
+    def queued_messages(self, device):
+        messages = []
+        while device.has_upcoming_event():
+            event, time_stamp = device._queue.pop()
+            if hasattr(event, "get_message"):
+                message = event.get_message()
+                messages.append((message.sender_id, message.message_type, message.value))
+        return messages
+
+    def test_off_zeroes_only_grid_controllers(self):
+        self.light.change_load_in("gc_1", 200.0)
+        self.light.change_load_in("cv_1", 300.0)
+        self.light.off()
+        self.assertEqual(self.light._loads_in["gc_1"], 0)
+        self.assertIn(("eud_1", MessageType.POWER, 0), self.queued_messages(self.gc))
+        # as in the baseline, a neighbor which is not a grid controller is left alone
+        self.assertEqual(self.light._loads_in["cv_1"], 300.0)
+        self.assertEqual(self.queued_messages(self.converter), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import logging
+import unittest
+
+from Build.Objects.fixed_consumption import FixedConsumption
+from Build.Simulation_Operation.supervisor import Supervisor
+from Build.Simulation_Operation.support import LogNotation
+
+
+class TestLogNotation(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("lpdm")
+        self.old_level = self.logger.level
+
+    def tearDown(self):
+        self.logger.setLevel(self.old_level)
+
+    def make_eud(self):
+        return FixedConsumption(device_id="eud_1", supervisor=Supervisor(), total_runtime=3600,
+                                modulation_interval=300, desired_power_level=100.0)
+
+    def test_format(self):
+        record = LogNotation(90061, "eud_1", "power", 5.0, "power changed")
+        self.assertEqual(str(record), "1 01:01:01; 90061; eud_1; power; 5.0; power changed")
+
+    def test_message_args_formatted_on_emit(self):
+        record = LogNotation(60, "eud_1", "power", 5.0, "POWER to {} at {}", ("gc_1", 5.0))
+        self.assertEqual(record.get_message(), "POWER to gc_1 at 5.0")
+        self.assertEqual(str(record), "0 00:01:00; 60; eud_1; power; 5.0; POWER to gc_1 at 5.0")
+        self.assertEqual(LogNotation(60, "eud_1", None, None, "no {} args").get_message(), "no {} args")
+
+    def test_record_is_passed_unformatted(self):
+        self.logger.setLevel(logging.INFO)
+        eud = self.make_eud()
+        with self.assertLogs("lpdm", level=logging.INFO) as logs:
+            eud.log_notation("a message", tag="a tag", value=1)
+        record = logs.records[0].msg
+        self.assertIsInstance(record, LogNotation)
+        self.assertEqual((record.device_id, record.tag, record.value), ("eud_1", "a tag", 1))
+        with self.assertLogs("lpdm", level=logging.INFO) as logs:
+            eud.log_notation("POWER to {}", "gc_1", tag="power_out", value=5.0)
+        record = logs.records[0].msg
+        self.assertEqual((record.message, record.args), ("POWER to {}", ("gc_1",)))
+        self.assertTrue(logs.output[0].endswith("power_out; 5.0; POWER to gc_1"))
+
+    def test_disabled_logging_creates_no_records(self):
+        self.logger.setLevel(logging.WARNING)
+        eud = self.make_eud()
+        self.logger.setLevel(logging.INFO)  # the device checked the level when it was built
+        handler = logging.Handler()
+        handler.emit = self.fail
+        self.logger.addHandler(handler)
+        try:
+            eud.log_notation("a message", tag="a tag", value=1)
+        finally:
+            self.logger.removeHandler(handler)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import random
+import unittest
+
+from Build.Objects.grid_controller import GCMarginalPriceLogic, GCMarginalPriceLogicB, GCWeightedAveragePriceLogic
+from Build.Objects.market_book import ExactSum, MarketBook
+
+
+class TestMarketBook(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(0)
+        self.book = MarketBook()
+        for _ in range(2000):  # random changes, with repeated neighbors and prices
+            neighbor_id = "gc_{}".format(rng.randint(1, 40))
+            change = rng.randrange(4)
+            if change == 0:
+                self.book.set_price(neighbor_id, rng.choice([0.05, 0.1, 0.15, rng.uniform(-0.1, 0.3)]))
+            elif change == 1:
+                self.book.set_requested(neighbor_id, rng.uniform(-100.0, 100.0))
+            elif change == 2:
+                self.book.set_allocated(neighbor_id, rng.uniform(-100.0, 100.0))
+            else:
+                self.book.set_load(neighbor_id, rng.uniform(-100.0, 100.0))
+
+    def test_order_matches_sorting(self):
+        book = self.book
+        self.assertEqual([neighbor_id for price, neighbor_id in book.by_price()],
+                         [neighbor_id for neighbor_id, price in sorted(book.prices.items(), key=lambda x: x[1])])
+        self.assertEqual([neighbor_id for price, neighbor_id in book.allocated_in_by_price()],
+                         [neighbor_id for neighbor_id, price in sorted(book.prices.items(), key=lambda x: x[1])
+                          if book.allocated.get(neighbor_id, -1) > 0])
+
+    def test_totals_match_summing(self):
+        book = self.book
+        self.assertAlmostEqual(book.get_requested_out(), -sum(min(value, 0) for value in book.requested.values()))
+        self.assertAlmostEqual(book.get_allocate_assets(), sum(max(value - book.loads.get(neighbor_id, 0), 0)
+                                                               for neighbor_id, value in book.allocated.items()
+                                                               if value > 0))
+        self.assertAlmostEqual(book.get_allocate_liabilities(), -sum(min(value - book.loads.get(neighbor_id, 0), 0)
+                                                                     for neighbor_id, value in book.allocated.items()
+                                                                     if value < 0))
+
+    def test_price_logics_match_scanning(self):
+        book = self.book
+        utility_meters = ("gc_1",)
+        for battery_power in (-500.0, 0.0, 500.0):
+            self.assertAlmostEqual(GCWeightedAveragePriceLogic(3600, 0.1, 0.01).calc_price(
+                book.prices, book.loads, book.requested, book.allocated, battery_power, utility_meters,
+                market_book=book), _weighted_average_price(book))
+            self.assertEqual(GCMarginalPriceLogic(3600, 0.1, 0.01).calc_price(
+                book.prices, book.loads, book.requested, book.allocated, battery_power, utility_meters,
+                market_book=book), _marginal_price(book, utility_meters))
+            self.assertAlmostEqual(GCMarginalPriceLogicB(3600, 0.1, 0.01).calc_price(
+                book.prices, book.loads, book.requested, book.allocated, battery_power, utility_meters),
+                _marginal_price_b(book, battery_power, utility_meters))
+
+    def test_exact_sum(self):
+        total = ExactSum()
+        for value in (1e16, 1.0, -1e16, 0.1, 0.2):
+            total.add(value)
+        self.assertEqual(total.value(), 1.3)
+        for value in (1.0, 0.1, 0.2):
+            total.add(-value)
+        self.assertEqual(total.value(), 0)
+
+
+# The prices worked out by scanning every neighbor, as the price logics did before the market book
+
+
+def _weighted_average_price(book):
+    loads_in = [(load, book.prices.get(source, 0)) for source, load in book.loads.items() if load > 0]
+    loads_in = [(load, price) for load, price in loads_in if price >= 0]
+    return sum(price * load for load, price in loads_in) / sum(load for load, price in loads_in)
+
+
+def _marginal_price(book, utility_meters):
+    return min(price for source, price in book.prices.items()
+               if book.allocated.get(source, -1) > 0 or source in utility_meters)
+
+
+def _marginal_price_b(book, battery_power, utility_meters):
+    remaining = -sum(min(request, 0) for request in book.requested.values()) + battery_power
+    prices_from_cheapest = sorted(book.prices.items(), key=lambda x: x[1])
+    if remaining < 0:
+        return 0.9 * prices_from_cheapest[0][1]
+    marginal_price = float('inf')
+    for source, price in prices_from_cheapest:
+        if book.allocated.get(source, -1) > 0:
+            remaining -= book.allocated[source]
+            marginal_price = price
+            if remaining < 0:
+                break
+    return min([marginal_price] + [book.prices[utm_id] for utm_id in utility_meters if utm_id in book.prices])
+
+
+if __name__ == '__main__':
+    unittest.main()
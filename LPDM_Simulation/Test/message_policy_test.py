@@ -0,0 +1,55 @@
+import unittest
+
+from Build.Objects.battery import Battery
+from Build.Objects.grid_controller import GridController
+from Build.Simulation_Operation.message import Message, MessageType
+from Build.Simulation_Operation.supervisor import Supervisor
+
+
+class TestLinkMessagePolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.sup = Supervisor(message_policy=True)
+        batt = Battery("batt_1", price_logic="hourly_preference", capacity=5000.0, max_charge_rate=2000.0,
+                       max_discharge_rate=2000.0)
+        self.gc1 = GridController(device_id="gc_1", supervisor=self.sup, battery=batt, price_logic='weighted_average')
+        self.gc2 = GridController(device_id="gc_2", supervisor=self.sup, battery=batt, price_logic='weighted_average')
+        self.sup.register_device(self.gc1)
+        self.sup.register_device(self.gc2)
+        self.gc1._connected_devices["gc_2"] = self.gc2
+        self.gc2._connected_devices["gc_1"] = self.gc1
+        self.policy = self.sup.get_message_policy()
+
+    def test_newer_message_supersedes(self):
+        self.gc1.receive_message(Message.acquire(0, "gc_2", MessageType.PRICE, 0.2))
+        self.gc1.receive_message(Message.acquire(0, "gc_2", MessageType.PRICE, 0.3))
+        self.gc1.process_events()
+        self.assertEqual(self.gc1._neighbor_prices["gc_2"], 0.3)
+        self.assertEqual(self.policy.get_stats(), {"delivered": 1, "superseded": 1, "duplicates": 0})
+
+    def test_duplicate_dropped(self):
+        self.gc1.receive_message(Message.acquire(0, "gc_2", MessageType.PRICE, 0.2))
+        self.gc1.process_events()
+        num_queued = self.gc1._queue.size()
+        self.gc1.receive_message(Message.acquire(0, "gc_2", MessageType.PRICE, 0.2))
+        self.assertEqual(self.gc1._queue.size(), num_queued)
+        self.assertEqual(self.policy.get_stats(), {"delivered": 1, "superseded": 0, "duplicates": 1})
+
+    def test_superseded_back_to_delivered_value(self):
+        self.gc1.receive_message(Message.acquire(0, "gc_2", MessageType.PRICE, 0.2))
+        self.gc1.process_events()
+        self.gc1.receive_message(Message.acquire(0, "gc_2", MessageType.PRICE, 0.3))
+        self.gc1.receive_message(Message.acquire(0, "gc_2", MessageType.PRICE, 0.2))
+        self.gc1.process_events()  # the event runs, but the message is not read again
+        self.assertEqual(self.policy.get_stats(), {"delivered": 1, "superseded": 1, "duplicates": 1})
+
+    def test_other_types_always_delivered(self):
+        num_queued = self.gc1._queue.size()
+        self.gc1.receive_message(Message.acquire(0, "gc_2", MessageType.REGISTER, 1))
+        self.gc1.receive_message(Message.acquire(0, "gc_2", MessageType.REGISTER, 1))
+        self.assertEqual(self.gc1._queue.size(), num_queued + 2)
+        self.assertEqual(self.policy.get_stats()["delivered"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
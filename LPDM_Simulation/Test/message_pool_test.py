@@ -0,0 +1,52 @@
+import unittest
+
+from Build.Objects.battery import Battery
+from Build.Objects.grid_controller import GridController
+from Build.Simulation_Operation.event import MessageEvent
+from Build.Simulation_Operation.message import Message, MessageType
+from Build.Simulation_Operation.supervisor import Supervisor
+
+
+class TestMessagePool(unittest.TestCase):
+
+    def setUp(self):
+        Message._free.clear()
+        MessageEvent._free.clear()
+
+    def test_acquired_message_recycled(self):
+        message = Message.acquire(0, "gc_1", MessageType.PRICE, 0.1, extra_info=0.2)
+        message.release()
+        reused = Message.acquire(5, "gc_2", MessageType.POWER, 10)
+        self.assertIs(reused, message)
+        self.assertEqual((reused.time, reused.sender_id, reused.message_type, reused.value, reused.extra_info),
+                         (5, "gc_2", MessageType.POWER, 10, None))
+
+    def test_constructed_message_not_recycled(self):
+        message = Message(0, "gc_1", MessageType.PRICE, 0.1)
+        message.release()
+        self.assertIsNot(Message.acquire(0, "gc_1", MessageType.PRICE, 0.1), message)
+
+    def test_message_event_delivers_and_recycles(self):
+        sup = Supervisor()
+        batt = Battery("batt_1", price_logic="hourly_preference", capacity=5000.0, max_charge_rate=2000.0,
+                       max_discharge_rate=2000.0)
+        gc = GridController(device_id="gc_1", supervisor=sup, battery=batt, price_logic='weighted_average')
+        sender = GridController(device_id="gc_2", supervisor=sup, battery=batt, price_logic='weighted_average')
+        sup.register_device(gc)
+        sup.register_device(sender)
+        gc.receive_message(Message.acquire(0, "gc_2", MessageType.REGISTER, 1))
+        gc.process_events()
+        self.assertEqual(len(MessageEvent._free), 1)
+        self.assertEqual(len(Message._free), 1)
+
+    def test_device_core_fields_slotted(self):
+        sup = Supervisor()
+        batt = Battery("batt_1", price_logic="hourly_preference", capacity=5000.0, max_charge_rate=2000.0,
+                       max_discharge_rate=2000.0)
+        gc = GridController(device_id="gc_1", supervisor=sup, battery=batt, price_logic='weighted_average')
+        self.assertNotIn("_time", gc.__dict__)
+        self.assertEqual(gc._time, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+
+from Build.Objects.battery import Battery
+from Build.Objects.device import ROLE_EUD, ROLE_GRID_EQUIPMENT, ROLE_UTILITY_METER, ROLE_CONVERTER, ROLE_GRID_CONTROLLER
+from Build.Objects.fixed_consumption import FixedConsumption
+from Build.Objects.grid_controller import GridController
+from Build.Objects.utility_meter import UtilityMeter
+from Build.Simulation_Operation.supervisor import Supervisor
+
+
+class TestNeighborRoles(unittest.TestCase):
+
+    def setUp(self):
+        self.sup = Supervisor()
+        batt = Battery("batt_1", price_logic="hourly_preference", capacity=5000.0, max_charge_rate=2000.0,
+                       max_discharge_rate=2000.0)
+        self.gc = GridController(device_id="gc_1", supervisor=self.sup, battery=batt, price_logic='weighted_average')
+        self.utm = UtilityMeter(device_id="utm_1", supervisor=self.sup)
+        self.eud = FixedConsumption(device_id="eud_1", supervisor=self.sup, total_runtime=3600, modulation_interval=600,
+                                    desired_power_level=100)
+        for device in (self.gc, self.utm, self.eud):
+            self.sup.register_device(device)
+
+    def test_registered_by_role(self):
+        self.gc.register_device(self.eud, "eud_1", 1)
+        self.gc.register_device(self.utm, "utm_1", 1)
+        self.assertEqual(list(self.gc.get_neighbors(ROLE_GRID_EQUIPMENT)), ["utm_1"])
+        self.assertEqual(list(self.gc.get_neighbors(ROLE_UTILITY_METER)), ["utm_1"])
+        self.assertEqual(list(self.gc.get_neighbors(ROLE_EUD)), ["eud_1"])
+        self.assertEqual(list(self.gc.get_neighbors(ROLE_CONVERTER)), [])
+        self.assertEqual(list(self.gc.get_neighbors(ROLE_GRID_CONTROLLER)), [])
+
+    def test_engaged_by_role(self):
+        self.eud.engage([self.gc])
+        self.assertIs(self.eud.get_neighbors(ROLE_GRID_EQUIPMENT)["gc_1"], self.gc)
+        self.assertIs(self.eud.get_neighbors(ROLE_GRID_CONTROLLER)["gc_1"], self.gc)
+
+    def test_unregistered_is_not_indexed(self):
+        self.gc.register_device(self.utm, "utm_1", -1)
+        self.assertNotIn("utm_1", self.gc.get_neighbors(ROLE_UTILITY_METER))
+
+
+if __name__ == '__main__':
+    unittest.main()
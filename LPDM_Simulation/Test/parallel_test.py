@@ -0,0 +1,139 @@
+import logging
+import os
+import unittest
+
+from Build.Objects.fixed_consumption import FixedConsumption
+from Build.Simulation_Operation.message import Message, MessageType
+from Build.Simulation_Operation.message_order import CanonicalMessageOrder
+from Build.Simulation_Operation.parallel import group_islands, partition_devices, run_islands, run_partitioned
+from Build.Simulation_Operation.scenario_generator import combine_sites, generate_scenario
+from Build.Simulation_Operation.simulation import SimulationSetup
+from Build.Simulation_Operation.supervisor import Supervisor
+
+
+def setup_scenario(config, canonical_order=True):
+    sim = SimulationSetup(supervisor=Supervisor(canonical_order=canonical_order))
+    sim.end_time = 86400 * config["run_time_days"]
+    connections = [make_devices(config, sim.end_time, {})
+                   for make_devices in (sim.make_grid_controllers, sim.make_utility_meters, sim.make_pvs,
+                                        sim.make_euds, sim.make_converters)]
+    sim.connect_devices(connections)
+    for device in sim.supervisor.all_devices():
+        device.init()
+    return sim
+
+
+def run_sequential(sim):
+    supervisor = sim.supervisor
+    while supervisor.has_next_event() and supervisor.peek_next_event()[1] <= sim.end_time:
+        supervisor.occur_next_event()
+    return supervisor.finish_all(sim.end_time)
+
+
+class TestCanonicalMessageOrder(unittest.TestCase):
+
+    def test_order_of_senders_not_of_sending(self):
+        supervisor = Supervisor(canonical_order=True)
+        euds = [FixedConsumption(device_id="eud_{}".format(num), supervisor=supervisor, desired_power_level=10.0,
+                                 total_runtime=86400, modulation_interval=0, msg_latency=1) for num in range(3)]
+        for eud in euds:
+            supervisor.register_device(eud)
+        receiver = euds[0]
+        for sender_id in ("eud_2", "eud_1", "eud_2"):  # eud_2 sends first, but was registered after eud_1
+            receiver.receive_message(Message(5, sender_id, MessageType.PRICE, 0.1))
+        queued = []
+        while receiver.has_upcoming_event():
+            event, time_stamp = receiver._queue.pop()
+            queued.append((time_stamp, event.get_message().sender_id))
+        self.assertEqual(queued, [(6, "eud_1"), (6, "eud_2"), (6, "eud_2")])
+
+    def test_count_restarts_each_arrival_time(self):
+        order = CanonicalMessageOrder()
+        order.add_device("gc_1")
+        order.add_device("eud_1")
+        order.add_device("gc_1")  # keeps its rank
+        self.assertEqual([order.sequence("gc_1", "eud_1", 10) for _ in range(2)], [1 << 32, (1 << 32) + 1])
+        self.assertEqual(order.sequence("gc_1", "eud_1", 11), 1 << 32)
+        self.assertEqual(order.sequence("eud_1", "gc_1", 11), 0)
+
+
+class TestParallelSimulation(unittest.TestCase):
+
+    def setUp(self):
+        self.config = generate_scenario(5, 3, layout="mesh", num_utility_meters=5, converter_fraction=0.3,
+                                        wire_fraction=0.5, eud_types=["light", "fixed_consumption"], seed=2)
+
+    def test_partitions_cover_every_device_once(self):
+        sim = setup_scenario(self.config)
+        device_ids = [device.get_id() for device in sim.supervisor.all_devices()]
+        for num_partitions in (1, 2, 5, 50):
+            partitions = partition_devices(sim.supervisor, num_partitions)
+            self.assertEqual(len(partitions), min(num_partitions, 5))
+            self.assertEqual(sorted(sum(partitions, [])), sorted(device_ids))
+            for partition in partitions:
+                self.assertTrue(any(device_id.startswith("gc_") for device_id in partition))
+        with self.assertRaises(ValueError):
+            partition_devices(sim.supervisor, 0)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "runs partitions in forked processes")
+    def test_matches_sequential_run(self):
+        expected = run_sequential(setup_scenario(self.config)).to_dict()
+        for num_partitions in (1, 3):
+            parallel = run_partitioned(setup_scenario(self.config), num_partitions)
+            self.assertEqual(len(parallel.partitions), num_partitions)
+            self.assertEqual(parallel.result.to_dict(), expected)
+        self.assertGreater(parallel.remote_messages, 0)
+
+    def test_needs_canonical_order_and_latency(self):
+        with self.assertRaises(ValueError):
+            run_partitioned(setup_scenario(self.config, canonical_order=False), 2)
+        sim = setup_scenario(self.config)
+        next(iter(sim.supervisor.all_devices()))._msg_latency = 0
+        with self.assertRaises(ValueError):
+            run_partitioned(sim, 2)
+
+    def test_refuses_unsupported_log_sinks(self):
+        logger = logging.getLogger("lpdm")
+        handler = logging.Handler()  # as the database and columnar results sinks are
+        logger.addHandler(handler)
+        try:
+            with self.assertRaises(ValueError):
+                run_partitioned(setup_scenario(self.config), 2)
+            with self.assertRaises(ValueError):
+                run_islands(setup_scenario(self.config, canonical_order=False), 2)
+        finally:
+            logger.removeHandler(handler)
+
+
+class TestIslands(unittest.TestCase):
+
+    def setUp(self):
+        self.config = combine_sites([generate_scenario(num_gcs, 2, num_utility_meters=num_gcs, seed=num_gcs,
+                                                       eud_types=["light", "fixed_consumption"])
+                                     for num_gcs in (2, 1, 3)])
+
+    def test_find_islands(self):
+        islands = setup_scenario(self.config, canonical_order=False).islands
+        self.assertEqual(len(islands), 3)
+        for site_num, island in enumerate(islands, 1):
+            self.assertTrue(all("_s{}_".format(site_num) in device_id for device_id in island))
+        self.assertEqual(islands[0][:2], ["gc_s1_1", "gc_s1_2"])  # in the order the devices were registered
+
+    def test_group_islands(self):
+        islands = [["a"] * 5, ["b"] * 2, ["c"] * 4, ["d"] * 3]
+        self.assertEqual(group_islands(islands, 2), [["a"] * 5 + ["b"] * 2, ["c"] * 4 + ["d"] * 3])
+        self.assertEqual(len(group_islands(islands, 8)), 4)
+        with self.assertRaises(ValueError):
+            group_islands(islands, 0)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "runs islands in forked processes")
+    def test_matches_sequential_run(self):
+        expected = run_sequential(setup_scenario(self.config, canonical_order=False)).to_dict()
+        parallel = run_islands(setup_scenario(self.config, canonical_order=False), 2)
+        self.assertEqual(len(parallel.partitions), 2)
+        self.assertEqual(parallel.remote_messages, 0)
+        self.assertEqual(parallel.result.to_dict(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import random
+import unittest
+
+from Build.Objects.grid_controller import GCWeightedAveragePriceLogic
+from Build.Simulation_Operation.price_history import IntervalPriceHistory
+
+
+class TestIntervalPriceHistory(unittest.TestCase):
+
+    def test_statistics_match_recomputing_the_window(self):
+        rng = random.Random(0)
+        for window in (1, 2, 5, 24):
+            history = IntervalPriceHistory(0.1, window, history_intervals=3 * window)
+            prices = []  # price of every interval so far, the current one last
+            for _ in range(500):
+                if prices and rng.random() < 0.6:
+                    prices[-1] = rng.uniform(0.0, 1.0)  # update the current interval
+                else:
+                    prices.append(rng.uniform(0.0, 1.0))
+                history.set_price(len(prices) - 1, prices[-1])
+                expected = ([0.1] * window + prices)[-window:]
+                self.assertAlmostEqual(history.get_mean(), sum(expected) / window)
+                self.assertEqual(history.get_min(), min(expected))
+                self.assertEqual(history.get_max(), max(expected))
+            self.assertEqual(list(history.get_prices(2 * window)), prices[-2 * window:])
+
+    def test_skipped_intervals_keep_the_price(self):
+        history = IntervalPriceHistory(0.1, 4, history_intervals=8)
+        history.set_price(0, 0.2)
+        history.set_price(3, 0.5)
+        self.assertEqual([history.get_price(interval) for interval in range(4)], [0.2, 0.2, 0.2, 0.5])
+        self.assertAlmostEqual(history.get_mean(), 1.1 / 4)
+        self.assertEqual(history.get_price(-3), 0.1)
+        with self.assertRaises(ValueError):
+            history.set_price(2, 0.3)
+
+    def test_grid_controller_interval_prices(self):
+        logic = GCWeightedAveragePriceLogic(3600, 0.1, 0.01)
+        for hour in range(1, 30):
+            logic.set_current_price(0.1 + hour / 100.0)
+            logic.update_prices(hour * 3600)
+        interval_prices = logic.get_interval_prices()
+        self.assertEqual(len(interval_prices), 24)
+        self.assertAlmostEqual(interval_prices[5], 0.39)  # 5am of the second day
+        self.assertAlmostEqual(interval_prices[6], 0.16)  # 6am of the first day
+        self.assertAlmostEqual(logic.get_forecast_price(6 * 3600), 0.16)
+        self.assertAlmostEqual(logic.get_interval_history().get_mean(), sum(interval_prices) / 24)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -61,5 +61,30 @@ class TestPriorityQueue(unittest.TestCase):
         self.assertEqual(self.pq.pop(), ("a", 3))
         self.assertEqual(self.pq.pop(), ("c", 5))
 
+    def test_peek_does_not_change_heap(self):
+        self.pq.add("two", 2)
+        self.pq.add("one", 1)
+        heap = list(self.pq._pq)
+        self.assertEqual(self.pq.peek(), ("one", 1))
+        self.assertEqual(self.pq._pq, heap)
+
+    def test_peek_discards_front_tombstones(self):
+        self.pq.add("one", 1)
+        self.pq.add("two", 2)
+        self.pq.remove("one")
+        self.assertEqual(self.pq.get_stats()["tombstones"], 1)
+        self.assertEqual(self.pq.peek(), ("two", 2))
+        self.assertEqual(self.pq.get_stats()["tombstones"], 0)
+
+    def test_heap_compacts_on_repeated_updates(self):
+        for i in range(10000):
+            self.pq.add("task_{}".format(i % 10), i)
+        stats = self.pq.get_stats()
+        self.assertEqual(stats["size"], 10)
+        self.assertEqual(self.pq.size(), 10)
+        self.assertLessEqual(stats["heap_size"], 2 * (self.pq.COMPACT_MIN_TOMBSTONES + 10))
+        self.assertGreater(stats["compactions"], 0)
+        self.assertEqual([self.pq.pop() for _ in range(10)], [("task_{}".format(i % 10), i) for i in range(9990, 10000)])
+
 if __name__ == '__main__':
     unittest.main()
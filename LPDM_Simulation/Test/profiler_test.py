@@ -0,0 +1,60 @@
+import json
+import os
+import tempfile
+import unittest
+
+from Build.Objects.battery import Battery
+from Build.Objects.grid_controller import GridController
+from Build.Simulation_Operation.message import Message, MessageType
+from Build.Simulation_Operation.supervisor import Supervisor
+
+
+class TestSimulationProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.sup = Supervisor(profile=True)
+        batt = Battery("batt_1", price_logic="hourly_preference", capacity=5000.0, max_charge_rate=2000.0,
+                       max_discharge_rate=2000.0)
+        self.gc = GridController(device_id="gc_1", supervisor=self.sup, battery=batt, price_logic='weighted_average',
+                                 total_runtime=3600)
+        self.sup.register_device(self.gc)
+        self.profiler = self.sup.get_profiler()
+
+    def run_all(self):
+        while self.sup.has_next_event():
+            self.sup.occur_next_event()
+
+    def test_counts_by_device_class_and_handler(self):
+        self.gc.receive_message(Message.acquire(0, "gc_2", MessageType.PRICE, 0.2))
+        self.run_all()
+        profile = self.profiler.to_dict()
+        handlers = {row["handler"]: row for row in profile["handlers"]}
+        self.assertEqual(handlers["GridController.read_message[PRICE]"]["events"], 1)
+        self.assertIn("GridController.update_battery", handlers)
+        num_events = sum(row["events"] for row in profile["handlers"])
+        self.assertEqual(profile["devices"][0]["device_id"], "gc_1")
+        self.assertEqual(profile["devices"][0]["events"], num_events)
+        self.assertEqual(profile["device_classes"][0]["device_class"], "GridController")
+        self.assertGreater(profile["turns"]["count"], 0)
+        self.assertGreaterEqual(profile["turns"]["ns"], profile["turns"]["event_ns"])
+
+    def test_rows_sorted_and_written_as_json(self):
+        self.run_all()
+        profile = self.profiler.to_dict()
+        times = [row["ns"] for row in profile["handlers"]]
+        self.assertEqual(times, sorted(times, reverse=True))
+        handle, filename = tempfile.mkstemp(suffix=".json")
+        os.close(handle)
+        try:
+            self.profiler.write_json(filename)
+            with open(filename) as profile_file:
+                self.assertEqual(json.load(profile_file), profile)
+        finally:
+            os.remove(filename)
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(Supervisor().get_profiler())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import asyncio
+import json
+import unittest
+
+from Build.Simulation_Operation.realtime import RealTimeRunner
+from Build.Simulation_Operation.scenario_generator import generate_scenario
+from Build.Simulation_Operation.simulation import SimulationSetup
+from Build.Simulation_Operation.supervisor import Supervisor
+
+
+def setup_scenario(end_time):
+    config = generate_scenario(1, 2, pv_fraction=0.0, converter_fraction=0.0, wire_fraction=0.0,
+                               eud_types=["fixed_consumption"], seed=1)
+    sim = SimulationSetup(supervisor=Supervisor())
+    sim.end_time = end_time
+    connections = [make_devices(config, 86400, {})
+                   for make_devices in (sim.make_grid_controllers, sim.make_utility_meters, sim.make_pvs,
+                                        sim.make_euds, sim.make_converters)]
+    sim.connect_devices(connections)
+    for device in sim.supervisor.all_devices():
+        device.init()
+    return sim
+
+
+class TestRealTimeRunner(unittest.TestCase):
+
+    def test_paced_against_wall_clock(self):
+        runner = RealTimeRunner(setup_scenario(3600), speedup=20000.0, keep_ticks=True)
+        result = asyncio.run(runner.run())
+        self.assertGreater(len(result.ticks), 0)
+        self.assertGreaterEqual(result.wall_time, 3600 / 20000.0)
+        self.assertEqual([tick.time for tick in result.ticks], sorted(tick.time for tick in result.ticks))
+        self.assertLessEqual(result.deadline_misses, len(result.ticks))
+        self.assertGreaterEqual(result.max_lag, result.mean_lag)
+        self.assertIn("gc_1", result.result.devices)
+        self.assertEqual(result.num_ticks, len(result.ticks))
+        self.assertEqual(result.max_lag, max(tick.lag for tick in result.ticks))
+        self.assertEqual(result.deadline_misses, sum(1 for tick in result.ticks if tick.missed))
+        self.assertAlmostEqual(result.mean_lag, sum(tick.lag for tick in result.ticks) / len(result.ticks))
+
+    def test_only_summary_kept_by_default(self):
+        result = asyncio.run(RealTimeRunner(setup_scenario(600), speedup=20000.0).run())
+        self.assertIsNone(result.ticks)
+        self.assertGreater(result.num_ticks, 0)
+        self.assertGreaterEqual(result.max_lag, result.mean_lag)
+
+    def test_external_device(self):
+        runner = RealTimeRunner(setup_scenario(600), speedup=2000.0)
+
+        async def external_device():
+            await runner.wait_started()
+            reader, writer = await asyncio.open_connection("127.0.0.1", runner.get_port())
+            writer.write(b'{"device_id": "eud_1_1"}\n')
+            writer.write(b'{"target": "gc_1", "type": "NOT_A_TYPE", "value": 1}\n')
+            error = json.loads(await reader.readline())
+            writer.write(b'{"target": "gc_1", "type": "REQUEST", "value": 100.0}\n')
+            await writer.drain()
+            received = json.loads(await reader.readline())  # the grid controller answers
+            writer.close()
+            return error, received
+
+        async def run_both():
+            return await asyncio.gather(runner.run(), external_device())
+
+        result, (error, received) = asyncio.run(run_both())
+        self.assertIn("error", error)
+        self.assertEqual(received["sender"], "gc_1")
+        self.assertEqual(result.external_devices, ["eud_1_1"])
+        self.assertEqual(result.injected_messages, 1)
+        self.assertNotIn("eud_1_1", result.result.devices)  # no longer simulated
+
+    def test_speedup_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            RealTimeRunner(setup_scenario(60), speedup=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
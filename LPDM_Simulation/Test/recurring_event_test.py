@@ -0,0 +1,70 @@
+import unittest
+
+from Build.Objects.fixed_consumption import FixedConsumption
+from Build.Simulation_Operation.recurring_event import periodic_occurrences, profile_occurrences, single_occurrences
+from Build.Simulation_Operation.supervisor import Supervisor
+from Build.Simulation_Operation.support import SECONDS_IN_DAY
+
+
+class TestRecurringEvent(unittest.TestCase):
+
+    def setUp(self):
+        self.sup = Supervisor()
+
+    def make_eud(self, runtime, schedule=None, multiday=0):
+        eud = FixedConsumption(device_id="eud_1", supervisor=self.sup, total_runtime=runtime, modulation_interval=300,
+                               desired_power_level=100.0, schedule=schedule, multiday=multiday)
+        self.sup.register_device(eud)
+        return eud
+
+    def run_events(self, device, end_time):
+        processed = []
+        while device.has_upcoming_event():
+            event, time_stamp = device._queue.pop()
+            if time_stamp > end_time:
+                break
+            processed.append((time_stamp, event._action.__name__))
+            device.update_time(time_stamp)
+            event.run_event()
+        return processed
+
+    def test_queue_size_independent_of_runtime(self):
+        short_run = self.make_eud(SECONDS_IN_DAY, schedule=[[0, "start_up"], [12, "shut_down"]], multiday=1)
+        long_run = self.make_eud(365 * SECONDS_IN_DAY, schedule=[[0, "start_up"], [12, "shut_down"]], multiday=1)
+        self.assertEqual(len(short_run._queue._pq), 2)
+        self.assertEqual(len(long_run._queue._pq), 2)
+
+    def test_occurrences_keep_schedule_order(self):
+        eud = self.make_eud(2 * SECONDS_IN_DAY, schedule=[[0, "start_up"], [0, "shut_down"], [6, "start_up"]],
+                            multiday=1)
+        processed = self.run_events(eud, 2 * SECONDS_IN_DAY)
+        scheduled = [p for p in processed if p[1] != "modulate_power"]
+        self.assertEqual(scheduled, [(0, "start_up"), (0, "shut_down"), (21600, "start_up"),
+                                     (86400, "start_up"), (86400, "shut_down"), (108000, "start_up")])
+        # the scheduled events come before the modulation events created after them.
+        self.assertEqual(processed.index((21600, "start_up")) + 1, processed.index((21600, "modulate_power")))
+
+    def test_periodic_occurrences(self):
+        times = [time_stamp for time_stamp, order, action, args in periodic_occurrences(print, 100, 300, 1000)]
+        self.assertEqual(times, [100, 400, 700])
+        self.assertEqual(list(periodic_occurrences(print, 0, 0, 1000)), [])
+
+    def test_overlapping_profile_matches_full_expansion(self):
+        profile = [(0, "a", ()), (30 * 3600, "b", ()), (2 * 3600, "c", ())]
+        expected = []
+        order = 0
+        for day in range(0, 3 * SECONDS_IN_DAY, SECONDS_IN_DAY):
+            for offset, action, args in profile:
+                expected.append((day + offset, order, action, args))
+                order += 1
+        expected.sort(key=lambda occurrence: occurrence[:2])
+        self.assertEqual(list(profile_occurrences(profile, 0, 3 * SECONDS_IN_DAY)), expected)
+
+    def test_single_occurrences_sorted_by_time(self):
+        occurrences = list(single_occurrences([(5, "a", ()), (1, "b", ()), (5, "c", ())]))
+        self.assertEqual([(time_stamp, action) for time_stamp, order, action, args in occurrences],
+                         [(1, "b"), (5, "a"), (5, "c")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import logging
+import math
+import shutil
+import tempfile
+import unittest
+
+from Build.Simulation_Operation.support import LogNotation
+
+try:
+    import numpy
+    from Build.Simulation_Operation.results_sink import ColumnarResultsHandler, ResultsReader
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, "NumPy is required for the columnar results")
+class TestResultsSink(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def emit(self, handler, time, device_id, tag, value):
+        record = logging.LogRecord("lpdm", logging.INFO, __file__, 0, LogNotation(time, device_id, tag, value, ""),
+                                   None, None)
+        handler.handle(record)
+
+    def test_round_trip_across_chunks(self):
+        handler = ColumnarResultsHandler(self.folder, chunk_size=4)
+        for time in range(10):
+            self.emit(handler, time, "gc_1", "price", time * 0.5)
+            self.emit(handler, time, "eud_1", "power", time)
+        handler.close()
+
+        reader = ResultsReader(self.folder)
+        self.assertEqual(reader.length, 20)
+        self.assertEqual(reader.devices, ["gc_1", "eud_1"])
+        self.assertEqual(reader.tags, ["price", "power"])
+        times, values = reader.series("gc_1", "price")
+        self.assertEqual(times.tolist(), list(range(10)))
+        self.assertEqual(values.tolist(), [time * 0.5 for time in range(10)])
+
+    def test_non_numeric_values_and_other_records(self):
+        handler = ColumnarResultsHandler(self.folder)
+        self.emit(handler, 0, "gc_1", None, None)
+        handler.handle(logging.LogRecord("lpdm", logging.INFO, __file__, 0, "total power", None, None))
+        handler.flush()
+
+        reader = ResultsReader(self.folder)  # readable before the handler is closed
+        self.assertEqual(reader.length, 1)
+        self.assertTrue(math.isnan(reader.column("value")[0]))
+        self.assertEqual(reader.series("gc_1", "price")[0].tolist(), [])
+        handler.close()
+
+    def test_empty_results(self):
+        ColumnarResultsHandler(self.folder).close()
+        reader = ResultsReader(self.folder)
+        self.assertEqual(reader.length, 0)
+        self.assertEqual(len(reader.column("time")), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
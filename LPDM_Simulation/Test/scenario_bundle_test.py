@@ -0,0 +1,121 @@
+import json
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from Build.Simulation_Operation.scenario_bundle import bundle_key, compile_bundle, is_current, load_bundle, \
+    setup_from_bundle, BUNDLE_HEADER
+from Build.Simulation_Operation.scenario_generator import generate_scenario
+from Build.Simulation_Operation.simulation import SimulationSetup
+from Build.Simulation_Operation.supervisor import Supervisor
+
+
+def run_to_end(supervisor, end_time):
+    while supervisor.has_next_event() and supervisor.peek_next_event()[1] <= end_time:
+        supervisor.occur_next_event()
+    return supervisor.finish_all(end_time).to_dict()
+
+
+class TestScenarioBundle(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.config = generate_scenario(2, 3, num_utility_meters=1, eud_types=["light", "fixed_consumption"], seed=3)
+        self.config_file = os.path.join(self.folder, "scenario.json")
+        self.key_file = os.path.join(self.folder, "keys", "bundle.key")
+        with open(self.config_file, 'w') as config_file:
+            json.dump(self.config, config_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_loaded_bundle_matches_setup(self):
+        sim = SimulationSetup(supervisor=Supervisor())
+        sim.build_simulation(self.config, [])
+        expected = run_to_end(sim.supervisor, sim.end_time)
+        filename = compile_bundle(self.config_file, [], filename=os.path.join(self.folder, "a.bundle"),
+                                  key_file=self.key_file)
+        state = load_bundle(filename, key_file=self.key_file)
+        self.assertEqual(state["end_time"], sim.end_time)
+        self.assertEqual(state["islands"], sim.islands)
+        self.assertEqual(run_to_end(state["supervisor"], state["end_time"]), expected)
+
+    def test_key_follows_scenario(self):
+        key = bundle_key(self.config_file, [])
+        self.assertEqual(bundle_key(self.config_file, []), key)
+        self.assertNotEqual(bundle_key(self.config_file, ["devices.gc_1.price_logic=static_price"]), key)
+        self.assertNotEqual(bundle_key(self.config_file, [], {"event_calendar": True}), key)
+        self.config["run_time_days"] += 1
+        with open(self.config_file, 'w') as config_file:
+            json.dump(self.config, config_file)
+        self.assertNotEqual(bundle_key(self.config_file, []), key)
+
+    def test_changed_data_file_is_stale(self):
+        data_file = os.path.join(self.folder, "data.csv")
+        with open(data_file, 'w') as data:
+            data.write("0,1\n")
+        stat = os.stat(data_file)
+        state = {"files": {data_file: (stat.st_mtime_ns, stat.st_size)}}
+        self.assertTrue(is_current(state))
+        with open(data_file, 'a') as data:
+            data.write("60,2\n")
+        self.assertFalse(is_current(state))
+        os.remove(data_file)
+        self.assertFalse(is_current(state))
+
+    def test_version_mismatch(self):
+        filename = compile_bundle(self.config_file, [], filename=os.path.join(self.folder, "a.bundle"),
+                                  key_file=self.key_file)
+        with open(filename, 'wb') as bundle_file:
+            pickle.dump({"version": -1}, bundle_file)
+        with self.assertRaises(ValueError):
+            load_bundle(filename, key_file=self.key_file)
+
+    def test_key_file_is_private(self):
+        compile_bundle(self.config_file, [], filename=os.path.join(self.folder, "a.bundle"), key_file=self.key_file)
+        self.assertEqual(os.stat(self.key_file).st_mode & 0o777, 0o600)
+
+    def test_foreign_bundle_not_unpickled(self):
+        filename = compile_bundle(self.config_file, [], filename=os.path.join(self.folder, "a.bundle"),
+                                  key_file=os.path.join(self.folder, "other.key"))
+        with self.assertRaises(ValueError):
+            load_bundle(filename, key_file=self.key_file)
+        marker = os.path.join(self.folder, "unpickled")
+        with open(filename, 'wb') as bundle_file:
+            bundle_file.write(BUNDLE_HEADER + bytes(32) + pickle.dumps(CreateFile(marker)))
+        with self.assertRaises(ValueError):
+            load_bundle(filename, key_file=self.key_file)
+        self.assertFalse(os.path.exists(marker))
+
+    def test_setup_compiles_again_over_foreign_bundle(self):
+        bundles = os.path.join(self.folder, "bundles")
+        other_key = os.path.join(self.folder, "other.key")
+        logger = logging.getLogger("lpdm")
+        handlers = list(logger.handlers)
+        try:
+            sim = setup_from_bundle(self.config_file, [], folder=bundles, key_file=other_key)
+            filename = os.path.join(bundles, os.listdir(bundles)[0])
+            with self.assertLogs("lpdm", level="WARNING"):
+                sim = setup_from_bundle(self.config_file, [], folder=bundles, key_file=self.key_file)
+            self.assertEqual(load_bundle(filename, key_file=self.key_file)["end_time"], sim.end_time)
+        finally:
+            for handler in list(logger.handlers):
+                if handler not in handlers:
+                    logger.removeHandler(handler)
+                    handler.close()
+
+
+class CreateFile:
+
+    def __init__(self, path):
+        self.path = path
+
+    def __reduce__(self):
+        return open, (self.path, 'w')
+
+
+if __name__ == '__main__':
+    unittest.main()
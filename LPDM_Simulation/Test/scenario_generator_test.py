@@ -0,0 +1,74 @@
+import os
+import random
+import shutil
+import unittest
+
+from Build.Simulation_Operation.scenario_generator import combine_sites, count_devices, gc_links, \
+    generate_load_profiles, generate_scenario, LOAD_PROFILE_FOLDER
+from Build.Simulation_Operation.simulation import SimulationSetup
+from Build.Simulation_Operation.supervisor import Supervisor
+
+
+class TestScenarioGenerator(unittest.TestCase):
+
+    def test_same_seed_same_scenario(self):
+        self.assertEqual(generate_scenario(4, 5, seed=3), generate_scenario(4, 5, seed=3))
+        self.assertNotEqual(generate_scenario(4, 5, seed=3), generate_scenario(4, 5, seed=4))
+
+    def test_device_counts(self):
+        config = generate_scenario(5, 6, pv_fraction=1.0, converter_fraction=0.5)
+        counts = count_devices(config)
+        self.assertEqual(counts["grid_controllers"], 5)
+        self.assertEqual(counts["euds"], 30)
+        self.assertEqual(counts["pvs"], 5)
+        self.assertEqual(counts["utility_meters"], 5)  # every grid controller with a PV has a utility meter
+        self.assertEqual(counts["total"], sum(count for kind, count in counts.items() if kind != "total"))
+
+    def test_layouts(self):
+        rng = random.Random(0)
+        self.assertEqual(gc_links(7, "tree", rng, branching=2), [(0, 1), (0, 2), (1, 3), (1, 4), (2, 5), (2, 6)])
+        self.assertEqual(gc_links(4, "chain", rng), [(0, 1), (1, 2), (2, 3)])
+        mesh = gc_links(10, "mesh", rng, mesh_degree=4)
+        self.assertEqual(len(mesh), 20)
+        self.assertEqual(len(set(mesh)), 20)
+        with self.assertRaises(ValueError):
+            gc_links(3, "star", rng)
+
+    def test_scenario_sets_up(self):
+        config = generate_scenario(3, 4, layout="mesh", pv_fraction=1.0, converter_fraction=0.5, wire_fraction=0.5)
+        sim = SimulationSetup(supervisor=Supervisor())
+        for make_devices in (sim.make_grid_controllers, sim.make_utility_meters, sim.make_pvs, sim.make_euds,
+                             sim.make_converters):
+            make_devices(config, 86400, {})
+        self.assertEqual(len(sim.supervisor.all_devices()), count_devices(config)["total"])
+
+    def test_combine_sites(self):
+        sites = [generate_scenario(2, 3, pv_fraction=1.0, converter_fraction=0.5, wire_fraction=0.5, seed=seed)
+                 for seed in (1, 2)]
+        combined = combine_sites(sites)
+        self.assertEqual(count_devices(combined)["total"], sum(count_devices(site)["total"] for site in sites))
+        self.assertEqual(sites[0]["devices"]["grid_controllers"][0]["device_id"], "gc_1")  # the sites are unchanged
+        second_gc = combined["devices"]["grid_controllers"][2]
+        self.assertEqual(second_gc["device_id"], "gc_s2_1")
+        self.assertEqual(second_gc["battery"]["battery_id"], "battery_s2_1")
+        for link in second_gc["connected_devices"]:
+            self.assertIn("_s2_", link if isinstance(link, str) else link["device_id"])
+        for converter in combined["devices"]["converters"]:
+            self.assertEqual(converter["device_input"].split("_")[1], converter["device_output"].split("_")[1])
+
+    def test_load_profiles_reproducible(self):
+        folder = "generated_test"
+        try:
+            first = generate_load_profiles(folder, 2, seed=5)
+            with open(os.path.join(LOAD_PROFILE_FOLDER, first[0])) as profile_file:
+                first_contents = profile_file.read()
+            second = generate_load_profiles(folder, 2, seed=5)
+            with open(os.path.join(LOAD_PROFILE_FOLDER, second[0])) as profile_file:
+                self.assertEqual(profile_file.read(), first_contents)
+            self.assertEqual(len(first_contents.splitlines()), 8760)
+        finally:
+            shutil.rmtree(os.path.join(LOAD_PROFILE_FOLDER, folder), ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from Build.Objects.battery import Battery
+from Build.Objects.grid_controller import GridController
+from Build.Simulation_Operation.supervisor import Supervisor
+
+
+class TestSimulationResult(unittest.TestCase):
+
+    def setUp(self):
+        self.sup = Supervisor()
+        batt = Battery("batt_1", price_logic="hourly_preference", capacity=5000.0, max_charge_rate=2000.0,
+                       max_discharge_rate=2000.0)
+        self.gc = GridController(device_id="gc_1", supervisor=self.sup, battery=batt, price_logic='weighted_average')
+        self.sup.register_device(self.gc)
+
+    def test_price_stats(self):
+        initial_price = self.gc._price
+        self.gc.update_time(3600)
+        self.gc._price = initial_price + 0.1
+        self.gc.track_price()
+        self.gc.update_time(7200)
+        stats = self.gc.get_price_stats()
+        self.assertEqual(stats["changes"], 1)
+        self.assertAlmostEqual(stats["min"], initial_price)
+        self.assertAlmostEqual(stats["max"], initial_price + 0.1)
+        self.assertAlmostEqual(stats["mean"], initial_price + 0.05)
+        self.assertAlmostEqual(stats["final"], initial_price + 0.1)
+
+    def test_build_result(self):
+        result = self.sup.finish_all(0)
+        self.assertEqual(set(result.devices), {"gc_1"})
+        self.assertEqual(result.devices["gc_1"]["device_type"], self.gc.get_type())
+        self.assertEqual(result.batteries["batt_1"]["grid_controller"], "gc_1")
+        self.assertIn("gc_1", result.grid_controllers)
+        self.assertEqual(result.to_dict()["totals"], result.totals)
+        self.assertIn("efficiency", result.totals)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+from Build.Objects.fixed_consumption import FixedConsumption
+from Build.Simulation_Operation.supervisor import Supervisor
+from Build.Simulation_Operation.support import SECONDS_IN_DAY
+
+
+class TestSupervisorTick(unittest.TestCase):
+
+    def make_supervisor(self, event_calendar=False):
+        sup = Supervisor(event_calendar=event_calendar)
+        for eud_id in ["eud_1", "eud_2", "eud_3"]:
+            eud = FixedConsumption(device_id=eud_id, supervisor=sup, total_runtime=SECONDS_IN_DAY,
+                                   modulation_interval=300, desired_power_level=100.0,
+                                   schedule=[[0, "start_up"], [12, "shut_down"]], multiday=1)
+            sup.register_device(eud)
+        return sup
+
+    def run_ticks(self, sup):
+        ticks = []
+        while sup.has_next_event():
+            ticks.append(sup.occur_next_tick())
+        return ticks
+
+    def test_tick_processes_all_due_devices(self):
+        sup = self.make_supervisor()
+        tick_time, num_events = sup.occur_next_tick()
+        self.assertEqual(tick_time, 0)
+        # the three devices each run their start up event.
+        self.assertEqual(num_events, 3)
+        next_device_id, next_time = sup.peek_next_event()
+        self.assertGreater(next_time, 0)
+
+    def test_ticks_have_distinct_times(self):
+        tick_counts = self.run_ticks(self.make_supervisor())
+        times = [tick_time for tick_time, num_events in tick_counts]
+        self.assertEqual(times, sorted(set(times)))
+
+    def test_calendar_ticks_match_queue_ticks(self):
+        sup, calendar_sup = self.make_supervisor(), self.make_supervisor(event_calendar=True)
+        self.assertEqual(self.run_ticks(sup), self.run_ticks(calendar_sup))
+        self.assertEqual(sup.get_tick_stats(), calendar_sup.get_tick_stats())
+
+    def test_tick_stats(self):
+        sup = self.make_supervisor()
+        self.assertEqual(sup.get_tick_stats(), {"ticks": 0, "events": 0, "max_events": 0})
+        ticks = self.run_ticks(sup)
+        self.assertEqual(sup.get_tick_stats(), {"ticks": len(ticks),
+                                                "events": sum(num_events for tick_time, num_events in ticks),
+                                                "max_events": max(num_events for tick_time, num_events in ticks)})
+
+
+if __name__ == '__main__':
+    unittest.main()
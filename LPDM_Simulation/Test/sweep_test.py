@@ -0,0 +1,53 @@
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+
+from Build.Simulation_Operation.logger import SimulationLogger
+from Build.Simulation_Operation.sweep import override_grid, override_values, write_sweep_results, TOTALS_COLUMNS
+
+
+class TestSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_override_grid(self):
+        override_sets = override_grid({"devices.gc_1.battery_1.capacity": [1000, 2000],
+                                       "devices.gc_1.price_announce_threshold": [".01", ".05"]})
+        self.assertEqual(override_sets, [
+            ["devices.gc_1.battery_1.capacity=1000", "devices.gc_1.price_announce_threshold=.01"],
+            ["devices.gc_1.battery_1.capacity=1000", "devices.gc_1.price_announce_threshold=.05"],
+            ["devices.gc_1.battery_1.capacity=2000", "devices.gc_1.price_announce_threshold=.01"],
+            ["devices.gc_1.battery_1.capacity=2000", "devices.gc_1.price_announce_threshold=.05"]])
+        self.assertEqual(override_values(override_sets[1]), {"devices.gc_1.battery_1.capacity": "1000",
+                                                             "devices.gc_1.price_announce_threshold": ".05"})
+
+    def test_write_results(self):
+        totals = {column: 1.0 for column in TOTALS_COLUMNS}
+        rows = [dict(totals, run_time_days="1", log_folder="logs/simulation_1", error=None),
+                {"run_time_days": "2", "log_folder": None, "error": "ValueError: bad"}]
+        filename = os.path.join(self.folder, "results.csv")
+        write_sweep_results(rows, filename)
+        with open(filename, 'r') as results_file:
+            written = list(csv.DictReader(results_file))
+        self.assertEqual(list(written[0])[0], "run_time_days")
+        self.assertEqual(written[0]["efficiency"], "1.0")
+        self.assertEqual(written[1]["error"], "ValueError: bad")
+
+    def test_log_folders_not_shared(self):
+        loggers = [SimulationLogger() for _ in range(3)]
+        for log_manager in loggers:
+            log_manager.base_path = self.folder
+            log_manager.generate_log_id()  # all pick the same ID, as concurrent runs would
+        for log_manager in loggers:
+            log_manager.create_simulation_log_folder()
+        self.assertEqual(sorted(log_manager.log_id for log_manager in loggers), [1, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
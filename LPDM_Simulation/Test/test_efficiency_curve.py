@@ -52,5 +52,32 @@ class TestEfficiencyCurve(unittest.TestCase):
         ef = curve_data[4]
         self.assertEqual(efficiency_curve.get_converter_loss(load), load - (ef["efficiency"] * load))
 
+
+def linear_scan_efficiency(curve, load):
+    "the efficiency lookup by scanning the curve points, for comparison with the compiled lookup"
+    percent_capacity = abs(load) / max_capacity
+    (ef_1, ef_2) = curve.get_efficiency_inputs(percent_capacity)
+    if not ef_1:
+        return ef_2["efficiency"]
+    elif not ef_2:
+        return ef_1["efficiency"]
+    dydx = ((ef_2["efficiency"] - ef_1["efficiency"]) / (ef_2["capacity"] - ef_1["capacity"]))
+    return ef_1["efficiency"] + (percent_capacity - ef_1["capacity"]) * dydx
+
+
+class TestCompiledEfficiencyCurve(unittest.TestCase):
+    loads = [0, 50, 90, 100, 150, 500, -500, 725, 750, 999, 1000, 1200]
+
+    def test_matches_linear_scan(self):
+        for load in self.loads:
+            self.assertEqual(efficiency_curve.get_efficiency_value(load),
+                             linear_scan_efficiency(efficiency_curve, load))
+
+    def test_batch_matches_scalar(self):
+        losses = efficiency_curve.get_converter_losses(self.loads)
+        for load, loss in zip(self.loads, losses):
+            self.assertEqual(loss, efficiency_curve.get_converter_loss(load))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from Build.Simulation_Operation import timeseries
+from Build.Simulation_Operation.timeseries import load_timeseries, TIME_HMS, TIME_ROW, TIME_SECONDS
+
+
+class TestTimeseries(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        timeseries.clear_cache()
+
+    def tearDown(self):
+        timeseries.use_sidecars(False)
+        timeseries.clear_cache()
+        shutil.rmtree(self.folder)
+
+    def write_csv(self, filename, text):
+        path = os.path.join(self.folder, filename)
+        with open(path, 'w', newline='') as csv_file:
+            csv_file.write(text)
+        return path
+
+    def test_hms_format(self):
+        path = self.write_csv("pv.csv", "0:00:00,0\r00:10:00,0.5\r\r1:00:05,1.0\r")
+        times, values = load_timeseries(path, time_format=TIME_HMS)
+        self.assertEqual(times.tolist(), [0, 600, 3605])
+        self.assertEqual(values.tolist(), [0.0, 0.5, 1.0])
+
+    def test_non_hms_times_use_row_index(self):
+        path = self.write_csv("load.csv", "0.0,1.5\n3600.0,2.5\n\n10.0,3.5\n")
+        times, values = load_timeseries(path, time_format=TIME_HMS)
+        self.assertEqual(times.tolist(), [0, 3600, 3 * 3600])
+        self.assertEqual(values.tolist(), [1.5, 2.5, 3.5])
+
+    def test_row_format_with_header(self):
+        path = self.write_csv("pvwatts.csv", "header\nmore header\nJan,1,0,5.0\nJan,1,1,6.0\n")
+        times, values = load_timeseries(path, value_column=3, data_start=2, time_format=TIME_ROW)
+        self.assertEqual(times.tolist(), [0, 3600])
+        self.assertEqual(values.tolist(), [5.0, 6.0])
+
+    def test_seconds_format(self):
+        path = self.write_csv("weather.csv", "0.0, 22.5\n300.7, 23.0\n")
+        times, values = load_timeseries(path, time_format=TIME_SECONDS)
+        self.assertEqual(times.tolist(), [0, 300])
+        self.assertEqual(values.tolist(), [22.5, 23.0])
+
+    def test_skipped_rows_count_towards_row_number(self):
+        path = self.write_csv("load.csv", "0:00:00,1.5\nshort\n,9.0\n3:00:00,#2.5\n  \nTotals,3.5,extra\n")
+        with self.assertRaises(ValueError):  # '#' is not a comment, so the value does not parse
+            load_timeseries(path)
+        path = self.write_csv("load.csv", "0:00:00,1.5\nshort\n,9.0\n3:00:00,2.5\n  \nTotals,3.5,extra\n")
+        times, values = load_timeseries(path)
+        self.assertEqual(times.tolist(), [0, 3 * 3600, 5 * 3600])
+        self.assertEqual(values.tolist(), [1.5, 2.5, 3.5])
+        self.assertEqual(load_timeseries(self.write_csv("empty.csv", "\n"))[0].tolist(), [])
+
+    def test_cached_until_modified(self):
+        path = self.write_csv("load.csv", "0.0,1.5\n")
+        first = load_timeseries(path)
+        self.assertIs(load_timeseries(path)[0], first[0])
+        self.assertFalse(first[1].flags.writeable)
+        self.write_csv("load.csv", "0.0,2.5\n1.0,3.5\n")
+        os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10 ** 9))
+        self.assertEqual(load_timeseries(path)[1].tolist(), [2.5, 3.5])
+
+    def test_sidecar_skips_parsing(self):
+        timeseries.use_sidecars(True)
+        path = self.write_csv("load.csv", "0:00:00,1.5\n1:00:00,2.5\n")
+        times, values = load_timeseries(path)
+        self.assertTrue(os.path.isdir(os.path.join(self.folder, timeseries.SIDECAR_FOLDER)))
+
+        timeseries.clear_cache()
+        parse = timeseries.parse_timeseries
+        timeseries.parse_timeseries = None  # loading must not parse again
+        try:
+            sidecar_times, sidecar_values = load_timeseries(path)
+        finally:
+            timeseries.parse_timeseries = parse
+        self.assertEqual(sidecar_times.tolist(), times.tolist())
+        self.assertEqual(sidecar_values.tolist(), values.tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import random
+import unittest
+
+from Build.Objects.wire import Wire, calculate_wire_losses
+
+
+def baseline_wire_loss(voltage, resistance, wire_power):
+    wire_current = wire_power / voltage
+    return wire_current * wire_current * resistance
+
+
+class TestWire(unittest.TestCase):
+
+    def test_matches_baseline_formula_exactly(self):
+        random.seed(1)
+        for _ in range(1000):
+            voltage = random.choice([24, 48, 120, 380])
+            wire = Wire(voltage=voltage, resistance=random.uniform(0.001, 1.0), length=0, gauge='14',
+                        current_type='DC')
+            power = random.uniform(0, 5000)
+            self.assertEqual(wire.calculate_power(power), baseline_wire_loss(voltage, wire.resistance, power))
+
+    def test_resistance_from_gauge(self):
+        wire = Wire(voltage=24, resistance=None, length=10, gauge='10', current_type='DC')
+        self.assertAlmostEqual(wire.calculate_power(240), (240 / 24) ** 2 * 10 * 4.07 / 1000)
+
+    def test_batch(self):
+        wires = [Wire(48, 0.2, 0, '14', 'DC'), Wire(24, 0.5, 0, '14', 'DC'), Wire(48, 0.1, 0, '14', 'DC')]
+        powers = [480.3, 100.7, -300]
+        losses = calculate_wire_losses([wire.voltage for wire in wires], [wire.resistance for wire in wires], powers)
+        self.assertEqual(list(losses[:2]), [wire.calculate_power(power) for wire, power in zip(wires[:2], powers)])
+        self.assertEqual(losses[2], 0.0)  # no loss on power flowing in the negative direction
+
+
+if __name__ == '__main__':
+    unittest.main()
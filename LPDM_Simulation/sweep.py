@@ -0,0 +1,48 @@
+########################################################################################################################
+# *** Copyright Notice ***
+#
+# "Price Based Local Power Distribution Management System (Local Power Distribution Manager) v2.0"
+# Copyright (c) 2017, The Regents of the University of California, through Lawrence Berkeley National Laboratory
+# (subject to receipt of any required approvals from the U.S. Dept. of Energy).  All rights reserved.
+#
+# If you have questions about your rights to use or distribute this software, please contact
+# Berkeley Lab's Innovation & Partnerships Office at  IPO@lbl.gov.
+########################################################################################################################
+
+"""
+Parameter sweep portal for the simulation. Calls run_sweep in sweep.py.
+
+Sweep over every combination of override values, given as comma separated lists:
+    python sweep.py base-case.json devices.gc_1.battery_1.capacity=5000,10000 devices.gc_1.price_announce_threshold=.01,.05
+Or run a list of override sets from a file, one set of space separated overrides per line:
+    python sweep.py base-case.json --sets override_sets.txt
+Options: --workers N (defaults to the number of processors), --output results.csv (defaults to sweep_results.csv).
+"""
+
+import argparse
+
+from Build.Simulation_Operation.sweep import override_grid, run_sweep, write_sweep_results
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Run a scenario under many sets of override arguments.")
+    arg_parser.add_argument("config_file")
+    arg_parser.add_argument("grid", nargs="*", help="override key with a comma separated list of values")
+    arg_parser.add_argument("--sets", help="file with one set of space separated override arguments per line")
+    arg_parser.add_argument("--workers", type=int, default=None)
+    arg_parser.add_argument("--output", default="sweep_results.csv")
+    args = arg_parser.parse_args()
+
+    if args.sets:
+        with open(args.sets, 'r') as sets_file:
+            override_sets = [line.split() for line in sets_file if line.strip()]
+    else:
+        grid = {}
+        for grid_arg in args.grid:
+            key, values = grid_arg.split('=', 1)
+            grid[key.strip()] = [value.strip() for value in values.split(',')]
+        override_sets = override_grid(grid)
+
+    rows = run_sweep(args.config_file, override_sets, max_workers=args.workers)
+    write_sweep_results(rows, args.output)
+    print("{} runs ({} failed), results written to {}".format(
+        len(rows), sum(1 for row in rows if row["error"]), args.output))